@@ -0,0 +1,27 @@
+import collections
+
+odir = "results"
+
+# number of patterns per call (online scoring)
+batch_sizes = [1, 8, 32]
+
+# number of calls per batch size
+n_calls = 10000
+
+datasets = collections.OrderedDict()
+datasets['covtype'] = {'train_sizes':[100000]}
+datasets["higgs"] = {'train_sizes':[1000000]}
+
+parameters = collections.OrderedDict()
+parameters['rf'] = {'n_estimators':100,
+                    'max_features':"sqrt", 
+                    'bootstrap':True, 
+                    'tree_type':'standard', 
+                    'max_depth':None,
+                    'n_jobs':4}
+parameters['rf_shallow'] = {'n_estimators':100,
+                            'max_features':"sqrt", 
+                            'bootstrap':True, 
+                            'tree_type':'standard', 
+                            'max_depth':10,
+                            'n_jobs':4}
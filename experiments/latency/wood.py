@@ -0,0 +1,116 @@
+import sys
+sys.path.append(".")
+
+import params
+
+import os
+import time
+import json
+import numpy
+
+from woody import WoodClassifier
+from woody.util import ensure_dir_for_file
+from woody.data import *
+
+def latencies(predict, Xtest, batch_size, n_calls):
+    """ Returns the latencies (in microseconds) of 
+    n_calls calls, each with batch_size patterns.
+    """
+    
+    times = numpy.empty(n_calls, dtype=numpy.float64)
+    
+    for i in xrange(n_calls):
+        start = (i * batch_size) % (Xtest.shape[0] - batch_size)
+        Xbatch = Xtest[start:start + batch_size]
+        call_start_time = time.time()
+        predict(Xbatch)
+        call_end_time = time.time()
+        times[i] = (call_end_time - call_start_time) * 1e6
+        
+    return times
+            
+def single_run(dkey, train_size, param, seed):     
+           
+    print("Processing data set %s with train_size %s, seed %s, and parameters %s ..." % (str(dkey), str(train_size), str(seed), str(param)))
+
+    if dkey == "covtype":
+        Xtrain, ytrain, Xtest, ytest = covtype(train_size=train_size, seed=seed)
+    elif dkey == "higgs":
+        Xtrain, ytrain, Xtest, ytest = higgs(train_size=train_size, seed=seed)
+    else:
+        raise Exception("Unknown data set!")
+    
+    print("")
+    print("Number of training patterns:\t%i" % Xtrain.shape[0])
+    print("Number of test patterns:\t%i" % Xtest.shape[0])
+    print("Dimensionality of the data:\t%i\n" % Xtrain.shape[1])
+        
+    model = WoodClassifier(
+                n_estimators=param['n_estimators'],
+                criterion="gini",
+                max_features=param['max_features'],
+                min_samples_split=2,
+                n_jobs=param['n_jobs'],
+                seed=seed,
+                bootstrap=param['bootstrap'],
+                tree_traversal_mode="dfs",
+                tree_type=param['tree_type'],
+                min_samples_leaf=1,
+                float_type="double",
+                max_depth=param['max_depth'],
+                verbose=0)
+    
+    # training
+    fit_start_time = time.time()
+    model.fit(Xtrain, ytrain)
+    fit_end_time = time.time()
+    
+    # contiguous test patterns in the model's float type
+    Xtest = numpy.ascontiguousarray(Xtest, dtype=numpy.float64)
+    
+    results = {}
+    results['dataset'] = dkey
+    results['param'] = param
+    results['training_time'] = fit_end_time - fit_start_time
+    results['latency'] = {}
+    print("Training time:     %f" % results['training_time'])
+
+    # latencies of predict and predict_fast (p50/p99, microseconds)
+    for batch_size in params.batch_sizes:
+        
+        results['latency'][str(batch_size)] = {}
+        
+        for method in ["predict", "predict_fast"]:
+            
+            times = latencies(getattr(model, method), Xtest, batch_size, params.n_calls)
+            p50, p99 = numpy.percentile(times, [50, 99])
+            results['latency'][str(batch_size)][method] = {'p50':p50, 'p99':p99}
+            print("Latency %s (batch size %i): p50=%.1fus p99=%.1fus" % (method, batch_size, p50, p99))
+            
+        assert numpy.allclose(model.predict(Xtest[:1000]), model.predict_fast(Xtest[:1000]))
+    
+    fname = '%s_%s_%s_%s_%s_%s_%s.json' % (str(param['n_estimators']),
+                                  str(param['max_features']),
+                                  str(param['max_depth']),
+                                  str(param['n_jobs']),
+                                  str(param['bootstrap']),
+                                  str(param['tree_type']),
+                                  str(seed),
+                                )
+    fname = os.path.join(params.odir, str(dkey), str(train_size), fname)
+    ensure_dir_for_file(fname)
+    with open(fname, 'w') as fp:
+        json.dump(results, fp)
+            
+###################################################################################
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument('--dkey', nargs='?', const="covtype", type=str, default="covtype")
+parser.add_argument('--train_size', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--seed', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--key', type=str, default="rf")
+args = parser.parse_args()
+dkey, train_size, seed, key = args.dkey, args.train_size, args.seed, args.key
+###################################################################################
+
+single_run(dkey, train_size, params.parameters[key], seed)
@@ -0,0 +1,25 @@
+import collections
+
+odir = "results"
+
+# rows per block (0: chosen automatically, -1: all test patterns
+# in one block, i.e., one tree after the other)
+block_sizes = [0, -1, 256, 4096]
+
+datasets = collections.OrderedDict()
+datasets['covtype'] = {'train_sizes':[100000, 400000]}
+datasets["higgs"] = {'train_sizes':[1000000]}
+
+parameters = collections.OrderedDict()
+parameters['rf'] = {'n_estimators':16,
+                    'max_features':"sqrt", 
+                    'bootstrap':True, 
+                    'tree_type':'standard', 
+                    'max_depth':None,
+                    'n_jobs':1}
+parameters['rf_shallow'] = {'n_estimators':64,
+                            'max_features':"sqrt", 
+                            'bootstrap':True, 
+                            'tree_type':'standard', 
+                            'max_depth':10,
+                            'n_jobs':1}
@@ -0,0 +1,135 @@
+import sys
+sys.path.append(".")
+
+import params
+
+import os
+import time
+import json
+import numpy
+
+from sklearn.metrics import accuracy_score
+
+from woody import WoodClassifier
+from woody.util import ensure_dir_for_file
+from woody.data import *
+            
+def single_run(dkey, train_size, param, seed, n_reps=3):     
+           
+    print("Processing data set %s with train_size %s, seed %s, and parameters %s ..." % (str(dkey), str(train_size), str(seed), str(param)))
+
+    if dkey == "covtype":
+        Xtrain, ytrain, Xtest, ytest = covtype(train_size=train_size, seed=seed)
+    elif dkey == "higgs":
+        Xtrain, ytrain, Xtest, ytest = higgs(train_size=train_size, seed=seed)
+    else:
+        raise Exception("Unknown data set!")
+    
+    print("")
+    print("Number of training patterns:\t%i" % Xtrain.shape[0])
+    print("Number of test patterns:\t%i" % Xtest.shape[0])
+    print("Dimensionality of the data:\t%i\n" % Xtrain.shape[1])
+        
+    model = WoodClassifier(
+                n_estimators=param['n_estimators'],
+                criterion="gini",
+                max_features=param['max_features'],
+                min_samples_split=2,
+                n_jobs=param['n_jobs'],
+                seed=seed,
+                bootstrap=param['bootstrap'],
+                tree_traversal_mode="dfs",
+                tree_type=param['tree_type'],
+                min_samples_leaf=1,
+                float_type="double",
+                max_depth=param['max_depth'],
+                verbose=0)
+    
+    # training
+    fit_start_time = time.time()
+    model.fit(Xtrain, ytrain)
+    fit_end_time = time.time()
+    
+    results = {}
+    results['dataset'] = dkey
+    results['param'] = param
+    results['training_time'] = fit_end_time - fit_start_time
+    results['n_nodes'] = sum([model.get_n_nodes(i) for i in xrange(param['n_estimators'])])
+    results['testing_time'] = {}
+    print("Training time:     %f" % results['training_time'])
+
+    # testing (best of n_reps runs per block size)
+    for block_size in params.block_sizes:
+
+        if block_size == -1:
+            model.wrapper.params.prediction_block_size = Xtest.shape[0]
+        else:
+            model.wrapper.params.prediction_block_size = block_size
+
+        times = []
+        for _ in xrange(n_reps):
+            test_start_time = time.time()
+            ypred_test = model.predict(Xtest)
+            test_end_time = time.time()
+            times.append(test_end_time - test_start_time)
+
+        results['testing_time'][str(block_size)] = min(times)
+        results['testing_accuracy'] = accuracy_score(ytest, ypred_test)
+        print("Testing time (block size %i): %f" % (block_size, min(times)))
+
+    print("Testing accuracy:  %f" % results['testing_accuracy'])
+    
+    # class probabilities (rows sum up to one, the most probable
+    # class is predicted if it is unique)
+    proba = model.predict_proba(Xtest)
+    assert proba.shape == (Xtest.shape[0], int(ytrain.max()) + 1)
+    assert numpy.allclose(proba.sum(axis=1), 1.0)
+    sorted_proba = numpy.sort(proba, axis=1)
+    unique_max = sorted_proba[:, -1] > sorted_proba[:, -2] + 1e-9
+    assert numpy.array_equal(numpy.argmax(proba, axis=1)[unique_max], ypred_test[unique_max])
+
+    # intra-tree parallelism (n_jobs > n_estimators): the same tree
+    # is fitted for any number of threads
+    single_results = []
+    for n_jobs in [1, 4]:
+        single = WoodClassifier(
+                    n_estimators=1,
+                    criterion="gini",
+                    max_features=param['max_features'],
+                    n_jobs=n_jobs,
+                    seed=seed,
+                    bootstrap=False,
+                    tree_type=param['tree_type'],
+                    max_depth=param['max_depth'],
+                    float_type="double",
+                    verbose=0)
+        single.fit(Xtrain, ytrain)
+        single_results.append((single.get_n_nodes(0), single.predict(Xtest)))
+    assert single_results[0][0] == single_results[1][0]
+    assert numpy.array_equal(single_results[0][1], single_results[1][1])
+
+    fname = '%s_%s_%s_%s_%s_%s_%s.json' % (str(param['n_estimators']),
+                                  str(param['max_features']),
+                                  str(param['max_depth']),
+                                  str(param['n_jobs']),
+                                  str(param['bootstrap']),
+                                  str(param['tree_type']),
+                                  str(seed),
+                                )
+    fname = os.path.join(params.odir, str(dkey), str(train_size), fname)
+    ensure_dir_for_file(fname)
+    with open(fname, 'w') as fp:
+        json.dump(results, fp)
+            
+###################################################################################
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument('--dkey', nargs='?', const="covtype", type=str, default="covtype")
+parser.add_argument('--train_size', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--seed', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--key', type=str, default="rf")
+args = parser.parse_args()
+dkey, train_size, seed, key = args.dkey, args.train_size, args.seed, args.key
+###################################################################################
+
+single_run(dkey, train_size, params.parameters[key], seed)
@@ -0,0 +1,14 @@
+import os
+import params
+
+seeds = [0,1,2,3]
+
+for splitter in params.splitters:
+    for dkey in params.datasets.keys():
+        for train_size in params.datasets[dkey]['train_sizes']:
+            for seed in seeds:
+                for key in params.parameters:
+                    print("Processing splitter %s with data set %s, train_size %s, seed %s, and key %s ..." % (str(splitter), str(dkey), str(train_size), str(seed), str(key)))
+                    cmd = "python wood.py --dkey %s --train_size %i --seed %i --key %s --splitter %s" % (dkey, train_size, seed, key, splitter)
+                    print(cmd)
+                    os.system(cmd)
@@ -0,0 +1,17 @@
+import collections
+
+odir = "results"
+
+# "exact" (structure-of-arrays), "exact_aos" (array-of-structs), "hist"
+splitters = ["exact", "exact_aos", "hist"]
+
+datasets = collections.OrderedDict()
+datasets['covtype'] = {'train_sizes':[100000, 200000, 400000]}
+datasets["higgs"] = {'train_sizes':[1000000, 2000000]}
+
+parameters = collections.OrderedDict()
+parameters['rf'] = {'n_estimators':4,
+                    'max_features':"sqrt", 
+                    'bootstrap':True, 
+                    'tree_type':'standard', 
+                    'n_jobs':1}
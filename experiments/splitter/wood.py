@@ -0,0 +1,94 @@
+import sys
+sys.path.append(".")
+
+import params
+
+import os
+import time
+import json
+
+from sklearn.metrics import accuracy_score
+
+from woody import WoodClassifier
+from woody.util import ensure_dir_for_file
+from woody.data import *
+            
+def single_run(dkey, train_size, param, seed, splitter):     
+           
+    print("Processing data set %s with train_size %s, seed %s, splitter %s, and parameters %s ..." % (str(dkey), str(train_size), str(seed), str(splitter), str(param)))
+
+    if dkey == "covtype":
+        Xtrain, ytrain, Xtest, ytest = covtype(train_size=train_size, seed=seed)
+    elif dkey == "higgs":
+        Xtrain, ytrain, Xtest, ytest = higgs(train_size=train_size, seed=seed)
+    else:
+        raise Exception("Unknown data set!")
+    
+    print("")
+    print("Number of training patterns:\t%i" % Xtrain.shape[0])
+    print("Number of test patterns:\t%i" % Xtest.shape[0])
+    print("Dimensionality of the data:\t%i\n" % Xtrain.shape[1])
+        
+    model = WoodClassifier(
+                n_estimators=param['n_estimators'],
+                criterion="gini",
+                max_features=param['max_features'],
+                min_samples_split=2,
+                n_jobs=param['n_jobs'],
+                seed=seed,
+                bootstrap=param['bootstrap'],
+                tree_traversal_mode="dfs",
+                tree_type=param['tree_type'],
+                splitter=splitter,
+                min_samples_leaf=1,
+                float_type="double",
+                max_depth=None,
+                verbose=0)
+    
+    # training
+    fit_start_time = time.time()
+    model.fit(Xtrain, ytrain)
+    fit_end_time = time.time()
+     
+    # testing
+    test_start_time = time.time()
+    ypred_test = model.predict(Xtest)
+    test_end_time = time.time()
+    
+    results = {}
+    results['dataset'] = dkey
+    results['param'] = param
+    results['splitter'] = splitter
+    results['training_time'] = fit_end_time - fit_start_time
+    results['testing_time'] = test_end_time - test_start_time
+    results['testing_accuracy'] = accuracy_score(ytest, ypred_test)
+    results['n_nodes'] = sum([model.get_n_nodes(i) for i in xrange(param['n_estimators'])])
+    print("Training time:     %f" % results['training_time'])
+    print("Testing time:      %f" % results['testing_time'])
+    print("Testing accuracy:  %f" % results['testing_accuracy'])
+    
+    fname = '%s_%s_%s_%s_%s_%s.json' % (str(param['n_estimators']),
+                                  str(param['max_features']),
+                                  str(param['n_jobs']),
+                                  str(param['bootstrap']),
+                                  str(param['tree_type']),
+                                  str(seed),
+                                )
+    fname = os.path.join(params.odir, str(dkey), str(train_size), splitter, fname)
+    ensure_dir_for_file(fname)
+    with open(fname, 'w') as fp:
+        json.dump(results, fp)
+            
+###################################################################################
+import argparse
+parser = argparse.ArgumentParser()
+parser.add_argument('--dkey', nargs='?', const="covtype", type=str, default="covtype")
+parser.add_argument('--train_size', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--seed', nargs='?', const=0, type=int, default=0)
+parser.add_argument('--key', type=str, default="rf")
+parser.add_argument('--splitter', type=str, default="exact")
+args = parser.parse_args()
+dkey, train_size, seed, key, splitter = args.dkey, args.train_size, args.seed, args.key, args.splitter
+###################################################################################
+
+single_run(dkey, train_size, params.parameters[key], seed, splitter)
@@ -13,7 +13,7 @@ strategies.
 import warnings
 
 try:
-    from woody.models import WoodClassifier, WoodRegressor, HugeWoodClassifier, HugeWoodRegressor, SubsetWoodClassifier, SubsetWoodRegressor
+    from woody.models import WoodClassifier, WoodRegressor, HugeWoodClassifier, HugeWoodRegressor, SubsetWoodClassifier, SubsetWoodRegressor, BinnedMatrix
 except Exception as e:
     warnings.warn("Swig models not compiled yet? Error message: %s" % str(e))
 
@@ -4,4 +4,4 @@
 #
 
 from .base import DataGenerator
-from .store import DiskStore, MemoryStore
\ No newline at end of file
+from .store import DiskStore, MemoryStore, BufferedDiskStore
\ No newline at end of file
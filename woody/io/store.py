@@ -11,6 +11,17 @@ class Store(object):
     
     def __init__(self):
         pass
+    
+    def flush(self):
+        """ Writes all buffered data (if any)
+        """
+        pass
+    
+    def close(self):
+        """ Writes all buffered data and releases 
+        all resources (if any)
+        """
+        pass
 
 class MemoryStore(Store):
     
@@ -44,6 +55,18 @@ class MemoryStore(Store):
         
         return numpy.ascontiguousarray(self._containers[container_key][dkey])
     
+    def get_shape(self, container_key, dkey):
+        
+        return self._containers[container_key][dkey].shape
+    
+    def get_dataset_rows(self, container_key, dkey, start, end):
+        
+        return numpy.ascontiguousarray(self._containers[container_key][dkey][start:end])
+    
+    def delete_dataset(self, container_key, dkey):
+        
+        del self._containers[container_key][dkey]
+    
     def get_keys(self, container_key):
         
         return self._containers[container_key].keys()        
@@ -99,6 +122,28 @@ class DiskStore(Store):
             
         return dset[:,:]
     
+    def get_shape(self, container_key, dkey):
+        
+        # the data are not loaded
+        with h5py.File(container_key, 'r') as container:
+            shape = container.get(dkey).shape
+            
+        return shape
+    
+    def get_dataset_rows(self, container_key, dkey, start, end):
+        
+        # only the rows start, ..., end-1 are loaded
+        with h5py.File(container_key, 'r') as container:
+            dset = numpy.array(container.get(dkey)[start:end, :])
+            
+        return dset
+    
+    def delete_dataset(self, container_key, dkey):
+        
+        s = h5py.File(container_key, 'a', driver="sec2", libver='latest')
+        del s[dkey]
+        s.close()
+    
     def get_keys(self, container_key):
                 
         s = h5py.File(container_key, 'r')
@@ -114,3 +159,148 @@ class DiskStore(Store):
     def load(self, key, loader):
         
         return loader.load(key)
+    
+class BufferedDiskStore(DiskStore):
+    """ Disk store for many appends to the same datasets 
+    (e.g., the leaf buckets): the files stay open, the rows 
+    are buffered per dataset (up to buffer_megabytes in total), 
+    and are appended in multiples of chunk_rows (the chunk 
+    size of the datasets). The buffered rows are written 
+    before any data are read from a file. Call flush() or 
+    close() once all rows have been appended.
+    
+    Parameters
+    ----------
+    buffer_megabytes : int, default 256
+        The maximum size of all buffered rows
+    chunk_rows : int, default 4096
+        The number of rows of a dataset chunk
+    """
+    
+    def __init__(self, buffer_megabytes=256, chunk_rows=4096):
+        
+        self.buffer_megabytes = buffer_megabytes
+        self.chunk_rows = chunk_rows
+        
+        self._files = {}
+        self._buffers = {}
+        self._buffered_bytes = 0
+        
+    def __getstate__(self):
+        
+        # the copies (e.g., of worker processes) neither get the 
+        # file handles nor the buffered rows
+        state = self.__dict__.copy()
+        state['_files'] = {}
+        state['_buffers'] = {}
+        state['_buffered_bytes'] = 0
+        
+        return state
+    
+    def create_dataset(self, container_key, dkey, data):
+        
+        self._close_container(container_key)
+        super(BufferedDiskStore, self).create_dataset(container_key, dkey, data)
+        
+    def append_to_dataset(self, container_key, dkey, data):
+        
+        key = (container_key, dkey)
+        if key not in self._buffers.keys():
+            self._buffers[key] = []
+        self._buffers[key].append(data)
+        self._buffered_bytes += data.nbytes
+        
+        if self._buffered_bytes > self.buffer_megabytes * 1000000:
+            
+            # write the full chunks of all datasets and, if the
+            # remaining rows still need too much space, all rows
+            for buffered_key in self._buffers.keys():
+                self._flush_dataset(buffered_key, aligned=True)
+            if self._buffered_bytes > self.buffer_megabytes * 1000000 / 2:
+                self.flush()
+        
+    def get_dataset(self, container_key, dkey):
+        
+        self._close_container(container_key)
+        
+        return super(BufferedDiskStore, self).get_dataset(container_key, dkey)
+    
+    def get_shape(self, container_key, dkey):
+        
+        self._close_container(container_key)
+        
+        return super(BufferedDiskStore, self).get_shape(container_key, dkey)
+    
+    def get_dataset_rows(self, container_key, dkey, start, end):
+        
+        self._close_container(container_key)
+        
+        return super(BufferedDiskStore, self).get_dataset_rows(container_key, dkey, start, end)
+    
+    def delete_dataset(self, container_key, dkey):
+        
+        self._close_container(container_key)
+        super(BufferedDiskStore, self).delete_dataset(container_key, dkey)
+    
+    def get_keys(self, container_key):
+        
+        self._close_container(container_key)
+        
+        return super(BufferedDiskStore, self).get_keys(container_key)
+        
+    def flush(self):
+        
+        for key in self._buffers.keys():
+            self._flush_dataset(key)
+        for s in self._files.values():
+            s.flush()
+    
+    def close(self):
+        
+        container_keys = set(self._files.keys()) | set([key[0] for key in self._buffers.keys()])
+        for container_key in container_keys:
+            self._close_container(container_key)
+    
+    def _close_container(self, container_key):
+        
+        for key in self._buffers.keys():
+            if key[0] == container_key:
+                self._flush_dataset(key)
+        
+        if container_key in self._files.keys():
+            self._files.pop(container_key).close()
+            
+    def _flush_dataset(self, key, aligned=False):
+        """ Appends the buffered rows of a dataset (only
+        multiples of chunk_rows, if aligned is True).
+        """
+        
+        container_key, dkey = key
+        
+        data = self._buffers.pop(key)
+        data = data[0] if len(data) == 1 else numpy.concatenate(data, axis=0)
+        self._buffered_bytes -= data.nbytes
+        
+        n_rows = data.shape[0]
+        if aligned == True:
+            n_rows -= n_rows % self.chunk_rows
+        if n_rows < data.shape[0]:
+            # copy (the remaining rows are kept, not all rows)
+            self._buffers[key] = [numpy.array(data[n_rows:])]
+            self._buffered_bytes += self._buffers[key][0].nbytes
+        if n_rows == 0:
+            return
+        
+        if container_key not in self._files.keys():
+            ensure_dir_for_file(container_key)
+            self._files[container_key] = h5py.File(container_key, 'a', driver="sec2", libver='latest')
+        s = self._files[container_key]
+        
+        if not dkey in s.keys():
+            dset = s.create_dataset(dkey, (0, data.shape[1]), maxshape=(None, data.shape[1]), chunks=(self.chunk_rows, data.shape[1]), compression="lzf")
+        else:
+            dset = s.get(dkey)
+        
+        offset = dset.shape[0]
+        dset.resize(offset + n_rows, axis=0)
+        dset[offset:, :] = data[:n_rows]
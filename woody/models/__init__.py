@@ -3,6 +3,6 @@
 # License: GPL v2
 #
 
-from .forest import WoodClassifier, WoodRegressor, Wood
+from .forest import WoodClassifier, WoodRegressor, Wood, BinnedMatrix
 from .huge import HugeWoodClassifier, HugeWoodRegressor
 from .subset import SubsetWoodClassifier, SubsetWoodRegressor
\ No newline at end of file
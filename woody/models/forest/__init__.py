@@ -6,3 +6,4 @@
 from .classification import WoodClassifier
 from .regression import WoodRegressor
 from .base import Wood
+from .binned import BinnedMatrix
@@ -10,7 +10,8 @@ import numpy as np
 import cPickle as pickle
 
 from .util import PickableWoodyRFWrapper, ensure_data_types
-from woody.util.array import transpose_array
+from .binned import BinnedMatrix
+from woody.util.array import transpose_array, transpose_array_inplace
 from woody.util import draw_single_tree
             
 class Wood(object):
@@ -25,6 +26,7 @@ class Wood(object):
     TREE_TRAVERSAL_MODE_MAP = {"dfs": 0,
                                "node_size": 1,
                                "prob": 2,
+                               "level": 3,
                                }
     CRITERION_MAP = {"mse": 0,
                      "gini": 1,
@@ -39,6 +41,17 @@ class Wood(object):
     TREE_TYPE_MAP = {"standard":0,
                      "randomized":1,
                      }
+    SPLITTER_MAP = {"exact":0,
+                    "hist":1,
+                    "exact_aos":2,
+                    }
+    NODE_LAYOUT_MAP = {"standard":0,
+                       "compact":1,
+                       }
+    NODE_ORDER_MAP = {"none":0,
+                      "dfs":1,
+                      "bfs":2,
+                      }
     LEAF_STOP_MODE_MAP = {"all":0,
                           "ignore_impurity":1,
                           }
@@ -54,11 +67,17 @@ class Wood(object):
                  bootstrap=True,
                  max_depth=None,
                  min_samples_leaf=1,
+                 max_leaf_nodes=None,
+                 min_impurity_decrease=0.0,
                  learning_type=None,
                  criterion=None,
                  tree_traversal_mode="dfs",
                  leaf_stopping_mode="all",
                  tree_type="randomized",
+                 splitter="exact",
+                 max_bins=256,
+                 node_layout="standard",
+                 store_leaf_dists=False,
                  float_type="double",
                  patts_trans=True,
                  do_patts_trans=True,
@@ -74,11 +93,17 @@ class Wood(object):
         self.bootstrap = bootstrap
         self.max_depth = max_depth
         self.min_samples_leaf = min_samples_leaf
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_impurity_decrease = min_impurity_decrease
         self.learning_type = learning_type
         self.criterion = criterion
         self.tree_traversal_mode = tree_traversal_mode
         self.leaf_stopping_mode = leaf_stopping_mode
         self.tree_type = tree_type
+        self.splitter = splitter
+        self.max_bins = max_bins
+        self.node_layout = node_layout
+        self.store_leaf_dists = store_leaf_dists
         self.float_type = float_type
         self.patts_trans = self.TRANSPOSED_MAP[patts_trans]
         self.do_patts_trans = do_patts_trans
@@ -114,11 +139,17 @@ class Wood(object):
                 "bootstrap": self.bootstrap, 
                 "max_depth": self.max_depth, 
                 "min_samples_leaf": self.min_samples_leaf, 
+                "max_leaf_nodes": self.max_leaf_nodes, 
+                "min_impurity_decrease": self.min_impurity_decrease, 
                 "learning_type": self.learning_type, 
                 "criterion": self.criterion,
                 "leaf_stopping_mode": self.leaf_stopping_mode, 
                 "tree_traversal_mode": self.tree_traversal_mode, 
                 "tree_type": self.tree_type, 
+                "splitter": self.splitter, 
+                "max_bins": self.max_bins, 
+                "node_layout": self.node_layout, 
+                "store_leaf_dists": self.store_leaf_dists, 
                 "float_type": self.float_type, 
                 "patts_trans": self.patts_trans, 
                 "do_patts_trans": self.do_patts_trans,
@@ -134,10 +165,20 @@ class Wood(object):
         for parameter, value in parameters.items():
             self.setattr(parameter, value)
         
-    def fit(self, X, y, indices=None):
+    def fit(self, X, y, indices=None, copy_X=True):
         """ If indices is not None, then 
         consider X[indices] instead of X 
-        (in-place).
+        (in-place). X can also be a BinnedMatrix 
+        (requires tree_type="standard"; the 
+        histogram-based splitter is used).
+        
+        If do_patts_trans is True, the patterns are 
+        needed feature-wise: Fortran-ordered arrays 
+        are used without copying them, C-ordered ones 
+        are transposed into a new array. If copy_X is 
+        False, a C-ordered X is transposed in place 
+        instead (slower, but no copy of X is needed) 
+        and restored after fitting.
         """
 
         if X.shape[0] != y.shape[0]:
@@ -148,10 +189,23 @@ class Wood(object):
         #if self.tree_type == "standard" and self.bootstrap == False:
         #    raise Exception("No randomness given: bootstrap=%s and tree_type=%s" % (str(self.bootstrap), str(self.tree_type)))
 
+        binned = isinstance(X, BinnedMatrix)
+        if binned and self.tree_type != "standard":
+            raise ValueError("A BinnedMatrix can only be used with tree_type='standard'!")
+
         # convert input data to correct types and generate local
         # copies to prevent destruction of objects
-        X, y = ensure_data_types(X, y, self.numpy_dtype_float)
+        if binned:
+            if y.dtype != self.numpy_dtype_float:
+                y = y.astype(self.numpy_dtype_float)
+        else:
+            X, y = ensure_data_types(X, y, self.numpy_dtype_float, order=("F" if self.do_patts_trans else "K"))
         
+        # number of columns of the class probabilities (labels 0, ..., max.
+        # label); params.max_ytrain_value cannot be accessed via the wrapper
+        if self.learning_type == "classification":
+            self.n_classes_ = int(y.max()) + 1
+
         # transform some parameters
         if self.max_features == None:
             max_features = X.shape[1]
@@ -173,14 +227,25 @@ class Wood(object):
 
         if self.min_samples_leaf <= 0:
             raise ValueError("min_samples_leaf must be greater than zero!")
+
+        # best-first growth if the number of leaves is limited
+        max_leaf_nodes = (-1 if self.max_leaf_nodes is None else self.max_leaf_nodes)
+        if self.max_leaf_nodes is not None and self.max_leaf_nodes < 2:
+            raise ValueError("max_leaf_nodes must be None or at least 2!")
+
+        if self.min_impurity_decrease < 0.0:
+            raise ValueError("min_impurity_decrease must be non-negative!")
+
+        if self.store_leaf_dists and self.learning_type != "classification":
+            raise ValueError("store_leaf_dists requires learning_type='classification'!")
+
+        # the histogram-based splitter (only used for tree_type="standard")
+        # stores bin codes as unsigned chars
+        if self.max_bins < 2 or self.max_bins > 256:
+            raise ValueError("max_bins must be in [2, 256]!")
     
         self.wrapper = PickableWoodyRFWrapper(self.float_type)
         
-        if self.do_patts_trans == True:
-            XT = np.empty(X.shape, dtype=X.dtype)
-            transpose_array(X, XT)
-            X = XT
-
         self.wrapper.module.init_extern(self.seed, 
                                         self.n_estimators, 
                                         self.min_samples_split, 
@@ -201,6 +266,12 @@ class Wood(object):
                                         )
         
         self.wrapper.params.lam_crit = self.lam_criterion
+        self.wrapper.params.splitter = self.SPLITTER_MAP[self.splitter]
+        self.wrapper.params.max_bins = self.max_bins
+        self.wrapper.params.max_leaf_nodes = max_leaf_nodes
+        self.wrapper.params.node_layout = self.NODE_LAYOUT_MAP[self.node_layout]
+        self.wrapper.params.min_impurity_decrease = self.min_impurity_decrease
+        self.wrapper.params.store_leaf_dists = int(self.store_leaf_dists)
                     
         if indices is not None:
             use_indices = 1
@@ -223,16 +294,40 @@ class Wood(object):
             indices = np.empty((0, 0), dtype=np.int32)
             indices_weights = np.empty((0, 0), dtype=np.int32)
         
-        self.wrapper.module.fit_extern(X, y, indices, indices_weights, use_indices, self.wrapper.params, self.wrapper.forest)
+        if binned:
+            codes, edges = X.get_wrapper_arrays(self.numpy_dtype_float)
+            self.wrapper.module.fit_binned_extern(codes, X.code_size, edges, X.n_bins, y, indices, indices_weights, use_indices, self.wrapper.params, self.wrapper.forest)
+            return self
+        
+        # feature-wise patterns (array of shape X.shape)
+        transposed_inplace = False
+        if self.do_patts_trans == True:
+            if not X.flags.c_contiguous:
+                X = np.asfortranarray(X)
+            if X.flags.f_contiguous:
+                X = X.T.reshape(X.shape)
+            elif copy_X == False:
+                transpose_array_inplace(X)
+                transposed_inplace = True
+            else:
+                XT = np.empty(X.shape, dtype=X.dtype)
+                transpose_array(X, XT, n_jobs=self.n_jobs)
+                X = XT
+
+        try:
+            self.wrapper.module.fit_extern(X, y, indices, indices_weights, use_indices, self.wrapper.params, self.wrapper.forest)
+        finally:
+            if transposed_inplace == True:
+                transpose_array_inplace(X.reshape((X.shape[1], X.shape[0])))
 
         return self
 
     def predict(self, X, indices=None):
-        """
+        """ X can also be a BinnedMatrix (with 
+        the bins used for fitting the model).
         """
         
-        if X.dtype != self.numpy_dtype_float:
-            X = X.astype(self.numpy_dtype_float)      
+        X = self._ensure_test_data_type(X)
         
         if indices is None: 
             indices = np.empty((0, 0), dtype=np.int32)
@@ -243,10 +338,34 @@ class Wood(object):
                 
         preds = np.ones(X.shape[0], dtype=self.numpy_dtype_float)
         
-        self.wrapper.module.predict_extern(X, preds, indices, self.wrapper.params, self.wrapper.forest)
+        self._predict_extern(X, preds, indices)
 
         return preds
 
+    def predict_fast(self, X, out=None):
+        """ Low-latency predictions for a few patterns 
+        (e.g., a single pattern for online scoring): The 
+        patterns are processed by the calling thread (no 
+        OpenMP fork/join, no timers, no temporary arrays). 
+        X must be a (contiguous) numpy array; a single 
+        pattern can also be given as one-dimensional array.
+        If given, out is used to store the predictions.
+        """
+        
+        if X.ndim == 1:
+            X = X.reshape((1, X.shape[0]))
+        if X.dtype != self.numpy_dtype_float or not X.flags.c_contiguous:
+            X = np.ascontiguousarray(X, dtype=self.numpy_dtype_float)
+            
+        if out is None:
+            out = np.empty(X.shape[0], dtype=self.numpy_dtype_float)
+        elif out.shape[0] != X.shape[0]:
+            raise ValueError("Array out must have one entry per pattern!")
+        
+        self.wrapper.module.predict_fast_extern(X, out, self.wrapper.params, self.wrapper.forest)
+        
+        return out
+
     def predict_all(self, X, indices=None):
         """
         """
@@ -267,17 +386,46 @@ class Wood(object):
 
         return preds
 
+    def predict_proba(self, X, indices=None):
+        """ Returns the class probabilities, one row 
+        per pattern and one column per class label 
+        (0, ..., max. label), i.e., the means of the 
+        class distributions of the leaves reached 
+        (store_leaf_dists=True) or of the votes.
+        """
+        
+        if self.learning_type != "classification":
+            raise ValueError("predict_proba requires learning_type='classification'!")
+        if isinstance(X, BinnedMatrix):
+            raise ValueError("predict_proba does not support a BinnedMatrix!")
+        
+        X = self._ensure_test_data_type(X)
+        
+        if indices is None: 
+            indices = np.empty((0, 0), dtype=np.int32)
+            n_preds = X.shape[0]
+        else:
+            indices = np.array(indices).astype(dtype=np.int32)
+            if indices.ndim == 1:
+                indices = indices.reshape((1, len(indices)))
+            n_preds = indices.shape[1]
+        
+        proba = np.zeros((n_preds, self.n_classes_), dtype=self.numpy_dtype_float)
+        
+        self.wrapper.module.predict_proba_extern(X, proba, indices, self.wrapper.params, self.wrapper.forest)
+        
+        return proba
+
     def get_leaves_ids(self, X, n_jobs=1, indices=None, verbose=0):
         
-        if X.dtype != self.numpy_dtype_float:
-            X = X.astype(self.numpy_dtype_float)
+        X = self._ensure_test_data_type(X)
 
         if indices is None: 
             indices = np.empty((0, 0), dtype=np.int32)
             preds = np.zeros(X.shape[0] * self.n_estimators, dtype=self.numpy_dtype_float)
             self.wrapper.params.prediction_type = 1
             self.wrapper.params.verbosity_level = verbose
-            self.wrapper.module.predict_extern(X, preds, indices, self.wrapper.params, self.wrapper.forest)
+            self._predict_extern(X, preds, indices)
         else:
 
             indices = np.array(indices).astype(dtype=np.int32)
@@ -288,9 +436,46 @@ class Wood(object):
             self.wrapper.params.prediction_type = 1
             self.wrapper.params.verbosity_level = verbose
             
-            self.wrapper.module.predict_extern(X, preds, indices, self.wrapper.params, self.wrapper.forest)            
+            self._predict_extern(X, preds, indices)
             
         return preds
+
+    def get_leaves_buckets(self, X, index=0):
+        """ Assigns the patterns to the leaves of the 
+        tree with the given index in a single pass 
+        (counting sort). Returns the leaf ids of the 
+        patterns (int32), the number of patterns per 
+        node id, and a stable permutation perm that 
+        groups the patterns w.r.t. their leaves (i.e., 
+        X[perm] first contains all patterns of the leaf 
+        with the smallest id, then those of the next 
+        leaf, and so on).
+        """
+        
+        X = np.ascontiguousarray(X, dtype=self.numpy_dtype_float)
+        
+        leaves_ids = np.empty(X.shape[0], dtype=np.int32)
+        counts = np.empty(self.get_n_nodes(index), dtype=np.int32)
+        perm = np.empty(X.shape[0], dtype=np.int32)
+        
+        self.wrapper.module.get_leaves_buckets_extern(X, leaves_ids, counts, perm, index, self.wrapper.params, self.wrapper.forest)
+        
+        return leaves_ids, counts, perm
+        
+    def _ensure_test_data_type(self, X):
+        
+        if not isinstance(X, BinnedMatrix) and X.dtype != self.numpy_dtype_float:
+            X = X.astype(self.numpy_dtype_float)
+        
+        return X
+    
+    def _predict_extern(self, X, preds, indices):
+        
+        if isinstance(X, BinnedMatrix):
+            codes, edges = X.get_wrapper_arrays(self.numpy_dtype_float)
+            self.wrapper.module.predict_binned_extern(codes, X.code_size, edges, preds, indices, self.wrapper.params, self.wrapper.forest)
+        else:
+            self.wrapper.module.predict_extern(X, preds, indices, self.wrapper.params, self.wrapper.forest)
     
     def print_parameters(self):
         """
@@ -305,7 +490,7 @@ class Wood(object):
         n_nodes = tree.node_counter
         
         return n_nodes
-    
+
     def get_wrapped_tree(self, index):
 
         tree = self.wrapper.module.TREE() 
@@ -368,13 +553,45 @@ class Wood(object):
                          node_size=node_size, 
                          )
                     
-    def attach_subtree(self, index, leaf_id, subtree, subtree_index):
+    def attach_subtree(self, index, leaf_id, subtree, subtree_index, optimize_layout=False):
         """ Replaces the leaf with id leaf_id 
-        with the subtree provided
+        with the subtree provided. The ids of the 
+        other nodes are kept (except for the compact 
+        node layout), i.e., several subtrees can be 
+        attached one after the other. If optimize_layout 
+        is True, the nodes are renumbered afterwards 
+        (see optimize_layout); alternatively, call 
+        optimize_layout once after the last attach.
         """
         
         wrapped_subtree = subtree.get_wrapped_tree(subtree_index)
         self.wrapper.module.attach_tree_extern(index, self.wrapper.forest, wrapped_subtree, int(leaf_id))        
+        
+        if optimize_layout == True:
+            self.optimize_layout()
+            
+    def optimize_layout(self, order=None, X=None):
+        """ Renumbers the nodes of all trees such 
+        that nodes visited one after the other are 
+        close in memory ("dfs" or "bfs", "none" to 
+        keep the order). This is done automatically 
+        after fitting; the predictions do not change, 
+        but the node ids do. If X is given, the child 
+        visited more often by these patterns is placed 
+        first (e.g., a sample of the test patterns).
+        Trees with compact node layout are already 
+        stored in depth-first order and are skipped.
+        """
+        
+        if order is not None:
+            self.wrapper.params.node_order = self.NODE_ORDER_MAP[order]
+            
+        if X is None:
+            X = np.empty((0, 0), dtype=self.numpy_dtype_float)
+        else:
+            X = np.ascontiguousarray(X, dtype=self.numpy_dtype_float)
+            
+        self.wrapper.module.optimize_layout_extern(X, self.wrapper.params, self.wrapper.forest)
     
     def save(self, fname):
         """
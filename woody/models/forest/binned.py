@@ -0,0 +1,123 @@
+#
+# Copyright (C) 2015-2017 Fabian Gieseke <fabian.gieseke@di.ku.dk>
+# License: GPL v2
+#
+
+import numpy as np
+
+class BinnedMatrix(object):
+    """
+    Quantized (binned) feature matrix that can be used
+    instead of a float matrix for fitting a model and
+    for computing predictions.
+
+    Each feature is split into at most max_bins bins. The
+    codes are stored column-wise (Fortran order) as uint8
+    (at most 256 bins) or uint16 values. A pattern with
+    feature value x belongs to the first bin b with
+    x <= edges[j, b]; the last edge of a feature is +inf.
+
+    Parameters
+    ----------
+    X : array-like of shape (n_samples, n_features)
+        The patterns to be quantized
+    max_bins : int
+        The maximum number of bins per feature (<= 65536)
+    edges : BinnedMatrix or tuple (edges, n_bins), optional
+        Reuse the bins of another binned matrix (e.g.,
+        the one used for training) instead of computing
+        new ones
+    sample_size : int
+        The bins are computed based on (at most)
+        sample_size patterns
+    seed : int
+        Seed used for selecting the sample
+    """
+
+    def __init__(self, X, max_bins=256, edges=None, sample_size=200000, seed=0):
+
+        if X.ndim != 2:
+            raise ValueError("X must be a two-dimensional array!")
+
+        if isinstance(edges, BinnedMatrix):
+            edges = (edges.edges, edges.n_bins)
+
+        if edges is None:
+            if max_bins < 2 or max_bins > 65536:
+                raise ValueError("max_bins must be in [2, 65536]!")
+            self.edges, self.n_bins = self._compute_edges(X, max_bins, sample_size, seed)
+        else:
+            self.edges = np.array(edges[0], dtype=np.float64)
+            self.n_bins = np.array(edges[1], dtype=np.int32)
+            if self.edges.shape[0] != X.shape[1]:
+                raise ValueError("Bins are given for %i features, but X has %i features!" %
+                                 (self.edges.shape[0], X.shape[1]))
+
+        self.max_bins = self.edges.shape[1]
+
+        if self.max_bins <= 256:
+            dtype = np.uint8
+        else:
+            dtype = np.uint16
+
+        self.codes = np.empty(X.shape, dtype=dtype, order='F')
+        for j in xrange(X.shape[1]):
+            inner_edges = self.edges[j, :self.n_bins[j] - 1]
+            self.codes[:, j] = np.searchsorted(inner_edges, X[:, j], side='left')
+
+    @property
+    def shape(self):
+
+        return self.codes.shape
+
+    @property
+    def code_size(self):
+
+        return self.codes.dtype.itemsize
+
+    def get_wrapper_arrays(self, numpy_dtype_float):
+        """ Returns the codes (feature-wise, as bytes) and
+        the edges in the format expected by the wrapper
+        """
+
+        # (n_features, n_samples * code_size) view, no copy
+        codes = self.codes.T.view(np.uint8)
+        edges = np.ascontiguousarray(self.edges, dtype=numpy_dtype_float)
+
+        return codes, edges
+
+    def _compute_edges(self, X, max_bins, sample_size, seed):
+
+        if X.shape[0] > sample_size:
+            rng = np.random.RandomState(seed)
+            sample = np.sort(rng.choice(X.shape[0], sample_size, replace=False))
+        else:
+            sample = None
+
+        edges = np.empty((X.shape[1], max_bins), dtype=np.float64)
+        edges.fill(np.inf)
+        n_bins = np.empty(X.shape[1], dtype=np.int32)
+
+        for j in xrange(X.shape[1]):
+
+            if sample is None:
+                values = np.array(X[:, j], dtype=np.float64)
+            else:
+                values = np.array(X[sample, j], dtype=np.float64)
+
+            unique = np.unique(values)
+
+            if len(unique) <= max_bins:
+                # one bin per distinct value (midpoints)
+                inner = (unique[:-1] + unique[1:]) / 2.0
+            else:
+                # quantiles (midpoints between neighbouring values)
+                values.sort()
+                pos = (np.arange(1, max_bins) * len(values)) // max_bins
+                inner = np.unique((values[pos - 1] + values[pos]) / 2.0)
+                inner = inner[inner < unique[-1]]
+
+            edges[j, :len(inner)] = inner
+            n_bins[j] = len(inner) + 1
+
+        return edges, n_bins
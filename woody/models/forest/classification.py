@@ -17,10 +17,16 @@ class WoodClassifier(Wood):
                  bootstrap=False,
                  max_depth=None,
                  min_samples_leaf=1,
+                 max_leaf_nodes=None,
+                 min_impurity_decrease=0.0,
                  criterion="gini",
                  tree_traversal_mode="dfs",
                  leaf_stopping_mode="all",
                  tree_type="randomized",
+                 splitter="exact",
+                 max_bins=256,
+                 node_layout="standard",
+                 store_leaf_dists=False,
                  float_type="double",
                  patts_trans=True,
                  do_patts_trans=True,
@@ -37,11 +43,17 @@ class WoodClassifier(Wood):
                  bootstrap=bootstrap,
                  max_depth=max_depth,
                  min_samples_leaf=min_samples_leaf,
+                 max_leaf_nodes=max_leaf_nodes,
+                 min_impurity_decrease=min_impurity_decrease,
                  learning_type="classification",
                  criterion=criterion,
                  tree_traversal_mode=tree_traversal_mode,
                  leaf_stopping_mode=leaf_stopping_mode,
                  tree_type=tree_type,
+                 splitter=splitter,
+                 max_bins=max_bins,
+                 node_layout=node_layout,
+                 store_leaf_dists=store_leaf_dists,
                  float_type=float_type,
                  patts_trans=patts_trans,
                  do_patts_trans=do_patts_trans,
@@ -16,6 +16,10 @@ FILES_TO_BE_COMPILED_CPU = ["tree/base.c",
                             "tree/cpu/criteria.c", 
                             "tree/cpu/standard.c", 
                             "tree/cpu/fastsort.c", 
+                            "tree/cpu/histogram.c", 
+                            "tree/cpu/scratch.c", 
+                            "tree/cpu/level.c", 
+                            "tree/cpu/traversal.c", 
                             "timing.c", 
                             "util.c", 
                             "pqueue.c",
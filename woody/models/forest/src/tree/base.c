@@ -84,7 +84,7 @@ void fit_extern(FLOAT_TYPE *Xtrain,
 
 	fit_forest(Xtrain, nXtrain, dXtrain, Ytrain, bootstrap_indices,
 			bootstrap_indices_weights, nbootstrap_indices, dbootstrap_indices,
-			use_bindices, params, forest);
+			use_bindices, NULL, params, forest);
 	INIT_AFTER_FITTING(params, forest);
 
 	STOP_MY_TIMER(params->timers + 3);
@@ -93,6 +93,61 @@ void fit_extern(FLOAT_TYPE *Xtrain,
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Fit forest given quantized patterns (extern); the codes are stored
+ * feature-wise (dXcodes x nXcodes bytes) and consist of code_size bytes
+ * each, thresholds[F, b] is the upper threshold of bin b for feature F
+ * --------------------------------------------------------------------------------
+ */
+void fit_binned_extern(unsigned char *Xcodes,
+		int dXcodes,
+		int nXcodes,
+		int code_size,
+		FLOAT_TYPE *thresholds,
+		int nthresholds,
+		int dthresholds,
+		int *n_bins,
+		int nn_bins,
+		FLOAT_TYPE *Ytrain,
+		int nYtrain,
+		int *bootstrap_indices,
+		int nbootstrap_indices,
+		int dbootstrap_indices,
+		int *bootstrap_indices_weights,
+		int nbootstrap_indices_weights,
+		int dbootstrap_indices_weights,
+		int use_bindices,
+		PARAMETERS *params,
+		FOREST *forest) {
+
+	int nX = nXcodes / code_size;
+
+	if (params->tree_type != TREE_TYPE_STANDARD) {
+		printf("Error: Quantized patterns require tree_type=standard. Exiting ...\n");
+		exit(EXIT_FAILURE);
+	}
+	params->splitter = SPLITTER_HIST;
+	params->max_bins = dthresholds;
+
+	BINNED_DATA *binned = cpu_wrap_binned_data(Xcodes, nX, dXcodes, code_size,
+			thresholds, dthresholds, n_bins);
+
+	PRINT(params)("\nFitting forest ...\n");
+	START_MY_TIMER(params->timers + 3);
+
+	fit_forest(NULL, nX, dXcodes, Ytrain, bootstrap_indices,
+			bootstrap_indices_weights, nbootstrap_indices, dbootstrap_indices,
+			use_bindices, binned, params, forest);
+	INIT_AFTER_FITTING(params, forest);
+
+	STOP_MY_TIMER(params->timers + 3);
+	PRINT(params)("Fitting time (extern): \t\t\t\t\t\t\t\t\t%2.10f\n",
+	GET_MY_TIMER(params->timers + 3));
+
+	free(binned);
+
+}
+
 /* --------------------------------------------------------------------------------
  * Compute predictions (extern)
  * --------------------------------------------------------------------------------
@@ -110,13 +165,48 @@ void predict_extern(FLOAT_TYPE *Xtest,
 
 	PRINT(params)("Computing predictions ...\n");
 
-	PREDICT(Xtest, nXtest, dXtest, predictions, indices, dindices, params, forest);
+	PREDICT(Xtest, nXtest, dXtest, predictions, indices, dindices, NULL, params, forest);
+
+	PRINT(params)("Prediction time (extern): \t\t\t\t\t\t\t\t%2.10f\n",
+	GET_MY_TIMER(params->timers + 1));
+	PRINT(params)(" -> Tree queries: \t\t\t\t\t\t\t\t\t%2.10f\n",
+	GET_MY_TIMER(params->timers + 2));
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Compute predictions given quantized patterns (extern)
+ * --------------------------------------------------------------------------------
+ */
+void predict_binned_extern(unsigned char *Xcodes,
+		int dXcodes,
+		int nXcodes,
+		int code_size,
+		FLOAT_TYPE *thresholds,
+		int nthresholds,
+		int dthresholds,
+		FLOAT_TYPE *predictions,
+		int npredictions,
+		int *indices,
+		int nindices,
+		int dindices,
+		PARAMETERS *params,
+		FOREST *forest) {
+
+	BINNED_DATA *binned = cpu_wrap_binned_data(Xcodes, nXcodes / code_size, dXcodes,
+			code_size, thresholds, dthresholds, NULL);
+
+	PRINT(params)("Computing predictions ...\n");
+
+	PREDICT(NULL, binned->nX, dXcodes, predictions, indices, dindices, binned, params, forest);
 
 	PRINT(params)("Prediction time (extern): \t\t\t\t\t\t\t\t%2.10f\n",
 	GET_MY_TIMER(params->timers + 1));
 	PRINT(params)(" -> Tree queries: \t\t\t\t\t\t\t\t\t%2.10f\n",
 	GET_MY_TIMER(params->timers + 2));
 
+	free(binned);
+
 }
 
 /* --------------------------------------------------------------------------------
@@ -142,6 +232,84 @@ void predict_all_extern(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Compute class probabilities (extern); proba[i, k] is the probability
+ * of class label k for pattern i
+ * --------------------------------------------------------------------------------
+ */
+void predict_proba_extern(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *proba, int nproba, int dproba, int *indices, int nindices,
+		int dindices, PARAMETERS *params, FOREST *forest) {
+
+	PRINT(params)("Computing class probabilities ...\n");
+
+	cpu_query_forest_proba(Xtest, nXtest, dXtest, proba, nproba, dproba,
+			indices, dindices, NULL, params, forest);
+
+	PRINT(params)("Prediction time (extern): \t\t\t\t\t\t\t\t%2.10f\n",
+	GET_MY_TIMER(params->timers + 1));
+	PRINT(params)(" -> Tree queries: \t\t\t\t\t\t\t\t\t%2.10f\n",
+	GET_MY_TIMER(params->timers + 2));
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of all trees for faster traversals (extern); the
+ * patterns (if nXtest > 0) are used to count the visits of the nodes
+ * --------------------------------------------------------------------------------
+ */
+void optimize_layout_extern(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		PARAMETERS *params, FOREST *forest) {
+
+	if (nXtest > 0) {
+		cpu_optimize_layout(Xtest, nXtest, dXtest, params, forest);
+	} else {
+		cpu_optimize_layout(NULL, 0, 0, params, forest);
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the (integer) leaf ids of the tree with the given index for all
+ * patterns, the number of patterns per leaf (counts, one entry per node of
+ * the tree), and the stable permutation that groups the patterns w.r.t.
+ * their leaves (extern)
+ * --------------------------------------------------------------------------------
+ */
+void get_leaves_buckets_extern(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		int *leaves_ids, int nleaves_ids, int *counts, int ncounts, int *perm,
+		int nperm, unsigned int index, PARAMETERS *params, FOREST *forest) {
+
+	if (index >= (unsigned int) forest->n_trees) {
+		printf("Error: Invalid tree index: %u\n", index);
+		exit(EXIT_FAILURE);
+	}
+
+	TREE *tree = forest->trees + index;
+
+	if (nleaves_ids != nXtest || nperm != nXtest || ncounts < tree->node_counter) {
+		printf("Error: Invalid array sizes for computing leaf buckets!\n");
+		exit(EXIT_FAILURE);
+	}
+
+	cpu_get_leaves_buckets(tree, Xtest, nXtest, dXtest, leaves_ids, counts,
+			ncounts, perm, params);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Compute predictions for a few patterns with low latency (extern); no
+ * timers, no threads, and no output (see cpu_query_forest_fast)
+ * --------------------------------------------------------------------------------
+ */
+void predict_fast_extern(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *predictions, int npredictions, PARAMETERS *params,
+		FOREST *forest) {
+
+	cpu_query_forest_fast(Xtest, nXtest, dXtest, predictions, params, forest);
+
+}
+
 /* --------------------------------------------------------------------------------
  * Frees resources (extern)
  * --------------------------------------------------------------------------------
@@ -158,7 +326,8 @@ void free_resources_extern(PARAMETERS *params, FOREST *forest) {
  */
 long get_num_bytes_forest_extern(PARAMETERS *params, FOREST *forest) {
 
-	int b, n_bytes;
+	int b;
+	long n_bytes;
 
 	n_bytes = 0;
 	n_bytes += sizeof(PARAMETERS);
@@ -166,7 +335,7 @@ long get_num_bytes_forest_extern(PARAMETERS *params, FOREST *forest) {
 
 	for (b = 0; b < forest->n_trees; b++) {
 		n_bytes += sizeof(TREE);
-		n_bytes += forest->trees[b].n_allocated * sizeof(TREE_NODE);
+		n_bytes += get_num_bytes_tree_nodes(forest->trees + b);
 	}
 
 	return n_bytes;
@@ -195,12 +364,30 @@ void get_forest_as_array_extern(PARAMETERS *params, FOREST *forest,
 	// store all trees
 	for (b = 0; b < forest->n_trees; b++) {
 
-		memcpy(aforest_casted + counter, forest->trees + b, sizeof(TREE));
+		TREE *tree = forest->trees + b;
+
+		memcpy(aforest_casted + counter, tree, sizeof(TREE));
 		counter += sizeof(TREE);
 
-		memcpy(aforest_casted + counter, forest->trees[b].root,
-				forest->trees[b].n_allocated * sizeof(TREE_NODE));
-		counter += forest->trees[b].n_allocated * sizeof(TREE_NODE);
+		// only the nodes in use are stored
+		if (tree->compact != NULL) {
+			memcpy(aforest_casted + counter, tree->compact,
+					tree->node_counter * sizeof(COMPACT_TREE_NODE));
+			counter += tree->node_counter * sizeof(COMPACT_TREE_NODE);
+			memcpy(aforest_casted + counter, tree->leaf_values,
+					tree->n_leaves * sizeof(FLOAT_TYPE));
+			counter += tree->n_leaves * sizeof(FLOAT_TYPE);
+		} else {
+			memcpy(aforest_casted + counter, tree->root,
+					tree->node_counter * sizeof(TREE_NODE));
+			counter += tree->node_counter * sizeof(TREE_NODE);
+		}
+
+		if (tree->leaf_dists != NULL) {
+			memcpy(aforest_casted + counter, tree->leaf_dists,
+					get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE));
+			counter += get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE);
+		}
 
 	}
 
@@ -229,14 +416,30 @@ void restore_forest_from_array_extern(PARAMETERS *params, FOREST *forest,
 	forest->trees = (TREE*) malloc(forest->n_trees * sizeof(TREE));
 	for (b = 0; b < forest->n_trees; b++) {
 
-		memcpy(forest->trees + b, aforest_casted + counter, sizeof(TREE));
+		TREE *tree = forest->trees + b;
+
+		memcpy(tree, aforest_casted + counter, sizeof(TREE));
 		counter += sizeof(TREE);
 
-		forest->trees[b].root = (TREE_NODE*) malloc(
-				forest->trees[b].n_allocated * sizeof(TREE_NODE));
-		memcpy(forest->trees[b].root, aforest_casted + counter,
-				forest->trees[b].n_allocated * sizeof(TREE_NODE));
-		counter += forest->trees[b].n_allocated * sizeof(TREE_NODE);
+		allocate_tree_nodes(tree);
+		if (tree->compact != NULL) {
+			memcpy(tree->compact, aforest_casted + counter,
+					tree->node_counter * sizeof(COMPACT_TREE_NODE));
+			counter += tree->node_counter * sizeof(COMPACT_TREE_NODE);
+			memcpy(tree->leaf_values, aforest_casted + counter,
+					tree->n_leaves * sizeof(FLOAT_TYPE));
+			counter += tree->n_leaves * sizeof(FLOAT_TYPE);
+		} else {
+			memcpy(tree->root, aforest_casted + counter,
+					tree->node_counter * sizeof(TREE_NODE));
+			counter += tree->node_counter * sizeof(TREE_NODE);
+		}
+
+		if (tree->leaf_dists != NULL) {
+			memcpy(tree->leaf_dists, aforest_casted + counter,
+					get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE));
+			counter += get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE);
+		}
 
 	}
 
@@ -259,10 +462,18 @@ void save_forest_extern(PARAMETERS *params, FOREST *forest, char *fname) {
 
 		// store all trees
 		for (b = 0; b < forest->n_trees; b++) {
-			fwrite(forest->trees + b, sizeof(TREE), 1, ofile);
-			// store all nodes
-			fwrite(forest->trees[b].root,
-					forest->trees[b].n_allocated * sizeof(TREE_NODE), 1, ofile);
+			TREE *tree = forest->trees + b;
+			fwrite(tree, sizeof(TREE), 1, ofile);
+			// store all nodes (in use)
+			if (tree->compact != NULL) {
+				fwrite(tree->compact, tree->node_counter * sizeof(COMPACT_TREE_NODE), 1, ofile);
+				fwrite(tree->leaf_values, tree->n_leaves * sizeof(FLOAT_TYPE), 1, ofile);
+			} else {
+				fwrite(tree->root, tree->node_counter * sizeof(TREE_NODE), 1, ofile);
+			}
+			if (tree->leaf_dists != NULL) {
+				fwrite(tree->leaf_dists, get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE), 1, ofile);
+			}
 		}
 
 		fclose(ofile);
@@ -288,12 +499,21 @@ void load_forest_extern(PARAMETERS *params, FOREST *forest, char *fname) {
 		retvals = fread(forest, sizeof(FOREST), 1, ifile);
 
 		// load all trees
+		forest->trees = (TREE*) malloc(forest->n_trees * sizeof(TREE));
 		for (b = 0; b < forest->n_trees; b++) {
-			retvals = fread(forest->trees + b, sizeof(TREE), 1, ifile);
+			TREE *tree = forest->trees + b;
+			retvals = fread(tree, sizeof(TREE), 1, ifile);
 			// load all nodes
-			retvals = fread(forest->trees[b].root,
-					forest->trees[b].n_allocated * sizeof(TREE_NODE), 1, ifile);
-
+			allocate_tree_nodes(tree);
+			if (tree->compact != NULL) {
+				retvals = fread(tree->compact, tree->node_counter * sizeof(COMPACT_TREE_NODE), 1, ifile);
+				retvals = fread(tree->leaf_values, tree->n_leaves * sizeof(FLOAT_TYPE), 1, ifile);
+			} else {
+				retvals = fread(tree->root, tree->node_counter * sizeof(TREE_NODE), 1, ifile);
+			}
+			if (tree->leaf_dists != NULL) {
+				retvals = fread(tree->leaf_dists, get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE), 1, ifile);
+			}
 		}
 
 		fclose(ifile);
@@ -315,6 +535,11 @@ void get_tree_extern(TREE *tree, unsigned int index, FOREST *forest) {
 	tree->root = t->root;
 	tree->n_allocated = t->n_allocated;
 	tree->node_counter = t->node_counter;
+	tree->compact = t->compact;
+	tree->leaf_values = t->leaf_values;
+	tree->n_leaves = t->n_leaves;
+	tree->leaf_dists = t->leaf_dists;
+	tree->n_dist = t->n_dist;
 
 }
 
@@ -324,6 +549,25 @@ void get_tree_extern(TREE *tree, unsigned int index, FOREST *forest) {
  */
 void get_tree_node_extern(TREE *tree, int node_id, TREE_NODE *node) {
 
+	if (tree->compact != NULL) {
+
+		COMPACT_TREE_NODE *cnode = tree->compact + node_id;
+
+		node->feature = cnode->feature;
+		node->leaf_criterion = cnode->leaf_criterion;
+		if (cnode->right_offset == 0) {
+			node->left_id = TREE_CHILD_ID_NOT_SET;
+			node->right_id = TREE_CHILD_ID_NOT_SET;
+			node->thres_or_leaf = tree->leaf_values[cnode->leaf_index];
+		} else {
+			node->left_id = node_id + 1;
+			node->right_id = node_id + cnode->right_offset;
+			node->thres_or_leaf = cnode->threshold;
+		}
+		return;
+
+	}
+
 	node->feature = tree->root[node_id].feature;
 	node->left_id = tree->root[node_id].left_id;
 	node->right_id = tree->root[node_id].right_id;
@@ -340,7 +584,26 @@ void attach_tree_extern(unsigned int index, FOREST *forest, TREE *subtree,
 		int leaf_id) {
 
 	TREE *tree = forest->trees + index;
-	attach_tree(tree, subtree, leaf_id);
+	int is_compact = (tree->compact != NULL);
+
+	// subtrees are attached in the standard layout (the node
+	// ids change if the tree is compacted again afterwards)
+	TREE expanded = *subtree;
+	if (subtree->compact != NULL) {
+		expanded.root = get_expanded_nodes(subtree);
+		expanded.leaf_dists = get_expanded_leaf_dists(subtree);
+	}
+
+	expand_tree(tree);
+	attach_tree(tree, &expanded, leaf_id);
+	if (is_compact) {
+		compact_tree(tree);
+	}
+
+	if (subtree->compact != NULL) {
+		free(expanded.root);
+		free(expanded.leaf_dists);
+	}
 
 }
 
@@ -372,6 +635,16 @@ void print_parameters_extern(PARAMETERS *params) {
 	printf("Criterion used for computing splits: %i\n", params->criterion);
 	printf("Learning type: %i\n", params->learning_type);
 	printf("Tree type (tree_type): %i\n", params->tree_type);
+	printf("Splitter (splitter): %i\n", params->splitter);
+	printf("Maximum number of bins (max_bins): %i\n", params->max_bins);
+	printf("Maximum number of leaves (max_leaf_nodes): %i\n",
+			params->max_leaf_nodes);
+	printf("Minimum impurity decrease (min_impurity_decrease): %f\n",
+			params->min_impurity_decrease);
+	printf("Node layout (node_layout): %i\n", params->node_layout);
+	printf("Node order (node_order): %i\n", params->node_order);
+	printf("Store class distributions of leaves (store_leaf_dists): %i\n",
+			params->store_leaf_dists);
 	printf("Double precision? (USE_DOUBLE): %i\n", USE_DOUBLE);
 	printf(
 			"==========================================================================================\n");
@@ -14,7 +14,7 @@
 void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 		FLOAT_TYPE *Ytrain, int *bootstrap_indices, int *bootstrap_indices_weights,
 		int n_bootstrap_indices, int d_bootstrap_indices, int use_bindices,
-		PARAMETERS *params, FOREST *forest) {
+		BINNED_DATA *binned_input, PARAMETERS *params, FOREST *forest) {
 
 	int b;
 
@@ -28,6 +28,10 @@ void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 	params->nXtrain = nXtrain;
 	params->dXtrain = dXtrain;
 
+	// more threads than trees: all threads build the same tree (features
+	// and subtrees are processed in parallel, see process_all_nodes)
+	params->intra_tree_parallel = params->num_threads > params->n_estimators;
+
 	// initialize forest and training data
 	init_forest(forest, params->n_estimators);
 
@@ -39,37 +43,80 @@ void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 		rstates[b] = rand();
 	}
 
-#pragma omp parallel for
-	for (b = 0; b < params->n_estimators; b++) {
+	// quantize all features once (shared by all trees), unless
+	// already quantized patterns are given
+	BINNED_DATA *binned = binned_input;
+	if (binned == NULL && params->splitter == SPLITTER_HIST
+			&& params->tree_type == TREE_TYPE_STANDARD) {
+		binned = cpu_init_binned_data(Xtrain, nXtrain, dXtrain, params);
+	}
 
-		TRAINING_DATA *train_data = INIT_TRAINING_DATA(Xtrain, nXtrain, dXtrain, Ytrain, params);
+	if (params->intra_tree_parallel) {
 
-		if (use_bindices) {
-			INIT_BINDICES(train_data, nXtrain, &rstates[b],
+		// trees one after the other (each one by all threads)
+		for (b = 0; b < params->n_estimators; b++) {
+			fit_single_tree(forest->trees + b, Xtrain, nXtrain, dXtrain, Ytrain,
 					bootstrap_indices + b * d_bootstrap_indices,
 					bootstrap_indices_weights + b * d_bootstrap_indices,
-					d_bootstrap_indices, params);
-		} else {
-			INIT_BINDICES(train_data, nXtrain, &rstates[b], NULL, NULL, -1, params);
+					d_bootstrap_indices, use_bindices, binned, params, &rstates[b]);
 		}
 
-		// compute mapped labels
-		train_data->Ytrain_mapped = (FLOAT_TYPE*) malloc(
-				train_data->bindices->n_indices * sizeof(FLOAT_TYPE));
-		compute_mapped_labels(params, train_data);
+	} else {
 
-		build_single_tree(forest->trees + b, train_data, params, &rstates[b]);
+#pragma omp parallel for
+		for (b = 0; b < params->n_estimators; b++) {
+			fit_single_tree(forest->trees + b, Xtrain, nXtrain, dXtrain, Ytrain,
+					bootstrap_indices + b * d_bootstrap_indices,
+					bootstrap_indices_weights + b * d_bootstrap_indices,
+					d_bootstrap_indices, use_bindices, binned, params, &rstates[b]);
+		}
 
-		FREE_BINDICES(train_data, use_bindices);
-		free(train_data->Ytrain_mapped);
-		FREE_TRAINING_DATA(train_data, params);
+	}
 
+	if (binned != NULL && binned != binned_input) {
+		cpu_free_binned_data(binned);
 	}
 
 	free(rstates);
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Fits a single tree (training data, bootstrap indices, ...)
+ * --------------------------------------------------------------------------------
+ */
+void fit_single_tree(TREE *tree, FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
+		FLOAT_TYPE *Ytrain, int *bindices, int *bindices_weights,
+		int d_bootstrap_indices, int use_bindices, BINNED_DATA *binned,
+		PARAMETERS *params, unsigned int *rstate) {
+
+	TRAINING_DATA *train_data = INIT_TRAINING_DATA(Xtrain, nXtrain, dXtrain, Ytrain, params);
+	train_data->binned = binned;
+
+	if (use_bindices) {
+		INIT_BINDICES(train_data, nXtrain, rstate, bindices, bindices_weights,
+				d_bootstrap_indices, params);
+	} else {
+		INIT_BINDICES(train_data, nXtrain, rstate, NULL, NULL, -1, params);
+	}
+
+	// compute mapped labels
+	train_data->Ytrain_mapped = (FLOAT_TYPE*) malloc(
+			train_data->bindices->n_indices * sizeof(FLOAT_TYPE));
+	compute_mapped_labels(params, train_data);
+
+	// scratch arena of the tree (sized for the root, reused for all nodes)
+	INIT_SCRATCH(train_data, params);
+
+	build_single_tree(tree, train_data, params, rstate);
+
+	FREE_SCRATCH(train_data, params);
+	FREE_BINDICES(train_data, use_bindices);
+	free(train_data->Ytrain_mapped);
+	FREE_TRAINING_DATA(train_data, params);
+
+}
+
 /* --------------------------------------------------------------------------------
  * Builds a single tree.
  * --------------------------------------------------------------------------------
@@ -77,14 +124,37 @@ void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 void build_single_tree(TREE *tree, TRAINING_DATA *train_data,
 		PARAMETERS *params, unsigned int *rstate) {
 
-	init_tree(tree, 128);
-	PQUEUE *traversal_queue = pqueue_new(10);
-
 	TRAVERSAL_RECORD *root_record = init_traversal_record(0,
 			train_data->bindices->n_indices, train_data->dXtrain, 0,
 			TREE_ROOT_PARENT_ID, NO_LEFT_CHILD, NO_LEAF);
 	init_const_features_array(root_record->const_features, train_data->dXtrain);
 
+	if (params->intra_tree_parallel) {
+
+		// all threads work on this tree (features and subtrees
+		// are processed via tasks)
+#pragma omp parallel
+#pragma omp single
+		build_subtree(tree, root_record, train_data, params, rstate);
+
+	} else {
+
+		build_subtree(tree, root_record, train_data, params, rstate);
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Builds the subtree rooted at the given traversal record (as a new tree)
+ * --------------------------------------------------------------------------------
+ */
+void build_subtree(TREE *tree, TRAVERSAL_RECORD *root_record,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate) {
+
+	init_tree(tree, 128);
+	PQUEUE *traversal_queue = pqueue_new(10);
+
 	pqueue_push(traversal_queue, (void*) root_record, 0);
 	process_all_nodes(tree, train_data, traversal_queue, params, rstate);
 
@@ -101,10 +171,44 @@ void process_all_nodes(TREE *tree, TRAINING_DATA *train_data,
 
 	int j, n_trecords;
 
+	// subtrees built by other tasks (intra-tree parallelism)
+	int n_subtrees = 0;
+	int n_subtrees_allocated = 0;
+	SUBTREE_TASK **subtrees = NULL;
+
+	if (params->max_leaf_nodes > 0) {
+		process_all_nodes_best_first(tree, train_data, traversal_queue, params, rstate);
+		return;
+	}
+
 	while (!pqueue_is_empty(traversal_queue)) {
 
-		// get and remove single record
-		TRAVERSAL_RECORD **trecords = get_chunk_trecords(traversal_queue, &n_trecords, 1);
+		// get and remove single record (level-wise: all records of the current
+		// level, which are the only ones in the queue)
+		int n_to_be_removed = 1;
+		if (params->tree_traversal_mode == TREE_TRAVERSAL_MODE_LEVEL) {
+			n_to_be_removed = pqueue_size(traversal_queue);
+		}
+		TRAVERSAL_RECORD **trecords = get_chunk_trecords(traversal_queue, &n_trecords, n_to_be_removed);
+
+		// large nodes (except for the root): subtree is built by a new task; this
+		// is also done without intra-tree parallelism (the task is executed at
+		// once) such that the same random numbers are used for any n_jobs
+		if (tree->node_counter > 0
+				&& params->tree_traversal_mode != TREE_TRAVERSAL_MODE_LEVEL
+				&& trecords[0]->end - trecords[0]->start >= INTRA_TREE_TASK_MIN_SAMPLES) {
+
+			if (n_subtrees == n_subtrees_allocated) {
+				n_subtrees_allocated = max(2 * n_subtrees_allocated, 8);
+				subtrees = (SUBTREE_TASK**) realloc(subtrees,
+						n_subtrees_allocated * sizeof(SUBTREE_TASK*));
+			}
+			subtrees[n_subtrees++] = spawn_subtree_task(tree, trecords[0],
+					train_data, params, rstate);
+			free(trecords);
+			continue;
+
+		}
 
 		// compute best splits (results are stored in trecords)
 		COMPUTE_SPLITS(trecords, n_trecords, train_data, params, rstate);
@@ -113,12 +217,159 @@ void process_all_nodes(TREE *tree, TRAINING_DATA *train_data,
 		generate_leaves_nodes(tree, trecords, n_trecords, train_data, params, traversal_queue);
 
 		for (j = 0; j < n_trecords; j++) {
+			cpu_free_traversal_histograms(trecords[j], train_data);
 			free_traversal_record(trecords[j]);
 		}
 		free(trecords);
 
 	}
 
+	if (n_subtrees > 0) {
+
+		// wait for the tasks and attach their subtrees (in the order of creation)
+#pragma omp taskwait
+		for (j = 0; j < n_subtrees; j++) {
+			attach_tree(tree, &(subtrees[j]->tree), subtrees[j]->leaf_id);
+			free_tree(&(subtrees[j]->tree));
+			free(subtrees[j]);
+		}
+
+	}
+	free(subtrees);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Process all nodes best-first: the split of each record is computed before
+ * the record is expanded; records with a larger weighted impurity decrease
+ * are expanded first until max_leaf_nodes leaves are reached
+ * --------------------------------------------------------------------------------
+ */
+void process_all_nodes_best_first(TREE *tree, TRAINING_DATA *train_data,
+		PQUEUE *traversal_queue, PARAMETERS *params, unsigned int *rstate) {
+
+	// number of leaves (including the records in the queue)
+	int n_leaves = 1;
+
+	while (!pqueue_is_empty(traversal_queue)) {
+
+		TRAVERSAL_RECORD *trecord = (TRAVERSAL_RECORD*) pqueue_pop(traversal_queue, NULL);
+		unsigned int leaf_criterion = LEAF_CRIT_NO_LEAF;
+
+		if (n_leaves >= params->max_leaf_nodes) {
+
+			leaf_criterion = LEAF_CRIT_MAX_LEAF_NODES;
+
+		} else if (!trecord->split_computed) {
+
+			// compute best split and push the record again (its own
+			// histograms are kept until it is expanded)
+			COMPUTE_SPLITS(&trecord, 1, train_data, params, rstate);
+			trecord->split_computed = 1;
+			cpu_detach_histogram_cache(trecord, train_data);
+
+			leaf_criterion = get_leaf_criterion(trecord, train_data, params);
+			if (leaf_criterion == LEAF_CRIT_NO_LEAF) {
+				pqueue_push(traversal_queue, (void*) trecord,
+						get_best_first_priority(get_weighted_impurity_decrease(trecord, train_data)));
+				continue;
+			}
+
+		}
+
+		if (leaf_criterion != LEAF_CRIT_NO_LEAF) {
+
+			generate_leaf(tree, trecord->start, trecord->end, trecord->parent_id,
+					trecord->is_left_child, leaf_criterion, train_data, params);
+
+		} else {
+
+			// one leaf is replaced by two new ones
+			int node_id = generate_internal_tree_node(tree,
+					trecord->parent_id, trecord->is_left_child,
+					NO_LEAF,
+					trecord->split_record->feature,
+					trecord->split_record->threshold,
+					trecord->end - trecord->start);
+			generate_traversal_records_children(tree, train_data,
+					traversal_queue, trecord, params, node_id);
+			n_leaves++;
+
+		}
+
+		cpu_free_traversal_histograms(trecord, train_data);
+		free_traversal_record(trecord);
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the impurity decrease of the split of a traversal record weighted
+ * by the fraction of (bootstrap) samples that reach the node
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE get_weighted_impurity_decrease(TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data) {
+
+	FLOAT_TYPE fraction = ((FLOAT_TYPE) (trecord->end - trecord->start))
+			/ train_data->bindices->n_indices;
+
+	return fraction * trecord->split_record->improvement;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Maps a (weighted) impurity decrease to a priority for best-first growth
+ * (the larger the decrease, the smaller the priority)
+ * --------------------------------------------------------------------------------
+ */
+int get_best_first_priority(FLOAT_TYPE decrease) {
+
+	int key;
+	float value = (float) decrease;
+
+	// the bit patterns of non-negative floats are ordered like
+	// their values (and are all larger than INT_MIN when negated)
+	if (!(value > 0.0)) {
+		value = 0.0;
+	}
+	memcpy(&key, &value, sizeof(int));
+
+	return -key;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Creates a task that builds the subtree of the given traversal record; a
+ * leaf is added to the tree as placeholder, which is replaced by the subtree
+ * once the task is done. The subtree gets its own random state, which is drawn
+ * from the state of the parent when the record is processed (i.e., it does
+ * not depend on the order in which the tasks are executed). Without
+ * intra-tree parallelism, the task is executed immediately.
+ * --------------------------------------------------------------------------------
+ */
+SUBTREE_TASK *spawn_subtree_task(TREE *tree, TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate) {
+
+	SUBTREE_TASK *subtree = (SUBTREE_TASK*) malloc(sizeof(SUBTREE_TASK));
+
+	subtree->leaf_id = generate_tree_leaf(tree, trecord->parent_id,
+			trecord->is_left_child, 0.0, LEAF_CRIT_NO_LEAF);
+	subtree->rstate = custom_rand_r(rstate);
+
+	// the histograms of the parent are shared with the sibling
+	cpu_detach_histogram_cache(trecord, train_data);
+
+	// the record becomes the root of the subtree
+	trecord->parent_id = TREE_ROOT_PARENT_ID;
+	trecord->is_left_child = NO_LEFT_CHILD;
+
+#pragma omp task firstprivate(subtree, trecord) if(params->intra_tree_parallel)
+	build_subtree(&(subtree->tree), trecord, train_data, params, &(subtree->rstate));
+
+	return subtree;
+
 }
 
 /* --------------------------------------------------------------------------------
@@ -166,10 +417,19 @@ void generate_traversal_records_children(TREE *tree, TRAINING_DATA *train_data,
 			start, end, split_record->threshold, split_record->feature, params,
 			train_data);
 
+	// histograms of this node are kept for the children (subtraction)
+	HIST_CACHE *hist_cache = cpu_init_histogram_cache(trecord, split_record->pos, train_data);
+
 	// compute priorites based on traversal mode
 	int prio_left, prio_right;
 
-	if (params->tree_traversal_mode == TREE_TRAVERSAL_MODE_DFS) {
+	if (params->max_leaf_nodes > 0) {
+
+		// best-first: priorities are set once the splits are known
+		prio_left = BEST_FIRST_PRIO_NOT_COMPUTED;
+		prio_right = BEST_FIRST_PRIO_NOT_COMPUTED;
+
+	} else if (params->tree_traversal_mode == TREE_TRAVERSAL_MODE_DFS) {
 
 		prio_right = -depth;
 		prio_left = -(depth + 1);
@@ -179,6 +439,11 @@ void generate_traversal_records_children(TREE *tree, TRAINING_DATA *train_data,
 		prio_right = -(end - split_record->pos);
 		prio_left = -(split_record->pos - start);
 
+	} else if (params->tree_traversal_mode == TREE_TRAVERSAL_MODE_LEVEL) {
+
+		prio_left = depth + 1;
+		prio_right = depth + 1;
+
 	} else if (params->tree_traversal_mode == TREE_TRAVERSAL_MODE_PROB) {
 
 		if (split_record->prob_left > split_record->prob_right) {
@@ -231,18 +496,22 @@ void generate_traversal_records_children(TREE *tree, TRAINING_DATA *train_data,
 	if (split_record->prob_left > split_record->prob_right) {
 		generate_next_leaf_node(node_id, start, split_record->pos, left_leaf_criterion,
 				depth, prio_left, LEFT_CHILD, tree, huge_traversal_queue,
-				trecord, train_data, params);
+				trecord, hist_cache, train_data, params);
 		generate_next_leaf_node(node_id, split_record->pos, end, right_leaf_criterion,
 				depth, prio_right, NO_LEFT_CHILD, tree, huge_traversal_queue,
-				trecord, train_data, params);
+				trecord, hist_cache, train_data, params);
 	} else {
 
 		generate_next_leaf_node(node_id, split_record->pos, end, right_leaf_criterion,
 				depth, prio_right, NO_LEFT_CHILD, tree, huge_traversal_queue,
-				trecord, train_data, params);
+				trecord, hist_cache, train_data, params);
 		generate_next_leaf_node(node_id, start, split_record->pos, left_leaf_criterion,
 				depth, prio_left, LEFT_CHILD, tree, huge_traversal_queue,
-				trecord, train_data, params);
+				trecord, hist_cache, train_data, params);
+	}
+
+	if (hist_cache != NULL) {
+		cpu_release_histogram_cache(hist_cache, train_data);
 	}
 
 }
@@ -250,7 +519,7 @@ void generate_traversal_records_children(TREE *tree, TRAINING_DATA *train_data,
 void generate_next_leaf_node(int node_id, int start, int end, unsigned int leaf_criterion,
 		int depth, int prio, int child_flag, TREE *tree,
 		PQUEUE *huge_traversal_queue, TRAVERSAL_RECORD *trecord,
-		TRAINING_DATA *train_data, PARAMETERS *params) {
+		HIST_CACHE *hist_cache, TRAINING_DATA *train_data, PARAMETERS *params) {
 
 	if (leaf_criterion != LEAF_CRIT_NO_LEAF) {
 
@@ -264,6 +533,16 @@ void generate_next_leaf_node(int node_id, int start, int end, unsigned int leaf_
 		update_const_features_array(record->const_features,
 				trecord->const_features, train_data->dXtrain);
 
+		if (hist_cache != NULL) {
+			record->hist_cache = hist_cache;
+			record->is_smaller_child = (start == hist_cache->start_smaller);
+			if (record->is_smaller_child) {
+				hist_cache->smaller_pending = 1;
+			} else {
+				hist_cache->larger_pending = 1;
+			}
+		}
+
 	}
 
 }
@@ -281,33 +560,7 @@ void generate_leaves_nodes(TREE *tree, TRAVERSAL_RECORD **trecords,
 	for (i = 0; i < n_trecords; i++) {
 
 		int n_node_samples = trecords[i]->end - trecords[i]->start;
-		unsigned int leaf_criterion = LEAF_CRIT_NO_LEAF;
-
-		if (trecords[i]->split_record->leaf_detected) {
-			leaf_criterion = LEAF_CRIT_DETECTED;
-		}
-
-		if (trecords[i]->depth >= params->max_depth){
-			leaf_criterion = LEAF_CRIT_MAX_DEPTH;
-		}
-
-		if (trecords[i]->end - trecords[i]->start < params->min_samples_split){
-			leaf_criterion = LEAF_CRIT_MIN_SAMPLES_SPLIT;
-		}
-
-		if (trecords[i]->end - trecords[i]->start < 2 * params->min_samples_leaf){
-			leaf_criterion = LEAF_CRIT_MIN_SAMPLES_LEAF;
-		}
-
-		if (trecords[i]->split_record->impurity <= MIN_IMPURITY_SPLIT){
-			if (params->leaf_stopping_mode != LEAF_MODE_STOP_IGNORE_IMPURITY){
-				leaf_criterion = LEAF_CRIT_MIN_IMPURITY;
-			}
-		}
-
-		if (trecords[i]->split_record->pos >= trecords[i]->end){
-			leaf_criterion = LEAF_CRIT_POS_END;
-		}
+		unsigned int leaf_criterion = get_leaf_criterion(trecords[i], train_data, params);
 
 		if (leaf_criterion != LEAF_CRIT_NO_LEAF) {
 
@@ -334,6 +587,50 @@ void generate_leaves_nodes(TREE *tree, TRAVERSAL_RECORD **trecords,
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Checks if a traversal record (with computed split) yields a leaf
+ * --------------------------------------------------------------------------------
+ */
+unsigned int get_leaf_criterion(TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	unsigned int leaf_criterion = LEAF_CRIT_NO_LEAF;
+
+	if (trecord->split_record->leaf_detected) {
+		leaf_criterion = LEAF_CRIT_DETECTED;
+	}
+
+	if (trecord->depth >= params->max_depth){
+		leaf_criterion = LEAF_CRIT_MAX_DEPTH;
+	}
+
+	if (trecord->end - trecord->start < params->min_samples_split){
+		leaf_criterion = LEAF_CRIT_MIN_SAMPLES_SPLIT;
+	}
+
+	if (trecord->end - trecord->start < 2 * params->min_samples_leaf){
+		leaf_criterion = LEAF_CRIT_MIN_SAMPLES_LEAF;
+	}
+
+	if (trecord->split_record->impurity <= MIN_IMPURITY_SPLIT){
+		if (params->leaf_stopping_mode != LEAF_MODE_STOP_IGNORE_IMPURITY){
+			leaf_criterion = LEAF_CRIT_MIN_IMPURITY;
+		}
+	}
+
+	if (params->min_impurity_decrease > 0.0
+			&& get_weighted_impurity_decrease(trecord, train_data) < params->min_impurity_decrease){
+		leaf_criterion = LEAF_CRIT_MIN_IMPURITY_DECREASE;
+	}
+
+	if (trecord->split_record->pos >= trecord->end){
+		leaf_criterion = LEAF_CRIT_POS_END;
+	}
+
+	return leaf_criterion;
+
+}
+
 /* --------------------------------------------------------------------------------
  * Generates a single leaf node
  * --------------------------------------------------------------------------------
@@ -349,7 +646,19 @@ void generate_leaf(TREE *tree, int start, int end, int parent_id,
 		leaf_value = train_data->classes[(int) leaf_value];
 	}
 
-	generate_tree_leaf(tree, parent_id, is_left_child, leaf_value, leaf_criterion);
+	int node_id = generate_tree_leaf(tree, parent_id, is_left_child, leaf_value, leaf_criterion);
+
+	if (params->store_leaf_dists && params->learning_type == LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+
+		// one entry per original class label
+		int k, n_dist = 0;
+		for (k = 0; k < train_data->n_classes; k++) {
+			n_dist = max(n_dist, ((int) train_data->classes[k]) + 1);
+		}
+		cpu_criterion_leaf_dist(start, end, get_leaf_dist(tree, node_id, n_dist),
+				n_dist, train_data);
+
+	}
 
 }
 
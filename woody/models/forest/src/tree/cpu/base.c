@@ -18,6 +18,103 @@ void cpu_init(PARAMETERS *params, FOREST *forest) {
  */
 void cpu_init_after_fitting(PARAMETERS *params, FOREST *forest) {
 
+	int b;
+
+	if (params->node_layout == NODE_LAYOUT_COMPACT
+			&& params->dXtrain > COMPACT_MAX_FEATURES) {
+		PRINT(params)("Warning: Too many features for compact node layout, keeping standard layout!\n");
+		params->node_layout = NODE_LAYOUT_STANDARD;
+	}
+
+	// standard layout: renumber nodes (compact trees are
+	// stored in depth-first order anyway)
+	if (params->node_layout == NODE_LAYOUT_STANDARD) {
+		cpu_optimize_layout(NULL, 0, 0, params, forest);
+	}
+
+	if (params->node_layout == NODE_LAYOUT_COMPACT) {
+
+		omp_set_dynamic(0);
+		omp_set_num_threads(params->num_threads);
+
+#pragma omp parallel for
+		for (b = 0; b < forest->n_trees; b++) {
+			compact_tree(forest->trees + b);
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of all trees (standard layout) w.r.t. params->node_order;
+ * if patterns are given, the children visited more often by the patterns are
+ * placed first (compact trees are always stored in depth-first order)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_optimize_layout(FLOAT_TYPE *X, int nX, int dX, PARAMETERS *params,
+		FOREST *forest) {
+
+	int b;
+
+	if (params->node_order == NODE_ORDER_NONE) {
+		return;
+	}
+
+	omp_set_dynamic(0);
+	omp_set_num_threads(params->num_threads);
+
+#pragma omp parallel for schedule(dynamic)
+	for (b = 0; b < forest->n_trees; b++) {
+
+		TREE *tree = forest->trees + b;
+		if (tree->compact != NULL) {
+			continue;
+		}
+
+		int *counts = NULL;
+		if (X != NULL && nX > 0) {
+			counts = (int*) calloc(tree->node_counter, sizeof(int));
+			cpu_count_node_visits(tree, X, nX, dX, counts);
+		}
+
+		reorder_tree(tree, params->node_order, counts);
+
+		free(counts);
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Counts, for each node of a tree (standard layout), the number of patterns
+ * that visit the node
+ * --------------------------------------------------------------------------------
+ */
+void cpu_count_node_visits(TREE *tree, FLOAT_TYPE *X, int nX, int dX,
+		int *counts) {
+
+	int i;
+
+	TREE_NODE *node = tree->root;
+
+	for (i = 0; i < nX; i++) {
+
+		FLOAT_TYPE *tpatt = X + (long) i * dX;
+		unsigned int node_id = TREE_ROOT_ID;
+
+		counts[node_id]++;
+		while (node[node_id].left_id != TREE_CHILD_ID_NOT_SET) {
+			if (tpatt[node[node_id].feature] <= node[node_id].thres_or_leaf) {
+				node_id = node[node_id].left_id;
+			} else {
+				node_id = node[node_id].right_id;
+			}
+			counts[node_id]++;
+		}
+
+	}
+
 }
 
 /* --------------------------------------------------------------------------------
@@ -35,110 +132,445 @@ void cpu_free_resources(PARAMETERS *params, FOREST *forest) {
  * --------------------------------------------------------------------------------
  */
 void cpu_predict(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
-FLOAT_TYPE *predictions, int *indices, int dindices, PARAMETERS *params,
-		FOREST *forest) {
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		PARAMETERS *params, FOREST *forest) {
 
 	cpu_query_forest(Xtest, nXtest, dXtest, predictions, indices, dindices,
-			params, forest);
+			binned, params, forest);
 
 }
 
 /* --------------------------------------------------------------------------------
- * Query forest (via individual trees)
+ * Query forest (via individual trees); the rows are processed in blocks
+ * of prediction_block_size rows, which are passed through all trees while
+ * they are still in the cache (votes/means are accumulated per block)
  * --------------------------------------------------------------------------------
  */
 void cpu_query_forest(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
-FLOAT_TYPE *predictions, int *indices, int dindices, PARAMETERS *params,
-		FOREST *forest) {
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		PARAMETERS *params, FOREST *forest) {
 
 	START_MY_TIMER(params->timers + 1);
 
-	int i, b, j;
+	int blk;
 
 	int n_preds = nXtest;
 	if (dindices > 0) {
 		n_preds = dindices;
 	}
-	// get all individual predictions (from all trees)
-	FLOAT_TYPE *preds = (FLOAT_TYPE*) malloc(
-			params->n_estimators * n_preds * sizeof(FLOAT_TYPE));
+
+	if (params->prediction_type != PREDICTION_TYPE_NORMAL
+			&& params->prediction_type != PREDICTION_TYPE_LEAVES_IDS) {
+		printf("Error: Unknown prediction type: %i ", params->prediction_type);
+		exit(EXIT_FAILURE);
+	}
+	if (params->prediction_type == PREDICTION_TYPE_NORMAL
+			&& params->learning_type != LEARNING_PROBLEM_TYPE_REGRESSION
+			&& params->learning_type != LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+		printf("Error: Unknown learning type. Exiting ...\n");
+		exit(EXIT_FAILURE);
+	}
+
+	int block_size = params->prediction_block_size;
+	if (block_size <= 0) {
+		block_size = get_prediction_block_size(n_preds, dXtest, params, forest);
+	}
+	block_size = max(min(block_size, n_preds), 1);
+	int n_blocks = (n_preds + block_size - 1) / block_size;
 
 	START_MY_TIMER(params->timers + 2);
 
 	omp_set_dynamic(0);
 	omp_set_num_threads(params->num_threads);
 
-#pragma omp parallel for
-	for (b = 0; b < params->n_estimators; b++) {
-		cpu_query_tree(forest->trees[b], Xtest, nXtest, dXtest,
-				preds + b * n_preds, indices, dindices,
-				params->prediction_type);
+	if (params->num_threads > 1 && params->n_estimators > 1
+			&& n_preds < params->num_threads * PREDICTION_MIN_BLOCK_ROWS) {
+
+		// too few rows for all threads: rows and trees are processed
+		// in parallel, the outputs of the trees are combined afterwards
+		FLOAT_TYPE *preds_tmp = (FLOAT_TYPE*) malloc(
+				params->n_estimators * n_preds * sizeof(FLOAT_TYPE));
+		cpu_query_forest_grid(Xtest, dXtest, preds_tmp, n_preds, indices,
+				dindices, binned, params, forest);
+
+		if (params->prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
+			memcpy(predictions, preds_tmp, params->n_estimators * n_preds * sizeof(FLOAT_TYPE));
+		} else {
+			cpu_combine_tree_predictions(preds_tmp, predictions, n_preds, params);
+		}
+		free(preds_tmp);
+
+		STOP_MY_TIMER(params->timers + 2);
+		STOP_MY_TIMER(params->timers + 1);
+
+		return;
+
+	}
+
+	// rows are processed in parallel (blocks)
+#pragma omp parallel
+	{
+
+		FLOAT_TYPE *block_preds = (FLOAT_TYPE*) malloc(block_size * sizeof(FLOAT_TYPE));
+
+#pragma omp for schedule(dynamic)
+		for (blk = 0; blk < n_blocks; blk++) {
+
+			int start = blk * block_size;
+			int end = min(start + block_size, n_preds);
+
+			cpu_query_forest_block(Xtest, dXtest, predictions, n_preds,
+					indices, dindices, binned, params, forest, start, end,
+					block_preds);
+
+		}
+
+		free(block_preds);
+
 	}
+
 	STOP_MY_TIMER(params->timers + 2);
 
-	if (params->prediction_type == PREDICTION_TYPE_NORMAL) {
+	STOP_MY_TIMER(params->timers + 1);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the number of rows per block for computing predictions: small
+ * blocks (that fit into the cache) for small trees and large blocks (i.e.,
+ * tree by tree) otherwise
+ * --------------------------------------------------------------------------------
+ */
+int get_prediction_block_size(int n_preds, int dXtest, PARAMETERS *params,
+		FOREST *forest) {
+
+	int b;
+	long tree_bytes = 0;
 
-		// combine all predictions
-		if (params->learning_type == LEARNING_PROBLEM_TYPE_REGRESSION) {
+	for (b = 0; b < forest->n_trees; b++) {
+		tree_bytes += get_num_bytes_tree_nodes(forest->trees + b);
+	}
+	tree_bytes /= max(forest->n_trees, 1);
+
+	// at least one block per thread (if possible)
+	int rows_per_thread = max((n_preds + params->num_threads - 1) / params->num_threads,
+			PREDICTION_MIN_BLOCK_ROWS);
 
-			for (i = 0; i < n_preds; i++) {
+	if (tree_bytes > PREDICTION_MAX_TREE_BYTES) {
+		return min(rows_per_thread, PREDICTION_MAX_BLOCK_ROWS);
+	}
 
-				predictions[i] = 0.0;
+	return min(max(PREDICTION_BLOCK_BYTES / (dXtest * sizeof(FLOAT_TYPE)), 1),
+			rows_per_thread);
 
-				for (b = 0; b < params->n_estimators; b++) {
-					predictions[i] += preds[i + b * n_preds];
-				}
-				predictions[i] /= params->n_estimators;
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the predictions for the rows start, ..., end-1 via all trees
+ * (block_preds is a buffer for the predictions of a single tree)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_block(FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int n_preds, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest,
+		int start, int end, FLOAT_TYPE *block_preds) {
+
+	int i, b;
+
+	if (params->prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
+
+		for (b = 0; b < params->n_estimators; b++) {
+			cpu_query_tree_rows(forest->trees + b, Xtest, dXtest,
+					predictions + b * n_preds + start, indices, dindices,
+					binned, params->prediction_type, params->traversal_kernel, start, end);
+		}
+
+	} else if (params->learning_type == LEARNING_PROBLEM_TYPE_REGRESSION) {
+
+		for (i = start; i < end; i++) {
+			predictions[i] = 0.0;
+		}
+
+		for (b = 0; b < params->n_estimators; b++) {
+			cpu_query_tree_rows(forest->trees + b, Xtest, dXtest,
+					block_preds, indices, dindices, binned,
+					params->prediction_type, params->traversal_kernel, start, end);
+			for (i = start; i < end; i++) {
+				predictions[i] += block_preds[i - start];
+			}
+		}
+
+		for (i = start; i < end; i++) {
+			predictions[i] /= params->n_estimators;
+		}
+
+	} else {
+
+		// votes of all trees (one row of class counts per pattern)
+		int max_possible_label = ((int) params->max_ytrain_value) + 1;
+		int *class_counts = (int*) calloc((end - start) * max_possible_label, sizeof(int));
+
+		for (b = 0; b < params->n_estimators; b++) {
+			cpu_query_tree_rows(forest->trees + b, Xtest, dXtest,
+					block_preds, indices, dindices, binned,
+					params->prediction_type, params->traversal_kernel, start, end);
+			for (i = 0; i < end - start; i++) {
+				class_counts[i * max_possible_label + (int) block_preds[i]] += 1;
 			}
+		}
 
-		} else if (params->learning_type == LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+		for (i = start; i < end; i++) {
+			predictions[i] = find_max_class(class_counts + (i - start) * max_possible_label,
+					max_possible_label);
+		}
 
-			int max_possible_label = ((int) params->max_ytrain_value) + 1;
+		free(class_counts);
 
-			int *class_counts = (int*) calloc(max_possible_label, sizeof(int));
+	}
 
-			for (i = 0; i < n_preds; i++) {
+}
 
-				for (j = 0; j < max_possible_label; j++) {
-					class_counts[j] = 0;
-				}
+/* --------------------------------------------------------------------------------
+ * Computes the outputs of all trees (stored tree-wise in preds) by
+ * processing blocks of rows and trees in parallel (row x tree grid)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_grid(FLOAT_TYPE *Xtest, int dXtest, FLOAT_TYPE *preds,
+		int n_preds, int *indices, int dindices, BINNED_DATA *binned,
+		PARAMETERS *params, FOREST *forest) {
 
-				for (b = 0; b < params->n_estimators; b++) {
-					FLOAT_TYPE pred = (int) preds[i + b * n_preds];
-					class_counts[(int) pred] += 1;
-				}
-				int max_index = find_max_class(class_counts,
-						max_possible_label);
-				predictions[i] = max_index;
+	int blk, b;
+
+	int block_size = PREDICTION_MIN_BLOCK_ROWS;
+	int n_blocks = (n_preds + block_size - 1) / block_size;
+
+#pragma omp parallel for collapse(2) schedule(dynamic)
+	for (blk = 0; blk < n_blocks; blk++) {
+		for (b = 0; b < params->n_estimators; b++) {
 
+			int start = blk * block_size;
+			int end = min(start + block_size, n_preds);
+
+			cpu_query_tree_rows(forest->trees + b, Xtest, dXtest,
+					preds + b * n_preds + start, indices, dindices, binned,
+					params->prediction_type, params->traversal_kernel, start, end);
+
+		}
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Combines the outputs of all trees (stored tree-wise in preds) to the
+ * final predictions (means or majority votes)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_combine_tree_predictions(FLOAT_TYPE *preds, FLOAT_TYPE *predictions,
+		int n_preds, PARAMETERS *params) {
+
+	int i, j, b;
+
+	if (params->learning_type == LEARNING_PROBLEM_TYPE_REGRESSION) {
+
+		for (i = 0; i < n_preds; i++) {
+			predictions[i] = 0.0;
+			for (b = 0; b < params->n_estimators; b++) {
+				predictions[i] += preds[i + b * n_preds];
 			}
+			predictions[i] /= params->n_estimators;
+		}
 
-			free(class_counts);
+	} else {
+
+		int max_possible_label = ((int) params->max_ytrain_value) + 1;
+		int *class_counts = (int*) calloc(max_possible_label, sizeof(int));
 
+		for (i = 0; i < n_preds; i++) {
+			for (j = 0; j < max_possible_label; j++) {
+				class_counts[j] = 0;
+			}
+			for (b = 0; b < params->n_estimators; b++) {
+				class_counts[(int) preds[i + b * n_preds]] += 1;
+			}
+			predictions[i] = find_max_class(class_counts, max_possible_label);
 		}
 
-		else {
+		free(class_counts);
 
-			printf("Error: Unknown learning type. Exiting ...\n");
-			exit(EXIT_FAILURE);
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the predictions for a few rows with low latency: the rows are
+ * processed one after the other by the calling thread (no parallel region,
+ * no timers, and no allocations for up to PREDICTION_FAST_MAX_CLASSES
+ * classes); params->prediction_type is ignored
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_fast(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *predictions, PARAMETERS *params, FOREST *forest) {
+
+	int i, j, b;
+	FLOAT_TYPE *tpatt;
+
+	if (params->learning_type == LEARNING_PROBLEM_TYPE_REGRESSION) {
+
+		for (i = 0; i < nXtest; i++) {
+			tpatt = Xtest + i * dXtest;
+			FLOAT_TYPE sum = 0.0;
+			for (b = 0; b < params->n_estimators; b++) {
+				sum += cpu_query_tree_pattern(forest->trees + b, tpatt);
+			}
+			predictions[i] = sum / params->n_estimators;
+		}
+
+	} else if (params->learning_type == LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+
+		int max_possible_label = ((int) params->max_ytrain_value) + 1;
+		int class_counts_stack[PREDICTION_FAST_MAX_CLASSES];
+		int *class_counts = class_counts_stack;
 
+		if (max_possible_label > PREDICTION_FAST_MAX_CLASSES) {
+			class_counts = (int*) malloc(max_possible_label * sizeof(int));
 		}
-	} else if (params->prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
 
-		for (b = 0; b < params->n_estimators; b++) {
-			for (i = 0; i < n_preds; i++) {
-				predictions[b * n_preds + i] = *(preds + b * n_preds + i);
+		for (i = 0; i < nXtest; i++) {
+			tpatt = Xtest + i * dXtest;
+			for (j = 0; j < max_possible_label; j++) {
+				class_counts[j] = 0;
+			}
+			for (b = 0; b < params->n_estimators; b++) {
+				class_counts[(int) cpu_query_tree_pattern(forest->trees + b, tpatt)] += 1;
 			}
+			predictions[i] = find_max_class(class_counts, max_possible_label);
+		}
+
+		if (class_counts != class_counts_stack) {
+			free(class_counts);
 		}
 
 	} else {
-		printf("Error: Unknown prediction type: %i ", params->prediction_type);
+		printf("Error: Unknown learning type. Exiting ...\n");
 		exit(EXIT_FAILURE);
 	}
 
-	free(preds);
+}
 
-	STOP_MY_TIMER(params->timers + 1);
+/* --------------------------------------------------------------------------------
+ * Returns the leaf value of a single tree for a single pattern (standard
+ * or compact layout)
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE cpu_query_tree_pattern(TREE *tree, FLOAT_TYPE *tpatt) {
+
+	unsigned int node_id = cpu_query_tree_leaf_id(tree, tpatt);
+
+	if (tree->compact != NULL) {
+		return tree->leaf_values[tree->compact[node_id].leaf_index];
+	}
+
+	return tree->root[node_id].thres_or_leaf;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the id of the leaf of a single tree a single pattern is assigned
+ * to (standard or compact layout)
+ * --------------------------------------------------------------------------------
+ */
+unsigned int cpu_query_tree_leaf_id(TREE *tree, FLOAT_TYPE *tpatt) {
+
+	register unsigned int node_id = TREE_ROOT_ID;
+
+	if (tree->compact != NULL) {
+
+		register COMPACT_TREE_NODE *cnode = tree->compact;
+
+		while (cnode[node_id].right_offset != 0) {
+			if (tpatt[cnode[node_id].feature] <= cnode[node_id].threshold) {
+				node_id++;
+			} else {
+				node_id += cnode[node_id].right_offset;
+			}
+		}
+
+		return node_id;
+
+	}
+
+	register TREE_NODE *node = tree->root;
+
+	while (node[node_id].left_id != TREE_CHILD_ID_NOT_SET) {
+		if (tpatt[node[node_id].feature] <= node[node_id].thres_or_leaf) {
+			node_id = node[node_id].left_id;
+		} else {
+			node_id = node[node_id].right_id;
+		}
+	}
+
+	return node_id;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the leaf ids of a single tree for all patterns and, in the same
+ * pass, the number of patterns per leaf (counts, one entry per node); perm
+ * is the stable permutation that sorts the patterns w.r.t. their leaf ids
+ * (counting sort: each thread counts and scatters a contiguous range of
+ * patterns, the per-thread offsets keep the original order within a leaf)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_get_leaves_buckets(TREE *tree, FLOAT_TYPE *Xtest, int nXtest,
+		int dXtest, int *leaves_ids, int *counts, int n_counts, int *perm,
+		PARAMETERS *params) {
+
+	int i, l;
+
+	int n_threads = max(min(params->num_threads, nXtest / PREDICTION_MIN_BLOCK_ROWS), 1);
+	int *thread_offsets = (int*) calloc((long) n_threads * n_counts, sizeof(int));
+
+	omp_set_dynamic(0);
+	omp_set_num_threads(n_threads);
+
+#pragma omp parallel private(i, l)
+	{
+
+		int t = omp_get_thread_num();
+		int n_used = omp_get_num_threads();
+		int start = (int) (((long) t * nXtest) / n_used);
+		int end = (int) (((long) (t + 1) * nXtest) / n_used);
+		int *offsets = thread_offsets + (long) t * n_counts;
+
+		for (i = start; i < end; i++) {
+			unsigned int leaf_id = cpu_query_tree_leaf_id(tree, Xtest + (long) i * dXtest);
+			leaves_ids[i] = leaf_id;
+			offsets[leaf_id]++;
+		}
+
+#pragma omp barrier
+
+#pragma omp single
+		{
+			int u, offset = 0;
+			for (l = 0; l < n_counts; l++) {
+				counts[l] = 0;
+				for (u = 0; u < n_used; u++) {
+					int count = thread_offsets[(long) u * n_counts + l];
+					thread_offsets[(long) u * n_counts + l] = offset;
+					offset += count;
+					counts[l] += count;
+				}
+			}
+		}
+
+		for (i = start; i < end; i++) {
+			perm[offsets[leaves_ids[i]]++] = i;
+		}
+
+	}
+
+	free(thread_offsets);
 
 }
 
@@ -152,59 +584,297 @@ int dindices, PARAMETERS *params, FOREST *forest) {
 
 	START_MY_TIMER(params->timers + 1);
 
-	int i, b;
+	int i, b, blk;
 
 	if (dindices > 0) {
 		n_preds = dindices;
 	}
-	// get all individual predictions (from all trees)
-	FLOAT_TYPE *preds_tmp = (FLOAT_TYPE*) malloc(
-			params->n_estimators * n_preds * sizeof(FLOAT_TYPE));
-
 	START_MY_TIMER(params->timers + 2);
 
 	omp_set_dynamic(0);
 	omp_set_num_threads(params->num_threads);
 
-#pragma omp parallel for
-	for (b = 0; b < params->n_estimators; b++) {
-		cpu_query_tree(forest->trees[b], Xtest, nXtest, dXtest,
-				preds_tmp + b * n_preds, indices, dindices,
-				params->prediction_type);
+	// blocks of rows and trees are processed in parallel; the
+	// results are stored pattern-wise
+	int block_size = max(min(get_prediction_block_size(n_preds, dXtest, params, forest), n_preds), 1);
+	int n_blocks = (n_preds + block_size - 1) / block_size;
+
+#pragma omp parallel
+	{
+
+		FLOAT_TYPE *block_preds = (FLOAT_TYPE*) malloc(block_size * sizeof(FLOAT_TYPE));
+
+#pragma omp for collapse(2) schedule(dynamic)
+		for (blk = 0; blk < n_blocks; blk++) {
+			for (b = 0; b < params->n_estimators; b++) {
+
+				int start = blk * block_size;
+				int end = min(start + block_size, n_preds);
+
+				cpu_query_tree_rows(forest->trees + b, Xtest, dXtest,
+						block_preds, indices, dindices, NULL,
+						params->prediction_type, params->traversal_kernel, start, end);
+				for (i = start; i < end; i++) {
+					preds[i * params->n_estimators + b] = block_preds[i - start];
+				}
+
+			}
+		}
+
+		free(block_preds);
+
 	}
+
 	STOP_MY_TIMER(params->timers + 2);
 
-	for (i = 0; i < n_preds; i++) {
-		for (b = 0; b < params->n_estimators; b++) {
-			preds[i*params->n_estimators + b] = preds_tmp[i + b * n_preds];
-		}
+	STOP_MY_TIMER(params->timers + 1);
+
+}
+
+
+/* --------------------------------------------------------------------------------
+ * Computes the class probabilities (proba[i, k] for class label k), i.e.,
+ * the means of the class distributions of the leaves reached (or of the
+ * votes if a tree does not store distributions); blocks of rows are
+ * processed in parallel
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_proba(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *proba, int n_preds, int n_classes, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest) {
+
+	START_MY_TIMER(params->timers + 1);
+
+	int blk;
+
+	if (dindices > 0) {
+		n_preds = dindices;
 	}
 
+	if (params->learning_type != LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+		printf("Error: Class probabilities require a classification forest. Exiting ...\n");
+		exit(EXIT_FAILURE);
+	}
+	if (((int) params->max_ytrain_value) + 1 > n_classes) {
+		printf("Error: Class probabilities require %i columns. Exiting ...\n",
+				((int) params->max_ytrain_value) + 1);
+		exit(EXIT_FAILURE);
+	}
+
+	int block_size = max(min(get_prediction_block_size(n_preds, dXtest, params, forest), n_preds), 1);
+	int n_blocks = (n_preds + block_size - 1) / block_size;
+
+	START_MY_TIMER(params->timers + 2);
+
+	omp_set_dynamic(0);
+	omp_set_num_threads(params->num_threads);
+
+#pragma omp parallel
+	{
+
+		FLOAT_TYPE *block_preds = (FLOAT_TYPE*) malloc(block_size * sizeof(FLOAT_TYPE));
 
-	free(preds_tmp);
+#pragma omp for schedule(dynamic)
+		for (blk = 0; blk < n_blocks; blk++) {
+			int start = blk * block_size;
+			int end = min(start + block_size, n_preds);
+			cpu_query_forest_proba_block(Xtest, dXtest, proba, n_classes,
+					indices, dindices, binned, params, forest, start, end,
+					block_preds);
+		}
+
+		free(block_preds);
+
+	}
+
+	STOP_MY_TIMER(params->timers + 2);
 
 	STOP_MY_TIMER(params->timers + 1);
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Computes the class probabilities for the rows start, ..., end-1 via all
+ * trees (block_preds is a buffer for the leaves reached in a single tree)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_proba_block(FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *proba, int n_classes, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest,
+		int start, int end, FLOAT_TYPE *block_preds) {
+
+	int i, k, b;
+
+	memset(proba + start * n_classes, 0, (end - start) * n_classes * sizeof(FLOAT_TYPE));
+
+	for (b = 0; b < params->n_estimators; b++) {
+
+		TREE *tree = forest->trees + b;
+
+		cpu_query_tree_rows(tree, Xtest, dXtest, block_preds, indices,
+				dindices, binned, PREDICTION_TYPE_LEAVES_IDS,
+				params->traversal_kernel, start, end);
+
+		for (i = start; i < end; i++) {
+
+			FLOAT_TYPE *proba_row = proba + i * n_classes;
+			int node_id = (int) block_preds[i - start];
+
+			// distributions and leaf values are stored per leaf
+			// for the compact layout
+			int row = node_id;
+			FLOAT_TYPE leaf_value;
+			if (tree->compact != NULL) {
+				row = tree->compact[node_id].leaf_index;
+				leaf_value = tree->leaf_values[row];
+			} else {
+				leaf_value = tree->root[node_id].thres_or_leaf;
+			}
+
+			if (tree->leaf_dists != NULL) {
+				FLOAT_TYPE *dist = tree->leaf_dists + row * tree->n_dist;
+				for (k = 0; k < tree->n_dist; k++) {
+					proba_row[k] += dist[k];
+				}
+			} else {
+				proba_row[(int) leaf_value] += 1.0;
+			}
+
+		}
+
+	}
+
+	for (i = start * n_classes; i < end * n_classes; i++) {
+		proba[i] /= params->n_estimators;
+	}
+
+}
 
 /* --------------------------------------------------------------------------------
  * Queries a single tree
  * --------------------------------------------------------------------------------
  */
 void cpu_query_tree(TREE tree, FLOAT_TYPE *Xtest, int nXtest, int dXtest,
-FLOAT_TYPE *predictions, int *indices, int dindices, int prediction_type) {
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type) {
+
+	int n_preds = nXtest;
+	if (dindices > 0) {
+		n_preds = dindices;
+	}
+
+	cpu_query_tree_rows(&tree, Xtest, dXtest, predictions, indices, dindices,
+			binned, prediction_type, TRAVERSAL_KERNEL_AUTO, 0, n_preds);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1 (the result for row
+ * i is stored in predictions[i - start])
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type, int kernel, int start, int end) {
+
+	// multi-row kernels (not for quantized patterns)
+	if (binned == NULL && kernel != TRAVERSAL_KERNEL_SCALAR
+			&& end - start >= TRAVERSAL_MULTI_ROWS) {
+
+		kernel = cpu_get_traversal_kernel(kernel, tree);
+
+		if (kernel == TRAVERSAL_KERNEL_BITVECTOR) {
+			cpu_query_tree_rows_bitvector(tree, Xtest, dXtest, predictions, indices,
+					dindices, prediction_type, start, end);
+			return;
+		} else if (kernel == TRAVERSAL_KERNEL_AVX2) {
+			cpu_query_tree_rows_avx2(tree, Xtest, dXtest, predictions, indices,
+					dindices, prediction_type, start, end);
+			return;
+		} else if (kernel == TRAVERSAL_KERNEL_MULTI) {
+			cpu_query_tree_rows_multi(tree, Xtest, dXtest, predictions, indices,
+					dindices, prediction_type, start, end);
+			return;
+		}
+
+	}
+
+	if (tree->compact != NULL) {
+		cpu_query_tree_rows_compact(tree, Xtest, dXtest, predictions,
+				indices, dindices, binned, prediction_type, start, end);
+		return;
+	}
 
-	register TREE_NODE *node = tree.root;
+	register TREE_NODE *node = tree->root;
 	register FLOAT_TYPE *tpatt;
 
 	register unsigned int i, node_id, idx;
 
-	int n_preds = nXtest;
-	if (dindices > 0) {
-		n_preds = dindices;
+	for (i = start; i < end; i++) {
+
+		if (dindices > 0) {
+			idx = indices[i];
+		} else {
+			idx = i;
+		}
+
+		node_id = TREE_ROOT_ID;
+
+		if (binned != NULL) {
+
+			// quantized patterns: compare (upper) bin thresholds
+			while (node[node_id].left_id != TREE_CHILD_ID_NOT_SET) {
+				int F = node[node_id].feature;
+				if (binned->thresholds[F * binned->max_bins + get_binned_code(binned, F, idx)]
+						<= node[node_id].thres_or_leaf) {
+					node_id = node[node_id].left_id;
+				} else {
+					node_id = node[node_id].right_id;
+				}
+			}
+
+		} else {
+
+			tpatt = Xtest + idx * dXtest;
+
+			while (node[node_id].left_id != TREE_CHILD_ID_NOT_SET) {
+				if (tpatt[node[node_id].feature] <= node[node_id].thres_or_leaf) {
+					node_id = node[node_id].left_id;
+				} else {
+					node_id = node[node_id].right_id;
+				}
+			}
+
+		}
+
+		if (prediction_type == PREDICTION_TYPE_NORMAL) {
+			predictions[i - start] = node[node_id].thres_or_leaf;
+		} else if (prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
+			predictions[i - start] = (FLOAT_TYPE) node_id;
+		} else {
+			printf("Error: Unknown prediction type: %i ", prediction_type);
+			exit(EXIT_FAILURE);
+		}
+
 	}
-	for (i = 0; i < n_preds; i++) {
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1 (compact layout, the
+ * left child of an internal node is stored next to it)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_compact(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type, int start, int end) {
+
+	register COMPACT_TREE_NODE *node = tree->compact;
+	register FLOAT_TYPE *tpatt;
+
+	register unsigned int i, node_id, idx;
+
+	for (i = start; i < end; i++) {
 
 		if (dindices > 0) {
 			idx = indices[i];
@@ -212,21 +882,39 @@ FLOAT_TYPE *predictions, int *indices, int dindices, int prediction_type) {
 			idx = i;
 		}
 
-		tpatt = Xtest + idx * dXtest;
 		node_id = TREE_ROOT_ID;
 
-		while (node[node_id].left_id != TREE_CHILD_ID_NOT_SET) {
-			if (tpatt[node[node_id].feature] <= node[node_id].thres_or_leaf) {
-				node_id = node[node_id].left_id;
-			} else {
-				node_id = node[node_id].right_id;
+		if (binned != NULL) {
+
+			// quantized patterns: compare (upper) bin thresholds
+			while (node[node_id].right_offset != 0) {
+				int F = node[node_id].feature;
+				if (binned->thresholds[F * binned->max_bins + get_binned_code(binned, F, idx)]
+						<= node[node_id].threshold) {
+					node_id++;
+				} else {
+					node_id += node[node_id].right_offset;
+				}
+			}
+
+		} else {
+
+			tpatt = Xtest + idx * dXtest;
+
+			while (node[node_id].right_offset != 0) {
+				if (tpatt[node[node_id].feature] <= node[node_id].threshold) {
+					node_id++;
+				} else {
+					node_id += node[node_id].right_offset;
+				}
 			}
+
 		}
 
 		if (prediction_type == PREDICTION_TYPE_NORMAL) {
-			predictions[i] = node[node_id].thres_or_leaf;
+			predictions[i - start] = tree->leaf_values[node[node_id].leaf_index];
 		} else if (prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
-			predictions[i] = (FLOAT_TYPE) node_id;
+			predictions[i - start] = (FLOAT_TYPE) node_id;
 		} else {
 			printf("Error: Unknown prediction type: %i ", prediction_type);
 			exit(EXIT_FAILURE);
@@ -249,6 +937,10 @@ TRAINING_DATA *cpu_init_training_data(FLOAT_TYPE *Xtrain, int nXtrain,
 	train_data->Ytrain = Ytrain;
 	train_data->nXtrain = nXtrain;
 	train_data->dXtrain = dXtrain;
+	train_data->binned = NULL;
+	train_data->hist_cache_bytes = 0;
+	train_data->scratch = NULL;
+	train_data->n_scratch = 0;
 
 	return train_data;
 
@@ -274,6 +966,14 @@ void cpu_compute_splits(TRAVERSAL_RECORD **trecords, int n_trecords,
 
 	int i, j;
 
+	int level_wise = params->tree_traversal_mode == TREE_TRAVERSAL_MODE_LEVEL
+			&& n_trecords > 1;
+
+	// level-wise: records w.r.t. their positions in the bootstrap indices
+	if (level_wise) {
+		sort_trecords_start(trecords, n_trecords);
+	}
+
 	// generate random features (without replacement)
 	int *random_features = (int*) malloc(
 			n_trecords * train_data->dXtrain * sizeof(int));
@@ -284,6 +984,14 @@ void cpu_compute_splits(TRAVERSAL_RECORD **trecords, int n_trecords,
 				rstate);
 	}
 
+	// level-wise: each feature is checked for all records at once
+	if (level_wise) {
+		cpu_compute_splits_level(trecords, n_trecords, random_features,
+				train_data, params, rstate);
+		free(random_features);
+		return;
+	}
+
 	for (i = 0; i < n_trecords; i++) {
 
 		// Initialize best split record: multiple features
@@ -300,19 +1008,31 @@ void cpu_compute_splits(TRAVERSAL_RECORD **trecords, int n_trecords,
 		// the current record corresponds to a leaf (see below)
 		int n_non_constant_features_checked = 0;
 
-		// Check at most train_data->dXtrain features
-		for (j = 0; j < train_data->dXtrain; j++) {
+		if (params->intra_tree_parallel && trecords[i]->end - trecords[i]->start
+				>= INTRA_TREE_FEATURE_MIN_SAMPLES) {
 
-			// Check single feature
-			int F = get_feature_dimension(
-					random_features + i * train_data->dXtrain, j);
-			cpu_check_single_feature(trecords[i], F, train_data, params, rstate,
-					&n_non_constant_features_checked, best_split);
+			// Check the features in parallel (intra-tree parallelism)
+			j = cpu_check_features_parallel(trecords[i],
+					random_features + i * train_data->dXtrain, train_data,
+					params, rstate, &n_non_constant_features_checked, best_split);
+
+		} else {
+
+			// Check at most train_data->dXtrain features
+			for (j = 0; j < train_data->dXtrain; j++) {
+
+				// Check single feature
+				int F = get_feature_dimension(
+						random_features + i * train_data->dXtrain, j);
+				cpu_check_single_feature(trecords[i], F, train_data, params, rstate,
+						&n_non_constant_features_checked, best_split);
+
+				// Break as soon as max_features or a non_constant feature was check
+				if (j >= params->max_features - 1
+						&& n_non_constant_features_checked > 0) {
+					break;
+				}
 
-			// Break as soon as max_features or a non_constant feature was check
-			if (j >= params->max_features - 1
-					&& n_non_constant_features_checked > 0) {
-				break;
 			}
 
 		}
@@ -332,6 +1052,200 @@ void cpu_compute_splits(TRAVERSAL_RECORD **trecords, int n_trecords,
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Checks the features of a node in parallel (intra-tree parallelism). The
+ * features are processed in batches of size max_features and the results are
+ * combined in the order of the sequential check. For randomized trees, the
+ * ranges of the features are computed first and the thresholds are then drawn
+ * in the order of the sequential check (one random number per non-constant
+ * feature), i.e., the same split is found. Returns the index of the last
+ * feature considered (or dXtrain if all features have been checked).
+ * --------------------------------------------------------------------------------
+ */
+int cpu_check_features_parallel(TRAVERSAL_RECORD *trecord, int *features,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate,
+		int *n_non_constant_features_checked, SPLIT_RECORD *best_split) {
+
+	int j, k;
+
+	int dim = train_data->dXtrain;
+	int batch_size = max(params->max_features, 1);
+	int n_const_ints = get_const_features_integers_bound(dim);
+	int randomized = params->tree_type == TREE_TYPE_RANDOMIZED;
+
+	// results per feature of a batch
+	SPLIT_RECORD *splits = (SPLIT_RECORD*) malloc(batch_size * sizeof(SPLIT_RECORD));
+	int *n_checked = (int*) malloc(batch_size * sizeof(int));
+	int *const_features = (int*) malloc(batch_size * n_const_ints * sizeof(int));
+	FLOAT_TYPE *ranges = (FLOAT_TYPE*) malloc(2 * batch_size * sizeof(FLOAT_TYPE));
+
+	// histograms kept for the children are stored per feature
+	if (params->splitter == SPLITTER_HIST && params->tree_type == TREE_TYPE_STANDARD
+			&& trecord->histograms == NULL) {
+		trecord->histograms = (HISTOGRAM**) calloc(dim, sizeof(HISTOGRAM*));
+	}
+
+	for (j = 0; j < dim; j += batch_size) {
+
+		int n_batch = min(batch_size, dim - j);
+		int n_check = n_batch;
+
+		for (k = 0; k < n_batch; k++) {
+			reset_split_record(splits + k);
+			n_checked[k] = 0;
+			update_const_features_array(const_features + k * n_const_ints,
+					trecord->const_features, dim);
+		}
+
+		if (randomized) {
+
+			// ranges of the features (constant ones are marked)
+			for (k = 0; k < n_batch; k++) {
+#pragma omp task firstprivate(k)
+				{
+					TRAVERSAL_RECORD record = *trecord;
+					record.const_features = const_features + k * n_const_ints;
+					cpu_compute_feature_range(&record, get_feature_dimension(features, j + k),
+							train_data, params, ranges + 2 * k);
+				}
+			}
+#pragma omp taskwait
+
+			// draw the thresholds in the order of the sequential check
+			int n_non_constant = *n_non_constant_features_checked;
+			for (k = 0; k < n_batch; k++) {
+
+				int F = get_feature_dimension(features, j + k);
+
+				if (!feature_is_constant(const_features + k * n_const_ints, F, dim)) {
+					splits[k].threshold = rand_uniform(ranges[2 * k], ranges[2 * k + 1], rstate);
+					n_non_constant++;
+				}
+
+				if (j + k >= params->max_features - 1 && n_non_constant > 0) {
+					k++;
+					break;
+				}
+
+			}
+			n_check = k;
+
+		}
+
+		for (k = 0; k < n_check; k++) {
+#pragma omp task firstprivate(k)
+			{
+				// each feature gets its own copy of the constant features
+				TRAVERSAL_RECORD record = *trecord;
+				record.const_features = const_features + k * n_const_ints;
+				int F = get_feature_dimension(features, j + k);
+
+				if (!randomized) {
+					// no random numbers needed for standard trees
+					cpu_check_single_feature(&record, F, train_data, params, NULL,
+							n_checked + k, splits + k);
+				} else if (!feature_is_constant(record.const_features, F, dim)) {
+					cpu_check_single_feature_threshold(&record, F, splits[k].threshold,
+							train_data, params, splits + k);
+					n_checked[k] = 1;
+				}
+			}
+		}
+#pragma omp taskwait
+
+		// combine results (in the order of the sequential check)
+		for (k = 0; k < n_batch; k++) {
+
+			int F = get_feature_dimension(features, j + k);
+
+			if (feature_is_constant(const_features + k * n_const_ints, F, dim)) {
+				set_feature_constant(trecord->const_features, F, dim);
+			}
+
+			*n_non_constant_features_checked += n_checked[k];
+			if (splits[k].improvement > best_split->improvement) {
+				copy_split_record(splits + k, best_split);
+			}
+
+			if (j + k >= params->max_features - 1
+					&& *n_non_constant_features_checked > 0) {
+				break;
+			}
+
+		}
+
+		if (k < n_batch) {
+			j += k;
+			break;
+		}
+
+	}
+
+	free(splits);
+	free(n_checked);
+	free(const_features);
+	free(ranges);
+
+	return min(j, dim);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the range (minimum and maximum) of feature F for a traversal
+ * record (randomized trees); the feature is marked as constant if needed
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_feature_range(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params, FLOAT_TYPE *range) {
+
+	if (!feature_is_constant(trecord->const_features, F, train_data->dXtrain)) {
+
+		int i;
+		int n_XF_Y_W = trecord->end - trecord->start;
+		SCRATCH *scratch = get_scratch(train_data);
+		PATTERN_LABEL_WEIGHT *XF_Y_W = scratch->XF_Y_W;
+		gather_feature_values(XF_Y_W, F, trecord->start, trecord->end,
+				train_data, params);
+
+		// same as for compute_threshold
+		FLOAT_TYPE minf = MAX_FLOAT_TYPE;
+		FLOAT_TYPE maxf = MIN_FLOAT_TYPE;
+		for (i = 0; i < n_XF_Y_W; i++) {
+			minf = min(minf, XF_Y_W[i].pattern);
+			maxf = max(maxf, XF_Y_W[i].pattern);
+		}
+		range[0] = minf;
+		range[1] = maxf;
+
+		if (maxf <= minf + FEATURE_THRESHOLD) {
+			set_feature_constant(trecord->const_features, F,
+					train_data->dXtrain);
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Checks a single (non-constant) feature for a given threshold (randomized trees)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_threshold(TRAVERSAL_RECORD *trecord, int F,
+		FLOAT_TYPE threshold, TRAINING_DATA *train_data, PARAMETERS *params,
+		SPLIT_RECORD *split) {
+
+	SCRATCH *scratch = get_scratch(train_data);
+	PATTERN_LABEL_WEIGHT *XF_Y_W = scratch->XF_Y_W;
+	gather_feature_values(XF_Y_W, F, trecord->start, trecord->end,
+			train_data, params);
+
+	criterion_improvement_via_threshold(threshold, XF_Y_W, train_data,
+			trecord, params, split);
+	split->threshold = threshold;
+	split->feature = F;
+
+}
+
 void gather_feature_values(PATTERN_LABEL_WEIGHT *XF_Y_W, int F, int start,
 		int end, TRAINING_DATA *train_data, PARAMETERS *params) {
 
@@ -365,6 +1279,20 @@ void cpu_check_single_feature(TRAVERSAL_RECORD *trecord, int F,
 		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate,
 		int *n_non_constant_features_checked, SPLIT_RECORD *best_split) {
 
+	// Histogram-based splitter (standard trees only)
+	if (params->splitter == SPLITTER_HIST && params->tree_type == TREE_TYPE_STANDARD) {
+		cpu_check_single_feature_hist(trecord, F, train_data, params,
+				n_non_constant_features_checked, best_split);
+		return;
+	}
+
+	// Structure-of-arrays splitter (standard trees only)
+	if (params->splitter == SPLITTER_EXACT && params->tree_type == TREE_TYPE_STANDARD) {
+		cpu_check_single_feature_standard(trecord, F, train_data, params,
+				n_non_constant_features_checked, best_split);
+		return;
+	}
+
 	// Only non-constant features need to be checked. Here,
 	// we do an early check based on the previous checks (we
 	// keep track of constant features throughout the execution)
@@ -373,10 +1301,11 @@ void cpu_check_single_feature(TRAVERSAL_RECORD *trecord, int F,
 		int feat_is_constant;
 		FLOAT_TYPE threshold;
 
-		// Combine data into a single array of structs (faster memory access afterwards)
+		// Combine data into a single array of structs (faster memory access afterwards);
+		// the buffer of the scratch arena is sized for the root
 		int n_XF_Y_W = trecord->end - trecord->start;
-		PATTERN_LABEL_WEIGHT *XF_Y_W = (PATTERN_LABEL_WEIGHT*) malloc(
-				(trecord->end - trecord->start) * sizeof(PATTERN_LABEL_WEIGHT));
+		SCRATCH *scratch = get_scratch(train_data);
+		PATTERN_LABEL_WEIGHT *XF_Y_W = scratch->XF_Y_W;
 		gather_feature_values(XF_Y_W, F, trecord->start, trecord->end,
 				train_data, params);
 
@@ -396,7 +1325,7 @@ void cpu_check_single_feature(TRAVERSAL_RECORD *trecord, int F,
 			// the impurity, improvement, ...
 			*n_non_constant_features_checked += 1;
 
-			SPLIT_RECORD *current_split = init_split_record();
+			SPLIT_RECORD *current_split = get_scratch_split_record(train_data);
 			criterion_improvement_via_threshold(threshold, XF_Y_W,
 					train_data, trecord, params, current_split);
 
@@ -408,12 +1337,8 @@ void cpu_check_single_feature(TRAVERSAL_RECORD *trecord, int F,
 				copy_split_record(current_split, best_split);
 			}
 
-			free_split_record(current_split);
-
 		}
 
-		free(XF_Y_W);
-
 	}
 
 }
@@ -435,7 +1360,11 @@ void inline cpu_partition_bindinces(int *bindinces, int *bindinces_weights,
 		int idx = bindinces[p];
 
 		FLOAT_TYPE xf;
-		if (params->patterns_transposed == TRANSPOSED) {
+		if (train_data->binned != NULL) {
+			// x <= thresholds[b] holds iff the bin code of x is <= b
+			xf = train_data->binned->thresholds[F * train_data->binned->max_bins
+					+ get_binned_code(train_data->binned, F, idx)];
+		} else if (params->patterns_transposed == TRANSPOSED) {
 			FLOAT_TYPE *XF = train_data->Xtrain + F * train_data->nXtrain;
 			xf = XF[idx];
 		} else {
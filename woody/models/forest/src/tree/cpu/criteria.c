@@ -7,6 +7,9 @@
 
 #include "include/criteria.h"
 
+inline static void compute_criterion_improvement(CRITERION_RECORD *crit_record,
+		PARAMETERS *params, TRAINING_DATA *train_data);
+
 void criterion_improvement_via_threshold(FLOAT_TYPE threshold, PATTERN_LABEL_WEIGHT *XF_Y_W, TRAINING_DATA *train_data,
 		TRAVERSAL_RECORD *trecord, PARAMETERS *params, SPLIT_RECORD *current_split){
 
@@ -86,9 +89,9 @@ void criterion_improvement_via_threshold(FLOAT_TYPE threshold, PATTERN_LABEL_WEI
 
 		int i;
 
-		// initialize counting arrays
-		int *class_counts_left = (int*) calloc(train_data->n_classes, sizeof(int));
-		int *class_counts_right = (int*) calloc(train_data->n_classes, sizeof(int));
+		// initialize counting arrays (scratch arena)
+		int *class_counts_left, *class_counts_right;
+		get_scratch_class_counts(train_data, &class_counts_left, &class_counts_right);
 
 		// compute all class ratios
 		int sum_weights_left = 0;
@@ -130,9 +133,6 @@ void criterion_improvement_via_threshold(FLOAT_TYPE threshold, PATTERN_LABEL_WEI
 			impurity += pmk * (1.0 - pmk);
 		}
 
-		free(class_counts_left);
-		free(class_counts_right);
-
 		int sum_weights_all = sum_weights_left + sum_weights_right;
 
 		FLOAT_TYPE fraction_left = sum_weights_left / (FLOAT_TYPE) sum_weights_all;
@@ -236,7 +236,9 @@ FLOAT_TYPE cpu_criterion_leaf(int start, int end,
 
 	} else if (params->criterion == CRITERION_GINI || params->criterion == CRITERION_EVEN_SPLIT_GINI) {
 
-		int *class_counts = (int*) calloc(train_data->n_classes, sizeof(int));
+		// only the left counts of the scratch arena are needed here
+		int *class_counts, *class_counts_right;
+		get_scratch_class_counts(train_data, &class_counts, &class_counts_right);
 		int p;
 		int weight_total = 0;
 
@@ -247,7 +249,6 @@ FLOAT_TYPE cpu_criterion_leaf(int start, int end,
 			class_counts[label] += weight;
 		}
 		FLOAT_TYPE label = (FLOAT_TYPE) find_max_class(class_counts, train_data->n_classes);
-		free(class_counts);
 
 		return label;
 
@@ -259,6 +260,31 @@ FLOAT_TYPE cpu_criterion_leaf(int start, int end,
 	}
 }
 
+/* --------------------------------------------------------------------------------
+ * Computes the class distribution for samples[start:end], i.e., dist[k] is
+ * the (weighted) fraction of samples with original class label k
+ * --------------------------------------------------------------------------------
+ */
+void cpu_criterion_leaf_dist(int start, int end, FLOAT_TYPE *dist,
+		int n_dist, TRAINING_DATA *train_data) {
+
+	int p, k;
+	int weight_total = 0;
+	int *samples_weights_mapping = train_data->bindices->indices_wmappings;
+
+	for (p = start; p < end; p++) {
+		int weight = samples_weights_mapping[p];
+		int label = (int) train_data->classes[(int) train_data->Ytrain_mapped[p]];
+		weight_total += weight;
+		dist[label] += weight;
+	}
+
+	for (k = 0; k < n_dist; k++) {
+		dist[k] /= weight_total;
+	}
+
+}
+
 /* --------------------------------------------------------------------------------
  * Initializes a splitting criterion (which can be updated).
  * --------------------------------------------------------------------------------
@@ -304,13 +330,9 @@ void init_criterion_cpu(CRITERION_RECORD *crit_record, PATTERN_LABEL_WEIGHT *XF_
 
 		int i;
 
-		// initialize records
-		crit_record->class_counts_left = (int*) malloc(train_data->n_classes * sizeof(int));
-		crit_record->class_counts_right = (int*) malloc(train_data->n_classes * sizeof(int));
-		for (i = 0; i < train_data->n_classes; i++) {
-			crit_record->class_counts_left[i] = 0;
-			crit_record->class_counts_right[i] = 0;
-		}
+		// initialize records (class counts are attached, see get_scratch_criterion_record)
+		memset(crit_record->class_counts_left, 0, train_data->n_classes * sizeof(int));
+		memset(crit_record->class_counts_right, 0, train_data->n_classes * sizeof(int));
 
 		// compute all class ratios (right side)
 		int sum_weights = 0;
@@ -364,32 +386,6 @@ void init_criterion_cpu(CRITERION_RECORD *crit_record, PATTERN_LABEL_WEIGHT *XF_
 
 }
 
-/* --------------------------------------------------------------------------------
- * Frees memory taken by a criterion record.
- * --------------------------------------------------------------------------------
- */
-void free_criterion_cpu(CRITERION_RECORD *crit_record, PARAMETERS *params, TRAINING_DATA *train_data) {
-
-	if (params->criterion == CRITERION_MSE || params->criterion == CRITERION_EVEN_SPLIT_MSE) {
-
-		// nothing to do
-
-	} else if (params->criterion == CRITERION_GINI || params->criterion == CRITERION_EVEN_SPLIT_GINI) {
-
-		free(crit_record->class_counts_left);
-		free(crit_record->class_counts_right);
-
-	} else {
-
-		printf("Wrong criterion in free_criterion_cpu given: %i. Exiting ...\n", params->criterion);
-		exit(0);
-
-	}
-
-	free(crit_record);
-
-}
-
 /* --------------------------------------------------------------------------------
  * Updates a criterion.
  * --------------------------------------------------------------------------------
@@ -414,27 +410,11 @@ void inline update_criterion_cpu(CRITERION_RECORD *crit_record,
 		}
 		crit_record->current_pos = new_pos;
 
-		// left and right impurity
-		crit_record->impurity_left = crit_record->sq_sum_left / crit_record->weight_left - (crit_record->sum_left / crit_record->weight_left)
-				* (crit_record->sum_left / crit_record->weight_left);
-		crit_record->impurity_right = crit_record->sq_sum_right / crit_record->weight_right - (crit_record->sum_right / crit_record->weight_right)
-				* (crit_record->sum_right / crit_record->weight_right);
-
-		int weight_all = crit_record->weight_left + crit_record->weight_right;
-		FLOAT_TYPE fraction_left = crit_record->weight_left / (FLOAT_TYPE) weight_all;
-		FLOAT_TYPE fraction_right = crit_record->weight_right / (FLOAT_TYPE) weight_all;
-
-		// improvement
-		if (params->criterion == CRITERION_EVEN_SPLIT_MSE){
-			crit_record->improvement = (1 - params->lam_crit) * (crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right);
-			crit_record->improvement = crit_record->improvement - params->lam_crit*(fabs(fraction_left - fraction_right));
-		} else {
-			crit_record->improvement = crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right;
-		}
+		compute_criterion_improvement(crit_record, params, train_data);
 
 	} else if (params->criterion == CRITERION_GINI) {
 
-		int i, k;
+		int k;
 		for (k = crit_record->current_pos; k < new_pos; k++) {
 			int weight = XF_Y_W[k].weight;
 			int label = (int)XF_Y_W[k].label;
@@ -445,32 +425,7 @@ void inline update_criterion_cpu(CRITERION_RECORD *crit_record,
 		}
 		crit_record->current_pos = new_pos;
 
-		crit_record->impurity_left = 0.0;
-		crit_record->impurity_right = 0.0;
-
-		for (i = 0; i < train_data->n_classes; i++) {
-
-			// left impurity
-			FLOAT_TYPE pmk_left = (1.0 / crit_record->weight_left) * (FLOAT_TYPE) crit_record->class_counts_left[i];
-			crit_record->impurity_left += pmk_left * (1.0 - pmk_left);
-
-			// right impurity
-			FLOAT_TYPE pmk_right = (1.0 / crit_record->weight_right) * (FLOAT_TYPE) crit_record->class_counts_right[i];
-			crit_record->impurity_right += pmk_right * (1.0 - pmk_right);
-
-		}
-
-		int weight_all = crit_record->weight_left + crit_record->weight_right;
-		FLOAT_TYPE fraction_left = crit_record->weight_left / (FLOAT_TYPE) weight_all;
-		FLOAT_TYPE fraction_right = crit_record->weight_right / (FLOAT_TYPE) weight_all;
-
-		// improvement
-		if (params->criterion == CRITERION_EVEN_SPLIT_GINI){
-			crit_record->improvement = (1 - params->lam_crit) * (crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right);
-			crit_record->improvement = crit_record->improvement - params->lam_crit*(fabs(fraction_left - fraction_right));
-		} else {
-			crit_record->improvement = crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right;
-		}
+		compute_criterion_improvement(crit_record, params, train_data);
 
 //	} else if (params->criterion == CRITERION_EVEN_SPLIT_MSE ||
 //			   params->criterion == CRITERION_EVEN_SPLIT_GINI) {
@@ -505,3 +460,165 @@ void inline update_criterion_cpu(CRITERION_RECORD *crit_record,
 	}
 
 }
+
+/* --------------------------------------------------------------------------------
+ * Initializes a splitting criterion for the samples with the given
+ * labels and weights (structure-of-arrays layout).
+ * --------------------------------------------------------------------------------
+ */
+void init_criterion_samples(CRITERION_RECORD *crit_record, FLOAT_TYPE *labels,
+		int *weights, int n_samples, PARAMETERS *params, TRAINING_DATA *train_data) {
+
+	int i;
+	int sum_weights = 0;
+
+	crit_record->current_pos = 0;
+
+	if (params->criterion == CRITERION_MSE || params->criterion == CRITERION_EVEN_SPLIT_MSE) {
+
+		crit_record->sum_left = 0.0;
+		crit_record->sum_right = 0.0;
+		crit_record->sq_sum_left = 0.0;
+		crit_record->sq_sum_right = 0.0;
+
+		for (i = 0; i < n_samples; i++) {
+			int weight = weights[i];
+			FLOAT_TYPE val = labels[i];
+			crit_record->sum_right += weight*val;
+			crit_record->sq_sum_right += weight*(val * val);
+			sum_weights += weight;
+		}
+
+		// impurity of node
+		FLOAT_TYPE mean = crit_record->sum_right / sum_weights;
+		crit_record->impurity = crit_record->sq_sum_right / sum_weights - mean * mean;
+
+	} else if (params->criterion == CRITERION_GINI || params->criterion == CRITERION_EVEN_SPLIT_GINI) {
+
+		memset(crit_record->class_counts_left, 0, train_data->n_classes * sizeof(int));
+		memset(crit_record->class_counts_right, 0, train_data->n_classes * sizeof(int));
+
+		for (i = 0; i < n_samples; i++) {
+			int weight = weights[i];
+			crit_record->class_counts_right[(int) labels[i]] += weight;
+			sum_weights += weight;
+		}
+
+		// gini impurity of node
+		FLOAT_TYPE impurity = 0.0;
+		for (i = 0; i < train_data->n_classes; i++) {
+			FLOAT_TYPE pmk = (1.0 / sum_weights) * (FLOAT_TYPE) crit_record->class_counts_right[i];
+			impurity += pmk * (1.0 - pmk);
+		}
+		crit_record->impurity = impurity;
+
+	} else {
+
+		printf("Wrong criterion in init_criterion_samples given: %i. Exiting ...\n", params->criterion);
+		exit(0);
+
+	}
+
+	crit_record->impurity_left = 0.0;
+	crit_record->impurity_right = crit_record->impurity;
+	crit_record->weight_left = 0;
+	crit_record->weight_right = sum_weights;
+	crit_record->improvement = MIN_FLOAT_TYPE;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Updates a criterion: the samples[current_pos:new_pos] are moved from the
+ * right to the left side (labels and weights are accessed via the samples).
+ * --------------------------------------------------------------------------------
+ */
+void inline update_criterion_samples(CRITERION_RECORD *crit_record, int *samples,
+		FLOAT_TYPE *labels, int *weights, int new_pos, PARAMETERS *params,
+		TRAINING_DATA *train_data) {
+
+	int k;
+
+	if (params->criterion == CRITERION_MSE || params->criterion == CRITERION_EVEN_SPLIT_MSE) {
+
+		for (k = crit_record->current_pos; k < new_pos; k++) {
+			int s = samples[k];
+			int weight = weights[s];
+			FLOAT_TYPE Yval = labels[s];
+			FLOAT_TYPE sq_Yval = Yval * Yval;
+			crit_record->sum_left += weight*Yval;
+			crit_record->sq_sum_left += weight*sq_Yval;
+			crit_record->sum_right -= weight*Yval;
+			crit_record->sq_sum_right -= weight*sq_Yval;
+			crit_record->weight_left += weight;
+			crit_record->weight_right -= weight;
+		}
+
+	} else {
+
+		for (k = crit_record->current_pos; k < new_pos; k++) {
+			int s = samples[k];
+			int weight = weights[s];
+			int label = (int) labels[s];
+			crit_record->class_counts_left[label] += weight;
+			crit_record->class_counts_right[label] -= weight;
+			crit_record->weight_left += weight;
+			crit_record->weight_right -= weight;
+		}
+
+	}
+
+	crit_record->current_pos = new_pos;
+	compute_criterion_improvement(crit_record, params, train_data);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the impurities of both sides and the improvement of a criterion
+ * (based on the current sums/class counts)
+ * --------------------------------------------------------------------------------
+ */
+inline static void compute_criterion_improvement(CRITERION_RECORD *crit_record,
+		PARAMETERS *params, TRAINING_DATA *train_data) {
+
+	int i;
+
+	if (params->criterion == CRITERION_MSE || params->criterion == CRITERION_EVEN_SPLIT_MSE) {
+
+		// left and right impurity
+		crit_record->impurity_left = crit_record->sq_sum_left / crit_record->weight_left - (crit_record->sum_left / crit_record->weight_left)
+				* (crit_record->sum_left / crit_record->weight_left);
+		crit_record->impurity_right = crit_record->sq_sum_right / crit_record->weight_right - (crit_record->sum_right / crit_record->weight_right)
+				* (crit_record->sum_right / crit_record->weight_right);
+
+	} else {
+
+		crit_record->impurity_left = 0.0;
+		crit_record->impurity_right = 0.0;
+
+		for (i = 0; i < train_data->n_classes; i++) {
+
+			// left impurity
+			FLOAT_TYPE pmk_left = (1.0 / crit_record->weight_left) * (FLOAT_TYPE) crit_record->class_counts_left[i];
+			crit_record->impurity_left += pmk_left * (1.0 - pmk_left);
+
+			// right impurity
+			FLOAT_TYPE pmk_right = (1.0 / crit_record->weight_right) * (FLOAT_TYPE) crit_record->class_counts_right[i];
+			crit_record->impurity_right += pmk_right * (1.0 - pmk_right);
+
+		}
+
+	}
+
+	int weight_all = crit_record->weight_left + crit_record->weight_right;
+	FLOAT_TYPE fraction_left = crit_record->weight_left / (FLOAT_TYPE) weight_all;
+	FLOAT_TYPE fraction_right = crit_record->weight_right / (FLOAT_TYPE) weight_all;
+
+	// improvement
+	if (params->criterion == CRITERION_EVEN_SPLIT_MSE || params->criterion == CRITERION_EVEN_SPLIT_GINI){
+		crit_record->improvement = (1 - params->lam_crit) * (crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right);
+		crit_record->improvement = crit_record->improvement - params->lam_crit*(fabs(fraction_left - fraction_right));
+	} else {
+		crit_record->improvement = crit_record->impurity - fraction_left * crit_record->impurity_left - fraction_right * crit_record->impurity_right;
+	}
+
+}
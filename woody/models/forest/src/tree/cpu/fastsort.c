@@ -19,7 +19,7 @@ register int tmpint = *(s1); \
 inline static int fast_partition(FLOAT_TYPE *a, int *samples, int lo, int hi, FLOAT_TYPE x);
 inline static int fast_floor_lg(int a);
 static FLOAT_TYPE fast_medianof3(FLOAT_TYPE *a, int lo, int mid, int hi);
-static void fast_downheap(FLOAT_TYPE *a, int i, int n, int lo);
+static void fast_downheap(FLOAT_TYPE *a, int *samples, int i, int n, int lo);
 static void fast_heapsort(FLOAT_TYPE *a, int *samples, int lo, int hi);
 static void fast_introsort_loop(FLOAT_TYPE *a, int *samples, int lo, int hi, int depth_limit);
 static void fast_insertionsort(FLOAT_TYPE *a, int *samples, int lo, int hi);
@@ -90,16 +90,17 @@ static void fast_heapsort(FLOAT_TYPE *a, int *samples, int lo, int hi) {
 	int n = hi - lo;
 	int i;
 	for (i = n / 2; i >= 1; i--) {
-		fast_downheap(a, i, n, lo);
+		fast_downheap(a, samples, i, n, lo);
 	}
 	for (i = n; i > 1; i--) {
 		swap_fast(&a[lo], &a[lo + i - 1], &samples[lo], &samples[lo + i -1]);
-		fast_downheap(a, 1, i - 1, lo);
+		fast_downheap(a, samples, 1, i - 1, lo);
 	}
 }
 
-inline static void fast_downheap(FLOAT_TYPE *a, int i, int n, int lo) {
+inline static void fast_downheap(FLOAT_TYPE *a, int *samples, int i, int n, int lo) {
 	FLOAT_TYPE d = a[lo + i - 1];
+	int s = samples[lo + i - 1];
 	int child;
 	int n2 = n / 2;
 	while (i <= n2) {
@@ -109,9 +110,11 @@ inline static void fast_downheap(FLOAT_TYPE *a, int i, int n, int lo) {
 		if (d >= a[lo + child - 1])
 			break;
 		a[lo + i - 1] = a[lo + child - 1];
+		samples[lo + i - 1] = samples[lo + child - 1];
 		i = child;
 	}
 	a[lo + i - 1] = d;
+	samples[lo + i - 1] = s;
 }
 
 
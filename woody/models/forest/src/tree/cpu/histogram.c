@@ -0,0 +1,780 @@
+/*
+ * histogram.c
+ */
+#include "include/histogram.h"
+
+static void compute_bin_thresholds(FLOAT_TYPE *values, int n_values, int max_bins,
+		FLOAT_TYPE *thresholds, int *n_bins);
+inline static unsigned char get_bin_code(FLOAT_TYPE x, FLOAT_TYPE *thresholds, int n_bins);
+inline static FLOAT_TYPE gini_impurity(int *class_weights, int n_classes, int weight);
+inline static FLOAT_TYPE hist_improvement(FLOAT_TYPE impurity, FLOAT_TYPE impurity_left,
+		FLOAT_TYPE impurity_right, int weight_left, int weight_right, PARAMETERS *params);
+static long histogram_num_bytes(HISTOGRAM *hist);
+static void keep_histogram(HISTOGRAM **slot, HISTOGRAM *hist, TRAINING_DATA *train_data);
+static HISTOGRAM *take_histogram(HISTOGRAM **slot, TRAINING_DATA *train_data);
+static void free_histograms(HISTOGRAM **hists, int n_features, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Quantizes all features of the training patterns (at most max_bins bins per feature)
+ * --------------------------------------------------------------------------------
+ */
+BINNED_DATA *cpu_init_binned_data(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
+		PARAMETERS *params) {
+
+	int F;
+	int trans = params->patterns_transposed == TRANSPOSED;
+
+	BINNED_DATA *binned = (BINNED_DATA*) malloc(sizeof(BINNED_DATA));
+
+	binned->nX = nXtrain;
+	binned->dX = dXtrain;
+	binned->max_bins = params->max_bins;
+	binned->n_bins = (int*) malloc(dXtrain * sizeof(int));
+	binned->thresholds = (FLOAT_TYPE*) malloc(
+			dXtrain * params->max_bins * sizeof(FLOAT_TYPE));
+	binned->codes = (unsigned char*) malloc(
+			((long) nXtrain) * dXtrain * sizeof(unsigned char));
+	binned->codes16 = NULL;
+
+	// the bin thresholds are computed based on a subset of the patterns
+	int stride = 1;
+	if (nXtrain > HIST_BINNING_SAMPLE_SIZE) {
+		stride = nXtrain / HIST_BINNING_SAMPLE_SIZE;
+	}
+
+#pragma omp parallel for
+	for (F = 0; F < dXtrain; F++) {
+
+		int i, n_values = 0;
+		FLOAT_TYPE *thresholds = binned->thresholds + F * params->max_bins;
+		unsigned char *codes = binned->codes + ((long) F) * nXtrain;
+
+		FLOAT_TYPE *values = (FLOAT_TYPE*) malloc(
+				(nXtrain / stride + 1) * sizeof(FLOAT_TYPE));
+		for (i = 0; i < nXtrain; i += stride) {
+			if (trans) {
+				values[n_values++] = Xtrain[((long) F) * nXtrain + i];
+			} else {
+				values[n_values++] = Xtrain[((long) i) * dXtrain + F];
+			}
+		}
+		qsort(values, n_values, sizeof(FLOAT_TYPE), compare_floats);
+
+		compute_bin_thresholds(values, n_values, params->max_bins, thresholds,
+				binned->n_bins + F);
+		free(values);
+
+		// assign bin codes to all patterns
+		for (i = 0; i < nXtrain; i++) {
+			FLOAT_TYPE x;
+			if (trans) {
+				x = Xtrain[((long) F) * nXtrain + i];
+			} else {
+				x = Xtrain[((long) i) * dXtrain + F];
+			}
+			codes[i] = get_bin_code(x, thresholds, binned->n_bins[F]);
+		}
+
+	}
+
+	return binned;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees memory allocated for the quantized training patterns
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_binned_data(BINNED_DATA *binned) {
+
+	free(binned->n_bins);
+	free(binned->thresholds);
+	free(binned->codes);
+	free(binned);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Wraps already quantized patterns (codes are stored feature-wise and
+ * consist of code_size bytes each); no data are copied
+ * --------------------------------------------------------------------------------
+ */
+BINNED_DATA *cpu_wrap_binned_data(unsigned char *codes, int nX, int dX, int code_size,
+		FLOAT_TYPE *thresholds, int max_bins, int *n_bins) {
+
+	BINNED_DATA *binned = (BINNED_DATA*) malloc(sizeof(BINNED_DATA));
+
+	binned->nX = nX;
+	binned->dX = dX;
+	binned->max_bins = max_bins;
+	binned->n_bins = n_bins;
+	binned->thresholds = thresholds;
+
+	if (code_size == 1) {
+		binned->codes = codes;
+		binned->codes16 = NULL;
+	} else if (code_size == 2) {
+		binned->codes = NULL;
+		binned->codes16 = (unsigned short*) codes;
+	} else {
+		printf("Error: Unsupported code size: %i. Exiting ...\n", code_size);
+		exit(EXIT_FAILURE);
+	}
+
+	return binned;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the (upper) bin thresholds given sorted feature values. A
+ * pattern with feature value x belongs to the first bin b with
+ * x <= thresholds[b]; the last threshold is always MAX_FLOAT_TYPE.
+ * --------------------------------------------------------------------------------
+ */
+static void compute_bin_thresholds(FLOAT_TYPE *values, int n_values, int max_bins,
+		FLOAT_TYPE *thresholds, int *n_bins) {
+
+	int i, b;
+	int n_unique = 0;
+
+	// count distinct values
+	for (i = 0; i < n_values; i++) {
+		if (i == 0 || values[i] > values[i - 1]) {
+			n_unique++;
+		}
+	}
+
+	b = 0;
+
+	if (n_unique <= max_bins) {
+
+		// one bin per distinct value (midpoints as thresholds)
+		for (i = 1; i < n_values; i++) {
+			if (values[i] > values[i - 1]) {
+				FLOAT_TYPE threshold = (values[i - 1] + values[i]) / 2.0;
+				if (threshold == values[i]) {
+					threshold = values[i - 1];
+				}
+				thresholds[b++] = threshold;
+			}
+		}
+
+	} else {
+
+		// quantiles of the (sorted) values
+		for (i = 1; i < max_bins; i++) {
+
+			int pos = (int) ((((long) i) * n_values) / max_bins);
+			FLOAT_TYPE threshold = values[pos];
+
+			if (values[pos - 1] < values[pos]) {
+				threshold = (values[pos - 1] + values[pos]) / 2.0;
+				if (threshold == values[pos]) {
+					threshold = values[pos - 1];
+				}
+			}
+
+			// thresholds have to be strictly increasing
+			if ((b == 0 || threshold > thresholds[b - 1]) && threshold < values[n_values - 1]) {
+				thresholds[b++] = threshold;
+			}
+
+		}
+
+	}
+
+	thresholds[b++] = MAX_FLOAT_TYPE;
+	*n_bins = b;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the bin code for a single feature value (binary search)
+ * --------------------------------------------------------------------------------
+ */
+inline static unsigned char get_bin_code(FLOAT_TYPE x, FLOAT_TYPE *thresholds, int n_bins) {
+
+	int lo = 0;
+	int hi = n_bins - 1;
+
+	while (lo < hi) {
+		int mid = (lo + hi) / 2;
+		if (x <= thresholds[mid]) {
+			hi = mid;
+		} else {
+			lo = mid + 1;
+		}
+	}
+
+	return (unsigned char) lo;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Initializes a histogram with n_bins bins
+ * --------------------------------------------------------------------------------
+ */
+HISTOGRAM *init_histogram(int n_bins, int n_classes, PARAMETERS *params) {
+
+	HISTOGRAM *hist = (HISTOGRAM*) malloc(sizeof(HISTOGRAM));
+
+	hist->n_bins = n_bins;
+	hist->n_classes = n_classes;
+	hist->counts = (int*) malloc(n_bins * sizeof(int));
+	hist->weights = (int*) malloc(n_bins * sizeof(int));
+	hist->sums = NULL;
+	hist->sq_sums = NULL;
+	hist->class_weights = NULL;
+
+	if (params->criterion == CRITERION_MSE || params->criterion == CRITERION_EVEN_SPLIT_MSE) {
+
+		hist->sums = (double*) malloc(n_bins * sizeof(double));
+		hist->sq_sums = (double*) malloc(n_bins * sizeof(double));
+
+	} else if (params->criterion == CRITERION_GINI || params->criterion == CRITERION_EVEN_SPLIT_GINI) {
+
+		hist->class_weights = (int*) malloc(n_bins * n_classes * sizeof(int));
+
+	} else {
+
+		printf("Wrong criterion in init_histogram given: %i. Exiting ...\n", params->criterion);
+		exit(0);
+
+	}
+
+	return hist;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees memory allocated for a histogram
+ * --------------------------------------------------------------------------------
+ */
+void free_histogram(HISTOGRAM *hist) {
+
+	free(hist->counts);
+	free(hist->weights);
+	free(hist->sums);
+	free(hist->sq_sums);
+	free(hist->class_weights);
+	free(hist);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the histogram of feature F for the samples[start:end]
+ * --------------------------------------------------------------------------------
+ */
+void compute_histogram(HISTOGRAM *hist, int F, int start, int end,
+		TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	int i;
+
+	int *indices = train_data->bindices->indices;
+	int *weights = train_data->bindices->indices_wmappings;
+	hist->n_bins = train_data->binned->n_bins[F];
+
+	memset(hist->counts, 0, hist->n_bins * sizeof(int));
+	memset(hist->weights, 0, hist->n_bins * sizeof(int));
+
+	if (hist->class_weights == NULL) {
+
+		memset(hist->sums, 0, hist->n_bins * sizeof(double));
+		memset(hist->sq_sums, 0, hist->n_bins * sizeof(double));
+
+		for (i = start; i < end; i++) {
+			int b = get_binned_code(train_data->binned, F, indices[i]);
+			int weight = weights[i];
+			double val = train_data->Ytrain_mapped[i];
+			hist->counts[b] += 1;
+			hist->weights[b] += weight;
+			hist->sums[b] += weight * val;
+			hist->sq_sums[b] += weight * (val * val);
+		}
+
+	} else {
+
+		memset(hist->class_weights, 0, hist->n_bins * hist->n_classes * sizeof(int));
+
+		for (i = start; i < end; i++) {
+			int b = get_binned_code(train_data->binned, F, indices[i]);
+			int weight = weights[i];
+			int label = (int) train_data->Ytrain_mapped[i];
+			hist->counts[b] += 1;
+			hist->weights[b] += weight;
+			hist->class_weights[b * hist->n_classes + label] += weight;
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Subtracts the histogram other from hist (i.e., hist -= other)
+ * --------------------------------------------------------------------------------
+ */
+void subtract_histogram(HISTOGRAM *hist, HISTOGRAM *other) {
+
+	int b;
+
+	for (b = 0; b < hist->n_bins; b++) {
+		hist->counts[b] -= other->counts[b];
+		hist->weights[b] -= other->weights[b];
+	}
+
+	if (hist->class_weights == NULL) {
+
+		for (b = 0; b < hist->n_bins; b++) {
+			hist->sums[b] -= other->sums[b];
+			hist->sq_sums[b] -= other->sq_sums[b];
+		}
+
+	} else {
+
+		for (b = 0; b < hist->n_bins * hist->n_classes; b++) {
+			hist->class_weights[b] -= other->class_weights[b];
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the histogram of feature F for the node given by trecord (derived
+ * from the cached histograms of the parent node, if available)
+ * --------------------------------------------------------------------------------
+ */
+HISTOGRAM *get_node_histogram(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	HIST_CACHE *cache = trecord->hist_cache;
+	HISTOGRAM *hist;
+
+	if (cache == NULL || cache->hists[F] == NULL) {
+
+		// no histogram of the parent available: compute from scratch
+		hist = init_histogram(train_data->binned->max_bins, train_data->n_classes, params);
+		compute_histogram(hist, F, trecord->start, trecord->end, train_data, params);
+
+	} else if (trecord->is_smaller_child) {
+
+		if (cache->sibling_hists[F] != NULL) {
+
+			// already computed by the larger sibling
+			hist = take_histogram(cache->sibling_hists + F, train_data);
+
+		} else {
+
+			hist = init_histogram(train_data->binned->max_bins, train_data->n_classes, params);
+			compute_histogram(hist, F, trecord->start, trecord->end, train_data, params);
+
+			// turn parent histogram into the one of the larger sibling
+			if (cache->larger_pending && !cache->hists_derived[F]) {
+				subtract_histogram(cache->hists[F], hist);
+				cache->hists_derived[F] = 1;
+			}
+
+		}
+
+	} else {
+
+		if (!cache->hists_derived[F]) {
+
+			// compute histogram of smaller sibling and subtract it
+			HISTOGRAM *sibling = init_histogram(train_data->binned->max_bins,
+					train_data->n_classes, params);
+			compute_histogram(sibling, F, cache->start_smaller, cache->end_smaller,
+					train_data, params);
+			subtract_histogram(cache->hists[F], sibling);
+			cache->hists_derived[F] = 1;
+
+			if (cache->smaller_pending && train_data->hist_cache_bytes
+					+ histogram_num_bytes(sibling) <= HIST_CACHE_MAX_BYTES) {
+				keep_histogram(cache->sibling_hists + F, sibling, train_data);
+			} else {
+				free_histogram(sibling);
+			}
+
+		}
+
+		hist = take_histogram(cache->hists + F, train_data);
+
+	}
+
+	return hist;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Hands the histograms of a node that is split at position pos over to
+ * a cache that is shared by its two children (returns NULL if no
+ * histograms have been kept for the node)
+ * --------------------------------------------------------------------------------
+ */
+HIST_CACHE *cpu_init_histogram_cache(TRAVERSAL_RECORD *trecord, int pos,
+		TRAINING_DATA *train_data) {
+
+	if (trecord->histograms == NULL) {
+		return NULL;
+	}
+
+	HIST_CACHE *cache = (HIST_CACHE*) malloc(sizeof(HIST_CACHE));
+
+	cache->n_features = train_data->dXtrain;
+	cache->hists = trecord->histograms;
+	cache->hists_derived = (int*) calloc(train_data->dXtrain, sizeof(int));
+	cache->sibling_hists = (HISTOGRAM**) calloc(train_data->dXtrain, sizeof(HISTOGRAM*));
+	cache->smaller_pending = 0;
+	cache->larger_pending = 0;
+
+	if (pos - trecord->start <= trecord->end - pos) {
+		cache->start_smaller = trecord->start;
+		cache->end_smaller = pos;
+	} else {
+		cache->start_smaller = pos;
+		cache->end_smaller = trecord->end;
+	}
+
+	trecord->histograms = NULL;
+
+	return cache;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees a histogram cache once none of the two children is pending anymore
+ * --------------------------------------------------------------------------------
+ */
+void cpu_release_histogram_cache(HIST_CACHE *hist_cache, TRAINING_DATA *train_data) {
+
+	if (hist_cache->smaller_pending || hist_cache->larger_pending) {
+		return;
+	}
+
+	free_histograms(hist_cache->hists, hist_cache->n_features, train_data);
+	free_histograms(hist_cache->sibling_hists, hist_cache->n_features, train_data);
+	free(hist_cache->hists_derived);
+	free(hist_cache);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees all histograms attached to a (processed) traversal record
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_traversal_histograms(TRAVERSAL_RECORD *trecord, TRAINING_DATA *train_data) {
+
+	if (trecord->histograms != NULL) {
+		free_histograms(trecord->histograms, train_data->dXtrain, train_data);
+		trecord->histograms = NULL;
+	}
+
+	cpu_detach_histogram_cache(trecord, train_data);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Detaches a traversal record from the histogram cache of its parent (e.g.,
+ * if its subtree is built by another thread)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_detach_histogram_cache(TRAVERSAL_RECORD *trecord, TRAINING_DATA *train_data) {
+
+	if (trecord->hist_cache != NULL) {
+		if (trecord->is_smaller_child) {
+			trecord->hist_cache->smaller_pending = 0;
+		} else {
+			trecord->hist_cache->larger_pending = 0;
+		}
+		cpu_release_histogram_cache(trecord->hist_cache, train_data);
+		trecord->hist_cache = NULL;
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the best split of feature F based on its histogram (returns 1
+ * if the feature is constant, i.e., if only a single bin is occupied)
+ * --------------------------------------------------------------------------------
+ */
+int compute_optimal_threshold_hist(HISTOGRAM *hist, int F, int start,
+		TRAINING_DATA *train_data, PARAMETERS *params, SPLIT_RECORD *split) {
+
+	int b, k;
+	int n_occupied = 0;
+
+	int count_total = 0, weight_total = 0;
+	int count_left = 0, weight_left = 0;
+	double sum_total = 0.0, sq_sum_total = 0.0;
+	double sum_left = 0.0, sq_sum_left = 0.0;
+	int *class_weights_total = NULL;
+	int *class_weights_left = NULL;
+
+	FLOAT_TYPE impurity;
+	FLOAT_TYPE *thresholds = train_data->binned->thresholds + F * train_data->binned->max_bins;
+
+	int is_mse = (hist->class_weights == NULL);
+
+	for (b = 0; b < hist->n_bins; b++) {
+		if (hist->counts[b] > 0) {
+			n_occupied++;
+		}
+		count_total += hist->counts[b];
+		weight_total += hist->weights[b];
+	}
+
+	if (n_occupied <= 1) {
+		return 1;
+	}
+
+	// impurity of node
+	if (is_mse) {
+
+		for (b = 0; b < hist->n_bins; b++) {
+			sum_total += hist->sums[b];
+			sq_sum_total += hist->sq_sums[b];
+		}
+		FLOAT_TYPE mean = sum_total / weight_total;
+		impurity = sq_sum_total / weight_total - mean * mean;
+
+	} else {
+
+		get_scratch_class_counts(train_data, &class_weights_total, &class_weights_left);
+		for (b = 0; b < hist->n_bins; b++) {
+			for (k = 0; k < hist->n_classes; k++) {
+				class_weights_total[k] += hist->class_weights[b * hist->n_classes + k];
+			}
+		}
+		impurity = gini_impurity(class_weights_total, hist->n_classes, weight_total);
+
+	}
+
+	// scan all bin boundaries (left: bins[0:b+1], right: bins[b+1:])
+	for (b = 0; b < hist->n_bins - 1; b++) {
+
+		if (hist->counts[b] == 0) {
+			continue;
+		}
+
+		count_left += hist->counts[b];
+		weight_left += hist->weights[b];
+		if (is_mse) {
+			sum_left += hist->sums[b];
+			sq_sum_left += hist->sq_sums[b];
+		} else {
+			for (k = 0; k < hist->n_classes; k++) {
+				class_weights_left[k] += hist->class_weights[b * hist->n_classes + k];
+			}
+		}
+
+		int count_right = count_total - count_left;
+		int weight_right = weight_total - weight_left;
+
+		if (count_right == 0) {
+			break;
+		}
+
+		// reject if min_samples_leaf is not guaranteed
+		if (count_left < params->min_samples_leaf || count_right < params->min_samples_leaf) {
+			continue;
+		}
+
+		FLOAT_TYPE impurity_left, impurity_right;
+
+		if (is_mse) {
+
+			double sum_right = sum_total - sum_left;
+			double sq_sum_right = sq_sum_total - sq_sum_left;
+			double mean_left = sum_left / weight_left;
+			double mean_right = sum_right / weight_right;
+			impurity_left = sq_sum_left / weight_left - mean_left * mean_left;
+			impurity_right = sq_sum_right / weight_right - mean_right * mean_right;
+
+		} else {
+
+			impurity_left = gini_impurity(class_weights_left, hist->n_classes, weight_left);
+			impurity_right = 0.0;
+			for (k = 0; k < hist->n_classes; k++) {
+				FLOAT_TYPE pmk_right = (1.0 / weight_right) * (FLOAT_TYPE) (class_weights_total[k] - class_weights_left[k]);
+				impurity_right += pmk_right * (1.0 - pmk_right);
+			}
+
+		}
+
+		FLOAT_TYPE improvement = hist_improvement(impurity, impurity_left,
+				impurity_right, weight_left, weight_right, params);
+
+		if (improvement > split->improvement) {
+
+			split->feature = F;
+			split->pos = start + count_left;
+			split->threshold = thresholds[b];
+			split->improvement = improvement;
+			split->impurity = impurity;
+			split->impurity_left = impurity_left;
+			split->impurity_right = impurity_right;
+			split->prob_left = ((FLOAT_TYPE) weight_left) / weight_total;
+			split->prob_right = ((FLOAT_TYPE) weight_right) / weight_total;
+
+		}
+
+	}
+
+	return 0;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Checks a single feature (histogram-based)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_hist(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params,
+		int *n_non_constant_features_checked, SPLIT_RECORD *best_split) {
+
+	if (!feature_is_constant(trecord->const_features, F, train_data->dXtrain)) {
+
+		HISTOGRAM *hist = get_node_histogram(trecord, F, train_data, params);
+
+		SPLIT_RECORD *current_split = get_scratch_split_record(train_data);
+		int feat_is_constant = compute_optimal_threshold_hist(hist, F,
+				trecord->start, train_data, params, current_split);
+
+		if (feat_is_constant) {
+
+			// If feature is constant, keep track of it, but do nothing else
+			set_feature_constant(trecord->const_features, F,
+					train_data->dXtrain);
+
+		} else {
+
+			*n_non_constant_features_checked += 1;
+
+			if (current_split->improvement > best_split->improvement) {
+				copy_split_record(current_split, best_split);
+			}
+
+		}
+
+		// keep histograms of large nodes for the children (if memory permits)
+		if (!feat_is_constant && trecord->end - trecord->start >= HIST_SUBTRACTION_MIN_SAMPLES
+				&& train_data->hist_cache_bytes + histogram_num_bytes(hist) <= HIST_CACHE_MAX_BYTES) {
+			if (trecord->histograms == NULL) {
+				trecord->histograms = (HISTOGRAM**) calloc(train_data->dXtrain, sizeof(HISTOGRAM*));
+			}
+			keep_histogram(trecord->histograms + F, hist, train_data);
+		} else {
+			free_histogram(hist);
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Gini impurity for given class weights
+ * --------------------------------------------------------------------------------
+ */
+inline static FLOAT_TYPE gini_impurity(int *class_weights, int n_classes, int weight) {
+
+	int k;
+	FLOAT_TYPE impurity = 0.0;
+
+	for (k = 0; k < n_classes; k++) {
+		FLOAT_TYPE pmk = (1.0 / weight) * (FLOAT_TYPE) class_weights[k];
+		impurity += pmk * (1.0 - pmk);
+	}
+
+	return impurity;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Improvement of a split (see criterion_improvement_via_threshold)
+ * --------------------------------------------------------------------------------
+ */
+inline static FLOAT_TYPE hist_improvement(FLOAT_TYPE impurity, FLOAT_TYPE impurity_left,
+		FLOAT_TYPE impurity_right, int weight_left, int weight_right, PARAMETERS *params) {
+
+	int weight_all = weight_left + weight_right;
+	FLOAT_TYPE fraction_left = weight_left / (FLOAT_TYPE) weight_all;
+	FLOAT_TYPE fraction_right = weight_right / (FLOAT_TYPE) weight_all;
+
+	FLOAT_TYPE improvement = impurity - fraction_left * impurity_left - fraction_right * impurity_right;
+
+	if (params->criterion == CRITERION_EVEN_SPLIT_MSE || params->criterion == CRITERION_EVEN_SPLIT_GINI) {
+		improvement = (1 - params->lam_crit) * improvement;
+		improvement = improvement - params->lam_crit * (fabs(fraction_left - fraction_right));
+	}
+
+	return improvement;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Number of bytes occupied by a histogram
+ * --------------------------------------------------------------------------------
+ */
+static long histogram_num_bytes(HISTOGRAM *hist) {
+
+	long n_bytes = 2 * hist->n_bins * sizeof(int);
+
+	if (hist->class_weights == NULL) {
+		n_bytes += 2 * hist->n_bins * sizeof(double);
+	} else {
+		n_bytes += hist->n_bins * hist->n_classes * sizeof(int);
+	}
+
+	return n_bytes;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Stores a histogram in a cache slot (and keeps track of the memory used)
+ * --------------------------------------------------------------------------------
+ */
+static void keep_histogram(HISTOGRAM **slot, HISTOGRAM *hist, TRAINING_DATA *train_data) {
+
+	long n_bytes = histogram_num_bytes(hist);
+
+	// features might be checked in parallel (intra-tree parallelism)
+#pragma omp atomic
+	train_data->hist_cache_bytes += n_bytes;
+	*slot = hist;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Removes a histogram from a cache slot (and keeps track of the memory used)
+ * --------------------------------------------------------------------------------
+ */
+static HISTOGRAM *take_histogram(HISTOGRAM **slot, TRAINING_DATA *train_data) {
+
+	HISTOGRAM *hist = *slot;
+	long n_bytes = histogram_num_bytes(hist);
+
+#pragma omp atomic
+	train_data->hist_cache_bytes -= n_bytes;
+	*slot = NULL;
+
+	return hist;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees an array of (cached) histograms
+ * --------------------------------------------------------------------------------
+ */
+static void free_histograms(HISTOGRAM **hists, int n_features, TRAINING_DATA *train_data) {
+
+	int F;
+
+	for (F = 0; F < n_features; F++) {
+		if (hists[F] != NULL) {
+			free_histogram(take_histogram(hists + F, train_data));
+		}
+	}
+
+	free(hists);
+
+}
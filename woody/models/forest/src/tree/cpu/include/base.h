@@ -9,6 +9,10 @@
 
 #include "criteria.h"
 #include "standard.h"
+#include "histogram.h"
+#include "scratch.h"
+#include "level.h"
+#include "traversal.h"
 
 #include "../../include/global.h"
 #include "../../include/tree.h"
@@ -29,6 +33,21 @@ void cpu_init(PARAMETERS *params, FOREST *forest);
  */
 void cpu_init_after_fitting(PARAMETERS *params, FOREST *forest);
 
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of all trees (standard layout) w.r.t. params->node_order
+ * (visit counts via the patterns X, if given)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_optimize_layout(FLOAT_TYPE *X, int nX, int dX, PARAMETERS *params,
+		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Counts the number of patterns visiting each node of a tree
+ * --------------------------------------------------------------------------------
+ */
+void cpu_count_node_visits(TREE *tree, FLOAT_TYPE *X, int nX, int dX,
+		int *counts);
+
 /* --------------------------------------------------------------------------------
  * Frees resources
  * --------------------------------------------------------------------------------
@@ -41,7 +60,7 @@ void cpu_free_resources(PARAMETERS *params, FOREST *forest);
  */
 void cpu_predict(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
 		FLOAT_TYPE *predictions,
-		int *indices, int dindices,
+		int *indices, int dindices, BINNED_DATA *binned,
 		PARAMETERS *params, FOREST *forest);
 
 /* --------------------------------------------------------------------------------
@@ -49,7 +68,39 @@ void cpu_predict(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
  * --------------------------------------------------------------------------------
  */
 void cpu_query_forest(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
-		FLOAT_TYPE *predictions, int *indices, int dindices, PARAMETERS *params, FOREST *forest);
+		FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		PARAMETERS *params, FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Returns the number of rows per block for computing predictions
+ * --------------------------------------------------------------------------------
+ */
+int get_prediction_block_size(int n_preds, int dXtest, PARAMETERS *params,
+		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Computes the predictions for a block of rows via all trees
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_block(FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int n_preds, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest,
+		int start, int end, FLOAT_TYPE *block_preds);
+
+/* --------------------------------------------------------------------------------
+ * Computes the outputs of all trees (row x tree grid)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_grid(FLOAT_TYPE *Xtest, int dXtest, FLOAT_TYPE *preds,
+		int n_preds, int *indices, int dindices, BINNED_DATA *binned,
+		PARAMETERS *params, FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Combines the outputs of all trees to the final predictions
+ * --------------------------------------------------------------------------------
+ */
+void cpu_combine_tree_predictions(FLOAT_TYPE *preds, FLOAT_TYPE *predictions,
+		int n_preds, PARAMETERS *params);
 
 /* --------------------------------------------------------------------------------
  * Queries the forest (all raw predictions)
@@ -59,12 +110,75 @@ void cpu_query_forest_all_preds(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
 FLOAT_TYPE *preds, int n_preds, int d_preds, int *indices,
 int dindices, PARAMETERS *params, FOREST *forest);
 
+/* --------------------------------------------------------------------------------
+ * Computes the class probabilities (means of the leaves' class distributions)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_proba(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *proba, int n_preds, int n_classes, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Computes the class probabilities for a block of rows via all trees
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_proba_block(FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *proba, int n_classes, int *indices, int dindices,
+		BINNED_DATA *binned, PARAMETERS *params, FOREST *forest,
+		int start, int end, FLOAT_TYPE *block_preds);
+
+/* --------------------------------------------------------------------------------
+ * Computes the predictions for a few rows sequentially (low latency)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_forest_fast(FLOAT_TYPE *Xtest, int nXtest, int dXtest,
+		FLOAT_TYPE *predictions, PARAMETERS *params, FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Returns the leaf value of a single tree for a single pattern
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE cpu_query_tree_pattern(TREE *tree, FLOAT_TYPE *tpatt);
+
+/* --------------------------------------------------------------------------------
+ * Returns the leaf id of a single tree for a single pattern
+ * --------------------------------------------------------------------------------
+ */
+unsigned int cpu_query_tree_leaf_id(TREE *tree, FLOAT_TYPE *tpatt);
+
+/* --------------------------------------------------------------------------------
+ * Computes the leaf ids of a single tree, the number of patterns per leaf,
+ * and the stable permutation that sorts the patterns w.r.t. the leaf ids
+ * --------------------------------------------------------------------------------
+ */
+void cpu_get_leaves_buckets(TREE *tree, FLOAT_TYPE *Xtest, int nXtest,
+		int dXtest, int *leaves_ids, int *counts, int n_counts, int *perm,
+		PARAMETERS *params);
+
 /* --------------------------------------------------------------------------------
  * Queries a single tree
  * --------------------------------------------------------------------------------
  */
 void cpu_query_tree(TREE tree, FLOAT_TYPE *Xtest, int nXtest, int dXtest,
-FLOAT_TYPE *predictions, int *indices, int dindices, int prediction_type);
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type);
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1 (via the given
+ * traversal kernel, see cpu_get_traversal_kernel)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type, int kernel, int start, int end);
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1 (compact layout)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_compact(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+FLOAT_TYPE *predictions, int *indices, int dindices, BINNED_DATA *binned,
+		int prediction_type, int start, int end);
 
 /* --------------------------------------------------------------------------------
  * Initializes the training data
@@ -96,6 +210,32 @@ void cpu_check_single_feature(TRAVERSAL_RECORD *trecord, int F,
 		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate, int *n_non_constant_features_checked,
 		SPLIT_RECORD *best_split);
 
+/* --------------------------------------------------------------------------------
+ * Checks the features of a node in parallel (intra-tree parallelism); returns
+ * the index of the last feature considered (or dXtrain if all features have
+ * been checked)
+ * --------------------------------------------------------------------------------
+ */
+int cpu_check_features_parallel(TRAVERSAL_RECORD *trecord, int *features,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate,
+		int *n_non_constant_features_checked, SPLIT_RECORD *best_split);
+
+/* --------------------------------------------------------------------------------
+ * Computes the range (minimum and maximum) of feature F for a traversal
+ * record (randomized trees); the feature is marked as constant if needed
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_feature_range(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params, FLOAT_TYPE *range);
+
+/* --------------------------------------------------------------------------------
+ * Checks a single (non-constant) feature for a given threshold (randomized trees)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_threshold(TRAVERSAL_RECORD *trecord, int F,
+		FLOAT_TYPE threshold, TRAINING_DATA *train_data, PARAMETERS *params,
+		SPLIT_RECORD *split);
+
 /* --------------------------------------------------------------------------------
  * Partitions the bootstrap indices according to a threshold value.
  * --------------------------------------------------------------------------------
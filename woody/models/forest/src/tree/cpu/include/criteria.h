@@ -8,6 +8,8 @@
 #ifndef ENSEMBLE_HUGE_FOREST_INCLUDE_CRITERIA_H_
 #define ENSEMBLE_HUGE_FOREST_INCLUDE_CRITERIA_H_
 
+#include "scratch.h"
+
 #include "../../include/global.h"
 #include "../../include/util.h"
 
@@ -23,14 +25,21 @@ FLOAT_TYPE cpu_criterion_leaf(int start, int end,
 		TRAINING_DATA *train_data, PARAMETERS *params);
 
 /* --------------------------------------------------------------------------------
- * Initializes a splitting criterion (which can be updated).
+ * Computes the class distribution for samples[start:end] (classification)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_criterion_leaf_dist(int start, int end, FLOAT_TYPE *dist,
+		int n_dist, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Initializes a splitting criterion (which can be updated). For
+ * classification, the class counts have to be attached to the record
+ * (see get_scratch_criterion_record).
  * --------------------------------------------------------------------------------
  */
 void init_criterion_cpu(CRITERION_RECORD *crit_record, PATTERN_LABEL_WEIGHT *XF_Y_W,
 		int n_XF_Y_W, PARAMETERS *params, TRAINING_DATA *train_data);
 
-void free_criterion_cpu(CRITERION_RECORD *crit_record, PARAMETERS *params, TRAINING_DATA *train_data);
-
 /* --------------------------------------------------------------------------------
  * Updates a criterion.
  * --------------------------------------------------------------------------------
@@ -38,4 +47,22 @@ void free_criterion_cpu(CRITERION_RECORD *crit_record, PARAMETERS *params, TRAIN
 void inline update_criterion_cpu(CRITERION_RECORD *crit_record,
 		PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W, int new_pos, PARAMETERS *params, TRAINING_DATA *train_data);
 
+/* --------------------------------------------------------------------------------
+ * Initializes a splitting criterion for the samples with the given
+ * labels and weights (structure-of-arrays layout). For classification,
+ * the class counts have to be attached to the record.
+ * --------------------------------------------------------------------------------
+ */
+void init_criterion_samples(CRITERION_RECORD *crit_record, FLOAT_TYPE *labels,
+		int *weights, int n_samples, PARAMETERS *params, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Updates a criterion: the samples[current_pos:new_pos] are moved from the
+ * right to the left side (labels and weights are accessed via the samples).
+ * --------------------------------------------------------------------------------
+ */
+void inline update_criterion_samples(CRITERION_RECORD *crit_record, int *samples,
+		FLOAT_TYPE *labels, int *weights, int new_pos, PARAMETERS *params,
+		TRAINING_DATA *train_data);
+
 #endif /* ENSEMBLE_HUGE_FOREST_INCLUDE_CRITERIA_H_ */
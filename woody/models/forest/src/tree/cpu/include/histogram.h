@@ -0,0 +1,132 @@
+/*
+ * histogram.h
+ */
+
+#ifndef ENSEMBLE_CPU_INCLUDE_HISTOGRAM_H_
+#define ENSEMBLE_CPU_INCLUDE_HISTOGRAM_H_
+
+#include <inttypes.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <omp.h>
+
+#include "../../include/global.h"
+#include "../../include/util.h"
+
+#include "../../../include/util.h"
+
+#include "scratch.h"
+
+/* --------------------------------------------------------------------------------
+ * Quantizes all features of the training patterns (at most max_bins bins per feature)
+ * --------------------------------------------------------------------------------
+ */
+BINNED_DATA *cpu_init_binned_data(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Frees memory allocated for the quantized training patterns
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_binned_data(BINNED_DATA *binned);
+
+/* --------------------------------------------------------------------------------
+ * Wraps already quantized patterns (codes are stored feature-wise and
+ * consist of code_size bytes each); no data are copied
+ * --------------------------------------------------------------------------------
+ */
+BINNED_DATA *cpu_wrap_binned_data(unsigned char *codes, int nX, int dX, int code_size,
+		FLOAT_TYPE *thresholds, int max_bins, int *n_bins);
+
+/* --------------------------------------------------------------------------------
+ * Returns the bin code of pattern idx for feature F
+ * --------------------------------------------------------------------------------
+ */
+static inline int get_binned_code(BINNED_DATA *binned, int F, int idx) {
+
+	long offset = ((long) F) * binned->nX + idx;
+
+	if (binned->codes16 != NULL) {
+		return binned->codes16[offset];
+	}
+	return binned->codes[offset];
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Initializes a histogram with n_bins bins
+ * --------------------------------------------------------------------------------
+ */
+HISTOGRAM *init_histogram(int n_bins, int n_classes, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Frees memory allocated for a histogram
+ * --------------------------------------------------------------------------------
+ */
+void free_histogram(HISTOGRAM *hist);
+
+/* --------------------------------------------------------------------------------
+ * Computes the histogram of feature F for the samples[start:end]
+ * --------------------------------------------------------------------------------
+ */
+void compute_histogram(HISTOGRAM *hist, int F, int start, int end,
+		TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Subtracts the histogram other from hist (i.e., hist -= other)
+ * --------------------------------------------------------------------------------
+ */
+void subtract_histogram(HISTOGRAM *hist, HISTOGRAM *other);
+
+/* --------------------------------------------------------------------------------
+ * Returns the histogram of feature F for the node given by trecord (derived
+ * from the cached histograms of the parent node, if available)
+ * --------------------------------------------------------------------------------
+ */
+HISTOGRAM *get_node_histogram(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Hands the histograms of a node that is split at position pos over to
+ * a cache that is shared by its two children (returns NULL if no
+ * histograms have been kept for the node)
+ * --------------------------------------------------------------------------------
+ */
+HIST_CACHE *cpu_init_histogram_cache(TRAVERSAL_RECORD *trecord, int pos,
+		TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Frees a histogram cache once none of the two children is pending anymore
+ * --------------------------------------------------------------------------------
+ */
+void cpu_release_histogram_cache(HIST_CACHE *hist_cache, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Frees all histograms attached to a (processed) traversal record
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_traversal_histograms(TRAVERSAL_RECORD *trecord, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Detaches a traversal record from the histogram cache of its parent (e.g.,
+ * if its subtree is built by another thread)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_detach_histogram_cache(TRAVERSAL_RECORD *trecord, TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Computes the best split of feature F based on its histogram (returns 1
+ * if the feature is constant, i.e., if only a single bin is occupied)
+ * --------------------------------------------------------------------------------
+ */
+int compute_optimal_threshold_hist(HISTOGRAM *hist, int F, int start,
+		TRAINING_DATA *train_data, PARAMETERS *params, SPLIT_RECORD *split);
+
+/* --------------------------------------------------------------------------------
+ * Checks a single feature (histogram-based)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_hist(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params, int *n_non_constant_features_checked,
+		SPLIT_RECORD *best_split);
+
+#endif /* ENSEMBLE_CPU_INCLUDE_HISTOGRAM_H_ */
@@ -0,0 +1,43 @@
+/*
+ * level.h
+ */
+
+#ifndef ENSEMBLE_CPU_INCLUDE_LEVEL_H_
+#define ENSEMBLE_CPU_INCLUDE_LEVEL_H_
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <omp.h>
+
+#include "../../include/global.h"
+#include "../../include/util.h"
+
+#include "../../../include/util.h"
+
+/* --------------------------------------------------------------------------------
+ * Computes the splits for all nodes of a level (level-wise traversal mode): each
+ * feature is processed for all nodes at once, i.e., a single pass over the
+ * feature column per level if the records are sorted w.r.t. their positions in
+ * the bootstrap indices (see sort_trecords_start). The splits found are the
+ * same as for processing the records one after the other (standard trees).
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_splits_level(TRAVERSAL_RECORD **trecords, int n_trecords,
+		int *random_features, TRAINING_DATA *train_data, PARAMETERS *params,
+		unsigned int *rstate);
+
+/* --------------------------------------------------------------------------------
+ * Computes the splits for the records trecords[lo:hi] of a level
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_splits_level_chunk(TRAVERSAL_RECORD **trecords, int lo, int hi,
+		int *random_features, int *feature_positions, unsigned int *rstates,
+		TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Sorts traversal records w.r.t. their start positions
+ * --------------------------------------------------------------------------------
+ */
+void sort_trecords_start(TRAVERSAL_RECORD **trecords, int n_trecords);
+
+#endif /* ENSEMBLE_CPU_INCLUDE_LEVEL_H_ */
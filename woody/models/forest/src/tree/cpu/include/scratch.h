@@ -0,0 +1,77 @@
+/*
+ * scratch.h
+ */
+
+#ifndef ENSEMBLE_CPU_INCLUDE_SCRATCH_H_
+#define ENSEMBLE_CPU_INCLUDE_SCRATCH_H_
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <omp.h>
+
+#include "../../include/global.h"
+#include "../../include/util.h"
+
+/* --------------------------------------------------------------------------------
+ * Initializes the scratch arenas of a tree (one per thread in case of intra-tree
+ * parallelism); all buffers are sized once for the root node (i.e., all bootstrap
+ * indices) and reused for all nodes of the tree
+ * --------------------------------------------------------------------------------
+ */
+void cpu_init_scratch(TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Frees the scratch arenas of a tree (and updates the number of allocations
+ * avoided)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_scratch(TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Allocates the buffers of a scratch arena
+ * --------------------------------------------------------------------------------
+ */
+void allocate_scratch_buffers(SCRATCH *scratch);
+
+/* --------------------------------------------------------------------------------
+ * Returns the scratch arena of the calling thread
+ * --------------------------------------------------------------------------------
+ */
+static inline SCRATCH *get_scratch(TRAINING_DATA *train_data) {
+
+	SCRATCH *scratch = train_data->scratch;
+
+	if (train_data->n_scratch > 1) {
+		scratch += omp_get_thread_num();
+	}
+	if (!scratch->allocated) {
+		allocate_scratch_buffers(scratch);
+	}
+
+	return scratch;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the (reset) split record of the scratch arena
+ * --------------------------------------------------------------------------------
+ */
+SPLIT_RECORD *get_scratch_split_record(TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Returns the criterion record of the scratch arena (class counts are
+ * attached, but not initialized)
+ * --------------------------------------------------------------------------------
+ */
+CRITERION_RECORD *get_scratch_criterion_record(TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Returns two class count arrays (left/right) of the scratch arena that are
+ * set to zero
+ * --------------------------------------------------------------------------------
+ */
+void get_scratch_class_counts(TRAINING_DATA *train_data, int **class_counts_left,
+		int **class_counts_right);
+
+#endif /* ENSEMBLE_CPU_INCLUDE_SCRATCH_H_ */
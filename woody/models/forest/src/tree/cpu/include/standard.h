@@ -21,8 +21,46 @@
 
 #define size_threshold 16
 
+// tie-breaking of the structure-of-arrays splitter: a threshold only replaces
+// the best one of a feature if its improvement is larger by more than this
+// tolerance (relative to the best improvement); hence, among thresholds that
+// are tied up to roundoff, the lowest one wins (and, among features with the
+// same improvement, the first one checked)
+#if USE_DOUBLE > 0
+#define SPLIT_IMPROVEMENT_TOLERANCE 1e-10
+#else
+#define SPLIT_IMPROVEMENT_TOLERANCE 1e-5
+#endif
+
 void intro_sort(PATTERN_LABEL_WEIGHT *a, int n);
 
 FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W, PARAMETERS *params, TRAINING_DATA *train_data, SPLIT_RECORD *best_split);
 
+/* --------------------------------------------------------------------------------
+ * Checks a single feature (standard trees, structure-of-arrays layout)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_standard(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params,
+		int *n_non_constant_features_checked, SPLIT_RECORD *best_split);
+
+/* --------------------------------------------------------------------------------
+ * Gathers the values of feature F for the samples[start:end]; samples
+ * contains the positions relative to start (i.e., 0, 1, ...)
+ * --------------------------------------------------------------------------------
+ */
+void gather_feature_values_samples(FLOAT_TYPE *XF, int *samples, int F, int start,
+		int end, TRAINING_DATA *train_data, PARAMETERS *params);
+
+/* --------------------------------------------------------------------------------
+ * Computes the best split of feature F for the samples[start:start+n_samples]
+ * (structure-of-arrays layout): only the feature values and the samples are
+ * sorted, the labels and weights are accessed via the samples. The lowest
+ * threshold wins among tied ones (see SPLIT_IMPROVEMENT_TOLERANCE). Returns 1
+ * if the feature is constant.
+ * --------------------------------------------------------------------------------
+ */
+int compute_optimal_split(FLOAT_TYPE *XF, int *samples, int n_samples, int F, int start,
+		TRAINING_DATA *train_data, PARAMETERS *params, SPLIT_RECORD *split);
+
 #endif /* ENSEMBLE_CPU_INCLUDE_STANDARD_H_ */
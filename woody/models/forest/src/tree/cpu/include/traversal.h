@@ -0,0 +1,102 @@
+/*
+ * traversal.h
+ */
+
+#ifndef ENSEMBLE_CPU_INCLUDE_TRAVERSAL_H_
+#define ENSEMBLE_CPU_INCLUDE_TRAVERSAL_H_
+
+#include <inttypes.h>
+#include <limits.h>
+#include <stddef.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "../../include/global.h"
+#include "../../include/util.h"
+
+#include "../../../include/util.h"
+
+// avx2 kernel (x86 only, selected at runtime)
+#if (defined(__x86_64__) || defined(__i386__)) && defined(__GNUC__) \
+	&& (__GNUC__ > 4 || (__GNUC__ == 4 && __GNUC_MINOR__ >= 9))
+#define TRAVERSAL_HAVE_AVX2 1
+#else
+#define TRAVERSAL_HAVE_AVX2 0
+#endif
+
+typedef struct qs_tree {
+
+	// internal nodes sorted w.r.t. features and thresholds; the
+	// bitvector of a node has zeros for the leaves of its left
+	// subtree (leaves are numbered from left to right)
+	int n_nodes;
+	int node_features[QS_MAX_LEAVES - 1];
+	FLOAT_TYPE thresholds[QS_MAX_LEAVES - 1];
+	uint64_t bitvectors[QS_MAX_LEAVES - 1];
+
+	// distinct features, the nodes of feature features[j] are
+	// feature_starts[j], ..., feature_starts[j+1]-1
+	int n_features;
+	int features[QS_MAX_LEAVES - 1];
+	int feature_starts[QS_MAX_LEAVES];
+
+	// node ids and values of the leaves
+	int n_leaves;
+	unsigned int leaf_ids[QS_MAX_LEAVES];
+	FLOAT_TYPE leaf_values[QS_MAX_LEAVES];
+
+} QS_TREE;
+
+/* --------------------------------------------------------------------------------
+ * Returns the traversal kernel to be used for the requested one and the tree
+ * given (auto: avx2 for float if supported by the cpu, multi-row otherwise;
+ * bitvectors only for trees with at most QS_MAX_LEAVES leaves)
+ * --------------------------------------------------------------------------------
+ */
+int cpu_get_traversal_kernel(int kernel, TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Returns 1 if the cpu supports avx2 and 0 otherwise
+ * --------------------------------------------------------------------------------
+ */
+int cpu_avx2_supported(void);
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1; TRAVERSAL_MULTI_ROWS
+ * rows are advanced through the tree at once (portable version)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_multi(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end);
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1; the rows are advanced
+ * through the tree at once via avx2 gathers and compares (16 rows for float,
+ * 8 rows for double)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_avx2(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end);
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree (at most QS_MAX_LEAVES leaves) for the rows start, ...,
+ * end-1 via bitvectors (QuickScorer): for each block of rows, the nodes are
+ * processed feature by feature and the bitvectors of all nodes whose tests
+ * fail are combined (without branches); the exit leaf is the leftmost leaf
+ * that remains
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_bitvector(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end);
+
+/* --------------------------------------------------------------------------------
+ * Initializes the bitvector representation of a tree; returns 0 if the tree
+ * has more than QS_MAX_LEAVES leaves and 1 otherwise
+ * --------------------------------------------------------------------------------
+ */
+int cpu_init_qs_tree(TREE *tree, QS_TREE *qs);
+
+#endif /* ENSEMBLE_CPU_INCLUDE_TRAVERSAL_H_ */
@@ -0,0 +1,186 @@
+/*
+ * level.c
+ */
+#include "include/level.h"
+#include "include/base.h"
+
+static int compare_trecords_start(const void *a, const void *b);
+
+/* --------------------------------------------------------------------------------
+ * Computes the splits for all nodes of a level (level-wise traversal mode): each
+ * feature is processed for all nodes at once, i.e., a single pass over the
+ * feature column per level if the records are sorted w.r.t. their positions in
+ * the bootstrap indices (see sort_trecords_start). The splits found are the
+ * same as for processing the records one after the other (standard trees).
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_splits_level(TRAVERSAL_RECORD **trecords, int n_trecords,
+		int *random_features, TRAINING_DATA *train_data, PARAMETERS *params,
+		unsigned int *rstate) {
+
+	int i, j;
+	int dim = train_data->dXtrain;
+
+	// position of each feature in the random order of a record
+	int *feature_positions = (int*) malloc(n_trecords * dim * sizeof(int));
+	unsigned int *rstates = (unsigned int*) malloc(n_trecords * sizeof(unsigned int));
+
+	for (i = 0; i < n_trecords; i++) {
+		for (j = 0; j < dim; j++) {
+			int F = get_feature_dimension(random_features + i * dim, j);
+			feature_positions[i * dim + F] = j;
+		}
+		// randomized trees: one random state per record
+		rstates[i] = custom_rand_r(rstate);
+	}
+
+	if (params->intra_tree_parallel) {
+
+		// chunks of records with about the same number of samples; siblings that
+		// share the histograms of their parent are kept in the same chunk
+		int n_chunks = INTRA_TREE_LEVEL_CHUNKS_PER_THREAD * params->num_threads;
+		long n_samples = trecords[n_trecords - 1]->end - trecords[0]->start;
+		long chunk_samples = max(n_samples / n_chunks, 1);
+		int lo = 0;
+
+		for (i = 0; i < n_trecords; i++) {
+
+			int last = (i == n_trecords - 1);
+			int shared_cache = !last && trecords[i]->hist_cache != NULL
+					&& trecords[i]->hist_cache == trecords[i + 1]->hist_cache;
+
+			if (last || (!shared_cache && trecords[i]->end - trecords[lo]->start >= chunk_samples)) {
+				int hi = i + 1;
+#pragma omp task firstprivate(lo, hi)
+				cpu_compute_splits_level_chunk(trecords, lo, hi, random_features,
+						feature_positions, rstates, train_data, params);
+				lo = hi;
+			}
+
+		}
+#pragma omp taskwait
+
+	} else {
+
+		cpu_compute_splits_level_chunk(trecords, 0, n_trecords, random_features,
+				feature_positions, rstates, train_data, params);
+
+	}
+
+	free(feature_positions);
+	free(rstates);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the splits for the records trecords[lo:hi] of a level
+ * --------------------------------------------------------------------------------
+ */
+void cpu_compute_splits_level_chunk(TRAVERSAL_RECORD **trecords, int lo, int hi,
+		int *random_features, int *feature_positions, unsigned int *rstates,
+		TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	int i, j, F;
+	int dim = train_data->dXtrain;
+	int n_records = hi - lo;
+
+	SPLIT_RECORD *best_splits = (SPLIT_RECORD*) malloc(n_records * sizeof(SPLIT_RECORD));
+	int *best_positions = (int*) malloc(n_records * sizeof(int));
+	int *n_non_constant_features_checked = (int*) malloc(n_records * sizeof(int));
+
+	for (i = 0; i < n_records; i++) {
+		reset_split_record(best_splits + i);
+		best_positions[i] = dim;
+		n_non_constant_features_checked[i] = 0;
+	}
+
+	// (1) the first max_features features of each record, one feature
+	// after the other for all records
+	for (F = 0; F < dim; F++) {
+
+		for (i = lo; i < hi; i++) {
+
+			int pos = feature_positions[i * dim + F];
+
+			if (pos < params->max_features) {
+
+				SPLIT_RECORD current_split;
+				int n_checked = 0;
+
+				reset_split_record(&current_split);
+				cpu_check_single_feature(trecords[i], F, train_data, params, rstates + i,
+						&n_checked, &current_split);
+				n_non_constant_features_checked[i - lo] += n_checked;
+
+				// same result as for the sequential check (first best feature)
+				SPLIT_RECORD *best_split = best_splits + (i - lo);
+				if (current_split.improvement > best_split->improvement
+						|| (current_split.improvement == best_split->improvement
+								&& current_split.improvement > MIN_FLOAT_TYPE
+								&& pos < best_positions[i - lo])) {
+					copy_split_record(&current_split, best_split);
+					best_positions[i - lo] = pos;
+				}
+
+			}
+
+		}
+
+	}
+
+	// (2) records without non-constant features so far: check the remaining
+	// features until a non-constant one is found
+	for (i = lo; i < hi; i++) {
+
+		SPLIT_RECORD *best_split = best_splits + (i - lo);
+		int *n_checked = n_non_constant_features_checked + (i - lo);
+
+		j = min(params->max_features, dim) - 1;
+		if (*n_checked == 0) {
+			for (j = params->max_features; j < dim; j++) {
+				F = get_feature_dimension(random_features + i * dim, j);
+				cpu_check_single_feature(trecords[i], F, train_data, params, rstates + i,
+						n_checked, best_split);
+				if (*n_checked > 0) {
+					break;
+				}
+			}
+		}
+
+		// If all features are constant: leaf detected!
+		if (j == dim && *n_checked == 0) {
+			best_split->leaf_detected = LEAF;
+		}
+
+		copy_split_record(best_split, trecords[i]->split_record);
+
+	}
+
+	free(best_splits);
+	free(best_positions);
+	free(n_non_constant_features_checked);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Sorts traversal records w.r.t. their start positions
+ * --------------------------------------------------------------------------------
+ */
+void sort_trecords_start(TRAVERSAL_RECORD **trecords, int n_trecords) {
+
+	qsort(trecords, n_trecords, sizeof(TRAVERSAL_RECORD*), compare_trecords_start);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Compares two traversal records w.r.t. their start positions
+ * --------------------------------------------------------------------------------
+ */
+static int compare_trecords_start(const void *a, const void *b) {
+
+	TRAVERSAL_RECORD *ta = *((TRAVERSAL_RECORD**) a);
+	TRAVERSAL_RECORD *tb = *((TRAVERSAL_RECORD**) b);
+
+	return ta->start - tb->start;
+
+}
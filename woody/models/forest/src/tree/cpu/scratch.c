@@ -0,0 +1,152 @@
+/*
+ * scratch.c
+ */
+#include "include/scratch.h"
+
+/* --------------------------------------------------------------------------------
+ * Initializes the scratch arenas of a tree (one per thread in case of intra-tree
+ * parallelism); all buffers are sized once for the root node (i.e., all bootstrap
+ * indices) and reused for all nodes of the tree
+ * --------------------------------------------------------------------------------
+ */
+void cpu_init_scratch(TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	int i;
+
+	int n_scratch = params->intra_tree_parallel ? params->num_threads : 1;
+	int standard = params->tree_type == TREE_TYPE_STANDARD;
+
+	train_data->scratch = (SCRATCH*) malloc(n_scratch * sizeof(SCRATCH));
+	train_data->n_scratch = n_scratch;
+
+	for (i = 0; i < n_scratch; i++) {
+
+		SCRATCH *scratch = train_data->scratch + i;
+
+		scratch->allocated = 0;
+		scratch->n_samples = train_data->bindices->n_indices;
+
+		// only the buffers needed by the splitter at hand are allocated
+		scratch->use_soa = standard && params->splitter == SPLITTER_EXACT;
+		scratch->use_aos = !standard || params->splitter == SPLITTER_EXACT_AOS;
+		scratch->use_aos_copy = standard && params->splitter == SPLITTER_EXACT_AOS;
+
+		scratch->n_classes = 0;
+		if (params->learning_type == LEARNING_PROBLEM_TYPE_CLASSIFICATION) {
+			scratch->n_classes = train_data->n_classes;
+		}
+
+		scratch->XF_Y_W = NULL;
+		scratch->XF_Y_W_copy = NULL;
+		scratch->XF = NULL;
+		scratch->samples = NULL;
+		scratch->class_counts_left = NULL;
+		scratch->class_counts_right = NULL;
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Allocates the buffers of a scratch arena
+ * --------------------------------------------------------------------------------
+ */
+void allocate_scratch_buffers(SCRATCH *scratch) {
+
+	int n_samples = scratch->n_samples;
+
+	if (scratch->use_soa) {
+		scratch->XF = (FLOAT_TYPE*) malloc(n_samples * sizeof(FLOAT_TYPE));
+		scratch->samples = (int*) malloc(n_samples * sizeof(int));
+	}
+	if (scratch->use_aos) {
+		scratch->XF_Y_W = (PATTERN_LABEL_WEIGHT*) malloc(n_samples * sizeof(PATTERN_LABEL_WEIGHT));
+	}
+	if (scratch->use_aos_copy) {
+		scratch->XF_Y_W_copy = (PATTERN_LABEL_WEIGHT*) malloc(n_samples * sizeof(PATTERN_LABEL_WEIGHT));
+	}
+	if (scratch->n_classes > 0) {
+		scratch->class_counts_left = (int*) malloc(scratch->n_classes * sizeof(int));
+		scratch->class_counts_right = (int*) malloc(scratch->n_classes * sizeof(int));
+	}
+
+	scratch->allocated = 1;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Frees the scratch arenas of a tree (and updates the number of allocations
+ * avoided)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_free_scratch(TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	int i;
+
+	for (i = 0; i < train_data->n_scratch; i++) {
+
+		SCRATCH *scratch = train_data->scratch + i;
+
+		free(scratch->XF_Y_W);
+		free(scratch->XF_Y_W_copy);
+		free(scratch->XF);
+		free(scratch->samples);
+		free(scratch->class_counts_left);
+		free(scratch->class_counts_right);
+
+	}
+
+	free(train_data->scratch);
+	train_data->scratch = NULL;
+	train_data->n_scratch = 0;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the (reset) split record of the scratch arena
+ * --------------------------------------------------------------------------------
+ */
+SPLIT_RECORD *get_scratch_split_record(TRAINING_DATA *train_data) {
+
+	SCRATCH *scratch = get_scratch(train_data);
+
+	reset_split_record(&scratch->split_record);
+
+	return &scratch->split_record;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the criterion record of the scratch arena (class counts are
+ * attached, but not initialized)
+ * --------------------------------------------------------------------------------
+ */
+CRITERION_RECORD *get_scratch_criterion_record(TRAINING_DATA *train_data) {
+
+	SCRATCH *scratch = get_scratch(train_data);
+	CRITERION_RECORD *crit_record = &scratch->criterion_record;
+
+	crit_record->class_counts_left = scratch->class_counts_left;
+	crit_record->class_counts_right = scratch->class_counts_right;
+
+	return crit_record;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns two class count arrays (left/right) of the scratch arena that are
+ * set to zero
+ * --------------------------------------------------------------------------------
+ */
+void get_scratch_class_counts(TRAINING_DATA *train_data, int **class_counts_left,
+		int **class_counts_right) {
+
+	SCRATCH *scratch = get_scratch(train_data);
+
+	memset(scratch->class_counts_left, 0, scratch->n_classes * sizeof(int));
+	memset(scratch->class_counts_right, 0, scratch->n_classes * sizeof(int));
+
+	*class_counts_left = scratch->class_counts_left;
+	*class_counts_right = scratch->class_counts_right;
+
+}
@@ -11,10 +11,10 @@ FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W,
 
 	// Important: We are checking a non-constant feature here.
 
-	// TODO: Scikit-Learn is still faster here since:
-	// - it only sorts an array of features+samples (with only features being used for comparisons!)
-	// - the subsequent updates only depend on the samples
-	// -> about 2.5 faster!
+	// NOTE: This is the array-of-structs variant (splitter "exact_aos"). The
+	// default one (compute_optimal_split) only sorts an array of features+samples
+	// (with only features being used for comparisons) and the subsequent updates
+	// only depend on the samples (like Scikit-Learn).
 	/*
 	int i;
 
@@ -29,7 +29,8 @@ FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W,
 */
 
 	// Generate local copy (since the patterns will be sorted here)
-	PATTERN_LABEL_WEIGHT *XF_Y_W_copy = (PATTERN_LABEL_WEIGHT*) malloc(n_XF_Y_W * sizeof(PATTERN_LABEL_WEIGHT));
+	SCRATCH *scratch = get_scratch(train_data);
+	PATTERN_LABEL_WEIGHT *XF_Y_W_copy = scratch->XF_Y_W_copy;
 	memcpy(XF_Y_W_copy, XF_Y_W, n_XF_Y_W * sizeof(PATTERN_LABEL_WEIGHT));
 	intro_sort(XF_Y_W_copy, n_XF_Y_W);
 
@@ -45,7 +46,7 @@ FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W,
 	*/
 
 	// init criterion record
-	CRITERION_RECORD *criterion_record = (CRITERION_RECORD*) malloc(sizeof(CRITERION_RECORD));
+	CRITERION_RECORD *criterion_record = get_scratch_criterion_record(train_data);
 	init_criterion_cpu(criterion_record, XF_Y_W_copy, n_XF_Y_W, params, train_data);
 	FLOAT_TYPE best_improvement = MIN_FLOAT_TYPE;
 
@@ -91,9 +92,6 @@ FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W,
 
 	}
 
-	free_criterion_cpu(criterion_record, params, train_data);
-	free(XF_Y_W_copy);
-
 	return threshold;
 
 }
@@ -101,6 +99,157 @@ FLOAT_TYPE compute_optimal_threshold(PATTERN_LABEL_WEIGHT *XF_Y_W, int n_XF_Y_W,
 
 
 
+/* --------------------------------------------------------------------------------
+ * Checks a single feature (standard trees, structure-of-arrays layout)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_check_single_feature_standard(TRAVERSAL_RECORD *trecord, int F,
+		TRAINING_DATA *train_data, PARAMETERS *params,
+		int *n_non_constant_features_checked, SPLIT_RECORD *best_split) {
+
+	if (!feature_is_constant(trecord->const_features, F, train_data->dXtrain)) {
+
+		// buffers of the scratch arena (sized for the root)
+		int n_samples = trecord->end - trecord->start;
+		SCRATCH *scratch = get_scratch(train_data);
+		FLOAT_TYPE *XF = scratch->XF;
+		int *samples = scratch->samples;
+		gather_feature_values_samples(XF, samples, F, trecord->start, trecord->end,
+				train_data, params);
+
+		SPLIT_RECORD *current_split = get_scratch_split_record(train_data);
+		int feat_is_constant = compute_optimal_split(XF, samples, n_samples, F,
+				trecord->start, train_data, params, current_split);
+
+		if (feat_is_constant) {
+
+			// If feature is constant, keep track of it, but do nothing else
+			set_feature_constant(trecord->const_features, F,
+					train_data->dXtrain);
+
+		} else {
+
+			*n_non_constant_features_checked += 1;
+
+			// the first feature checked wins for equal improvements
+			if (current_split->improvement > best_split->improvement) {
+				copy_split_record(current_split, best_split);
+			}
+
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Gathers the values of feature F for the samples[start:end]; samples
+ * contains the positions relative to start (i.e., 0, 1, ...)
+ * --------------------------------------------------------------------------------
+ */
+void gather_feature_values_samples(FLOAT_TYPE *XF, int *samples, int F, int start,
+		int end, TRAINING_DATA *train_data, PARAMETERS *params) {
+
+	int i;
+	int *indices = train_data->bindices->indices;
+
+	if (params->patterns_transposed == TRANSPOSED) {
+
+		FLOAT_TYPE *XTF = train_data->Xtrain + ((long) F) * train_data->nXtrain;
+		for (i = start; i < end; i++) {
+			XF[i - start] = XTF[indices[i]];
+			samples[i - start] = i - start;
+		}
+
+	} else {
+
+		for (i = start; i < end; i++) {
+			XF[i - start] = train_data->Xtrain[((long) indices[i]) * train_data->dXtrain + F];
+			samples[i - start] = i - start;
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the best split of feature F for the samples[start:start+n_samples]
+ * (structure-of-arrays layout): only the feature values and the samples are
+ * sorted, the labels and weights are accessed via the samples. The lowest
+ * threshold wins among tied ones (see SPLIT_IMPROVEMENT_TOLERANCE). Returns 1
+ * if the feature is constant.
+ * --------------------------------------------------------------------------------
+ */
+int compute_optimal_split(FLOAT_TYPE *XF, int *samples, int n_samples, int F, int start,
+		TRAINING_DATA *train_data, PARAMETERS *params, SPLIT_RECORD *split) {
+
+	FLOAT_TYPE *labels = train_data->Ytrain_mapped + start;
+	int *weights = train_data->bindices->indices_wmappings + start;
+
+	combined_sort(XF, samples, n_samples);
+
+	if (XF[n_samples - 1] <= XF[0] + FEATURE_THRESHOLD) {
+		return 1;
+	}
+
+	// init criterion record
+	CRITERION_RECORD *criterion_record = get_scratch_criterion_record(train_data);
+	init_criterion_samples(criterion_record, labels, weights, n_samples, params, train_data);
+
+	int p = 0;
+	while (p < n_samples) {
+
+		// Increase counter until feature difference is significant
+		while ((p + 1 < n_samples) && (XF[p + 1] <= XF[p] + FEATURE_THRESHOLD)) {
+			p++;
+		}
+
+		// p==n_samples possible; here, we already have p > 0!
+		p += 1;
+
+		if (p < n_samples) {
+
+			// reject if min_samples_leaf is not guaranteed
+			if ((p < params->min_samples_leaf) || ((n_samples - p) < params->min_samples_leaf)) {
+				continue;
+			}
+
+			// update criterion w.r.t. new position p
+			update_criterion_samples(criterion_record, samples, labels, weights, p,
+					params, train_data);
+
+			// store results if improvement is better than before (up to
+			// the tolerance, i.e., the lowest threshold wins for ties)
+			if (criterion_record->improvement > split->improvement
+					+ SPLIT_IMPROVEMENT_TOLERANCE * fabs(split->improvement)) {
+
+				FLOAT_TYPE threshold = (XF[p - 1] + XF[p]) / 2.0;
+				if (threshold == XF[p]) {
+					threshold = XF[p - 1];
+				}
+
+				int weight_all = criterion_record->weight_left + criterion_record->weight_right;
+
+				split->feature = F;
+				split->pos = start + p;
+				split->threshold = threshold;
+				split->improvement = criterion_record->improvement;
+				split->impurity = criterion_record->impurity;
+				split->impurity_left = criterion_record->impurity_left;
+				split->impurity_right = criterion_record->impurity_right;
+				split->prob_left = ((FLOAT_TYPE) criterion_record->weight_left) / weight_all;
+				split->prob_right = ((FLOAT_TYPE) criterion_record->weight_right) / weight_all;
+
+			}
+
+		}
+
+	}
+
+	return 0;
+
+}
+
 #define swap(a, b) { \
 register PATTERN_LABEL_WEIGHT tmp = *(a); \
 *(a) = *(b); \
@@ -0,0 +1,616 @@
+/*
+ * traversal.c
+ */
+#include "include/traversal.h"
+#include "include/base.h"
+
+#if TRAVERSAL_HAVE_AVX2
+#include <immintrin.h>
+#endif
+
+#if defined(__GNUC__)
+#define TRAVERSAL_PREFETCH(addr) __builtin_prefetch(addr)
+#else
+#define TRAVERSAL_PREFETCH(addr)
+#endif
+
+// avx2 and default versions of the bitvector kernel (selected at
+// runtime via ifunc, hence linux only)
+#if TRAVERSAL_HAVE_AVX2 && defined(__linux__) && __GNUC__ >= 6
+#define TRAVERSAL_TARGET_CLONES __attribute__((target_clones("avx2", "default")))
+#else
+#define TRAVERSAL_TARGET_CLONES
+#endif
+
+static FLOAT_TYPE get_leaf_output(TREE *tree, unsigned int node_id,
+		int prediction_type);
+static int add_qs_nodes(TREE *tree, unsigned int node_id, QS_TREE *qs);
+
+/* --------------------------------------------------------------------------------
+ * Returns the traversal kernel to be used for the requested one and the tree
+ * given (auto: avx2 for float if supported by the cpu, multi-row otherwise;
+ * bitvectors only for trees with at most QS_MAX_LEAVES leaves)
+ * --------------------------------------------------------------------------------
+ */
+int cpu_get_traversal_kernel(int kernel, TREE *tree) {
+
+	if (kernel == TRAVERSAL_KERNEL_BITVECTOR) {
+
+		// full binary trees, i.e., at most QS_MAX_LEAVES leaves
+		if (tree->node_counter <= 2 * QS_MAX_LEAVES - 1) {
+			return TRAVERSAL_KERNEL_BITVECTOR;
+		}
+		kernel = TRAVERSAL_KERNEL_AUTO;
+
+	}
+
+	switch (kernel) {
+
+	case TRAVERSAL_KERNEL_AUTO:
+#if USE_DOUBLE > 0
+		// gathering 4 doubles per vector does not pay off
+		return TRAVERSAL_KERNEL_MULTI;
+#endif
+	case TRAVERSAL_KERNEL_AVX2:
+		if (cpu_avx2_supported()) {
+			return TRAVERSAL_KERNEL_AVX2;
+		}
+		return TRAVERSAL_KERNEL_MULTI;
+
+	case TRAVERSAL_KERNEL_SCALAR:
+	case TRAVERSAL_KERNEL_MULTI:
+		return kernel;
+
+	default:
+		printf("Error: Unknown traversal kernel: %i\n", kernel);
+		exit(EXIT_FAILURE);
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns 1 if the cpu supports avx2 and 0 otherwise
+ * --------------------------------------------------------------------------------
+ */
+int cpu_avx2_supported(void) {
+
+#if TRAVERSAL_HAVE_AVX2
+	static int supported = -1;
+
+	if (supported < 0) {
+		__builtin_cpu_init();
+		supported = __builtin_cpu_supports("avx2") ? 1 : 0;
+	}
+
+	return supported;
+#else
+	return 0;
+#endif
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1; TRAVERSAL_MULTI_ROWS
+ * rows are advanced through the tree at once (portable version): the rows
+ * do not depend on each other, hence the memory accesses of the individual
+ * rows overlap (the next node of each row is prefetched)
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_multi(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end) {
+
+	int i, l, n_active;
+
+	unsigned int node_ids[TRAVERSAL_MULTI_ROWS];
+	FLOAT_TYPE *tpatts[TRAVERSAL_MULTI_ROWS];
+
+	for (i = start; i + TRAVERSAL_MULTI_ROWS <= end; i += TRAVERSAL_MULTI_ROWS) {
+
+		for (l = 0; l < TRAVERSAL_MULTI_ROWS; l++) {
+			long idx = (dindices > 0) ? indices[i + l] : i + l;
+			tpatts[l] = Xtest + idx * dXtest;
+			node_ids[l] = TREE_ROOT_ID;
+		}
+
+		if (tree->compact != NULL) {
+
+			COMPACT_TREE_NODE *cnode = tree->compact;
+
+			do {
+				n_active = 0;
+				for (l = 0; l < TRAVERSAL_MULTI_ROWS; l++) {
+					COMPACT_TREE_NODE *current = cnode + node_ids[l];
+					if (current->right_offset != 0) {
+						node_ids[l] += (tpatts[l][current->feature] <= current->threshold) ?
+								1 : current->right_offset;
+						TRAVERSAL_PREFETCH(cnode + node_ids[l]);
+						n_active++;
+					}
+				}
+			} while (n_active > 0);
+
+		} else {
+
+			TREE_NODE *node = tree->root;
+
+			do {
+				n_active = 0;
+				for (l = 0; l < TRAVERSAL_MULTI_ROWS; l++) {
+					TREE_NODE *current = node + node_ids[l];
+					if (current->left_id != TREE_CHILD_ID_NOT_SET) {
+						// right_id follows left_id (no branch)
+						node_ids[l] = (&current->left_id)[!(tpatts[l][current->feature] <= current->thres_or_leaf)];
+						TRAVERSAL_PREFETCH(node + node_ids[l]);
+						n_active++;
+					}
+				}
+			} while (n_active > 0);
+
+		}
+
+		for (l = 0; l < TRAVERSAL_MULTI_ROWS; l++) {
+			predictions[i - start + l] = get_leaf_output(tree, node_ids[l], prediction_type);
+		}
+
+	}
+
+	// remaining rows
+	if (i < end) {
+		cpu_query_tree_rows(tree, Xtest, dXtest, predictions + (i - start),
+				indices, dindices, NULL, prediction_type,
+				TRAVERSAL_KERNEL_SCALAR, i, end);
+	}
+
+}
+
+#if TRAVERSAL_HAVE_AVX2
+
+// vectors of node ids: 4 lanes for double (one per gathered
+// double), 8 lanes for float; AVX2_GROUPS vectors are processed
+// at once
+#define AVX2_GROUPS 2
+#define AVX2_ROWS (AVX2_GROUPS * AVX2_LANES)
+#if USE_DOUBLE > 0
+#define AVX2_LANES 4
+#define VINT __m128i
+#define VINT_SET1(a) _mm_set1_epi32(a)
+#define VINT_LOADU(p) _mm_loadu_si128((__m128i*) (p))
+#define VINT_STOREU(p, v) _mm_storeu_si128((__m128i*) (p), v)
+#define VINT_ADD(a, b) _mm_add_epi32(a, b)
+#define VINT_MUL(a, b) _mm_mullo_epi32(a, b)
+#define VINT_AND(a, b) _mm_and_si128(a, b)
+#define VINT_CMPEQ(a, b) _mm_cmpeq_epi32(a, b)
+#define VINT_BLEND(a, b, mask) _mm_blendv_epi8(a, b, mask)
+#define VINT_ALL(v) (_mm_movemask_ps(_mm_castsi128_ps(v)) == 0xF)
+#define VINT_GATHER(base, offs) _mm_i32gather_epi32((int const*) (base), offs, 1)
+#define VX_GATHER(base, idx) _mm256_i32gather_pd(base, idx, 8)
+#define VTHRES_GATHER(base, offs) _mm256_i32gather_pd((double const*) (base), offs, 1)
+#define VLE_MASK(x, t) _mm256_castsi256_si128(_mm256_permutevar8x32_epi32( \
+		_mm256_castpd_si256(_mm256_cmp_pd(x, t, _CMP_LE_OQ)), \
+		_mm256_setr_epi32(0, 2, 4, 6, 0, 2, 4, 6)))
+#else
+#define AVX2_LANES 8
+#define VINT __m256i
+#define VINT_SET1(a) _mm256_set1_epi32(a)
+#define VINT_LOADU(p) _mm256_loadu_si256((__m256i*) (p))
+#define VINT_STOREU(p, v) _mm256_storeu_si256((__m256i*) (p), v)
+#define VINT_ADD(a, b) _mm256_add_epi32(a, b)
+#define VINT_MUL(a, b) _mm256_mullo_epi32(a, b)
+#define VINT_AND(a, b) _mm256_and_si256(a, b)
+#define VINT_CMPEQ(a, b) _mm256_cmpeq_epi32(a, b)
+#define VINT_BLEND(a, b, mask) _mm256_blendv_epi8(a, b, mask)
+#define VINT_ALL(v) (_mm256_movemask_ps(_mm256_castsi256_ps(v)) == 0xFF)
+#define VINT_GATHER(base, offs) _mm256_i32gather_epi32((int const*) (base), offs, 1)
+#define VX_GATHER(base, idx) _mm256_i32gather_ps(base, idx, 4)
+#define VTHRES_GATHER(base, offs) _mm256_i32gather_ps((float const*) (base), offs, 1)
+#define VLE_MASK(x, t) _mm256_castps_si256(_mm256_cmp_ps(x, t, _CMP_LE_OQ))
+#endif
+
+/* --------------------------------------------------------------------------------
+ * Advances AVX2_ROWS rows (given via their offsets in Xtest) through a tree
+ * (standard layout) and stores the leaf ids in node_ids; the byte offsets of
+ * the nodes are gathered (finished rows are masked out). The rows are split
+ * into AVX2_GROUPS independent vectors to hide the latencies of the gathers.
+ * --------------------------------------------------------------------------------
+ */
+__attribute__((target("avx2")))
+static void traverse_rows_avx2(TREE_NODE *node, FLOAT_TYPE *Xtest,
+		int *row_offsets, unsigned int *node_ids) {
+
+	int g, all_done;
+	char *base = (char*) node;
+
+	VINT zero = VINT_SET1(0);
+	VINT node_size = VINT_SET1(sizeof(TREE_NODE));
+	VINT rows[AVX2_GROUPS], current[AVX2_GROUPS];
+
+	for (g = 0; g < AVX2_GROUPS; g++) {
+		rows[g] = VINT_LOADU(row_offsets + g * AVX2_LANES);
+		current[g] = VINT_SET1(TREE_ROOT_ID);
+	}
+
+	do {
+
+		all_done = 1;
+
+		for (g = 0; g < AVX2_GROUPS; g++) {
+
+			VINT offs = VINT_MUL(current[g], node_size);
+			VINT left = VINT_GATHER(base + offsetof(TREE_NODE, left_id), offs);
+			VINT done = VINT_CMPEQ(left, zero);
+
+			if (VINT_ALL(done)) {
+				continue;
+			}
+			all_done = 0;
+
+			VINT right = VINT_GATHER(base + offsetof(TREE_NODE, right_id), offs);
+			VINT feature = VINT_BLEND(VINT_GATHER(base + offsetof(TREE_NODE, feature), offs), zero, done);
+
+			VINT le = VLE_MASK(VX_GATHER(Xtest, VINT_ADD(rows[g], feature)),
+					VTHRES_GATHER(base + offsetof(TREE_NODE, thres_or_leaf), offs));
+
+			current[g] = VINT_BLEND(VINT_BLEND(right, left, le), current[g], done);
+
+		}
+
+	} while (!all_done);
+
+	for (g = 0; g < AVX2_GROUPS; g++) {
+		VINT_STOREU(node_ids + g * AVX2_LANES, current[g]);
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Advances AVX2_ROWS rows (given via their offsets in Xtest) through a tree
+ * (compact layout) and stores the leaf ids in node_ids
+ * --------------------------------------------------------------------------------
+ */
+__attribute__((target("avx2")))
+static void traverse_rows_avx2_compact(COMPACT_TREE_NODE *cnode,
+		FLOAT_TYPE *Xtest, int *row_offsets, unsigned int *node_ids) {
+
+	int g, all_done;
+	char *base = (char*) cnode;
+
+	VINT zero = VINT_SET1(0);
+	VINT one = VINT_SET1(1);
+	VINT feature_mask = VINT_SET1(0xFFFF);
+	VINT node_size = VINT_SET1(sizeof(COMPACT_TREE_NODE));
+	VINT rows[AVX2_GROUPS], current[AVX2_GROUPS];
+
+	for (g = 0; g < AVX2_GROUPS; g++) {
+		rows[g] = VINT_LOADU(row_offsets + g * AVX2_LANES);
+		current[g] = VINT_SET1(TREE_ROOT_ID);
+	}
+
+	do {
+
+		all_done = 1;
+
+		for (g = 0; g < AVX2_GROUPS; g++) {
+
+			VINT offs = VINT_MUL(current[g], node_size);
+			VINT right_offset = VINT_GATHER(base + offsetof(COMPACT_TREE_NODE, right_offset), offs);
+			VINT done = VINT_CMPEQ(right_offset, zero);
+
+			if (VINT_ALL(done)) {
+				continue;
+			}
+			all_done = 0;
+
+			// feature: lower 16 bits (little endian) of the gathered word
+			VINT feature = VINT_AND(VINT_GATHER(base + offsetof(COMPACT_TREE_NODE, feature), offs), feature_mask);
+			feature = VINT_BLEND(feature, zero, done);
+
+			VINT le = VLE_MASK(VX_GATHER(Xtest, VINT_ADD(rows[g], feature)),
+					VTHRES_GATHER(base + offsetof(COMPACT_TREE_NODE, threshold), offs));
+
+			current[g] = VINT_BLEND(VINT_BLEND(VINT_ADD(current[g], right_offset),
+					VINT_ADD(current[g], one), le), current[g], done);
+
+		}
+
+	} while (!all_done);
+
+	for (g = 0; g < AVX2_GROUPS; g++) {
+		VINT_STOREU(node_ids + g * AVX2_LANES, current[g]);
+	}
+
+}
+
+#endif
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree for the rows start, ..., end-1; the rows are advanced
+ * through the tree at once via avx2 gathers and compares (16 rows for float,
+ * 8 rows for double). Falls back to the multi-row version if avx2 is not
+ * available or if the offsets do not fit into 32 bit integers.
+ * --------------------------------------------------------------------------------
+ */
+void cpu_query_tree_rows_avx2(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end) {
+
+#if TRAVERSAL_HAVE_AVX2
+
+	int i, l;
+
+	int row_offsets[AVX2_ROWS];
+	unsigned int node_ids[AVX2_ROWS];
+
+	long node_bytes = (tree->compact != NULL) ? sizeof(COMPACT_TREE_NODE) : sizeof(TREE_NODE);
+
+	if (!cpu_avx2_supported() || (long) tree->node_counter * node_bytes > INT_MAX) {
+		cpu_query_tree_rows_multi(tree, Xtest, dXtest, predictions, indices,
+				dindices, prediction_type, start, end);
+		return;
+	}
+
+	for (i = start; i + AVX2_ROWS <= end; i += AVX2_ROWS) {
+
+		int offsets_valid = 1;
+
+		for (l = 0; l < AVX2_ROWS; l++) {
+			long idx = (dindices > 0) ? indices[i + l] : i + l;
+			if (idx * dXtest > INT_MAX - dXtest) {
+				offsets_valid = 0;
+				break;
+			}
+			row_offsets[l] = (int) (idx * dXtest);
+		}
+
+		if (!offsets_valid) {
+			cpu_query_tree_rows_multi(tree, Xtest, dXtest, predictions + (i - start),
+					indices, dindices, prediction_type, i, i + AVX2_ROWS);
+			continue;
+		}
+
+		if (tree->compact != NULL) {
+			traverse_rows_avx2_compact(tree->compact, Xtest, row_offsets, node_ids);
+		} else {
+			traverse_rows_avx2(tree->root, Xtest, row_offsets, node_ids);
+		}
+
+		for (l = 0; l < AVX2_ROWS; l++) {
+			predictions[i - start + l] = get_leaf_output(tree, node_ids[l], prediction_type);
+		}
+
+	}
+
+	// remaining rows
+	if (i < end) {
+		cpu_query_tree_rows(tree, Xtest, dXtest, predictions + (i - start),
+				indices, dindices, NULL, prediction_type,
+				TRAVERSAL_KERNEL_SCALAR, i, end);
+	}
+
+#else
+
+	cpu_query_tree_rows_multi(tree, Xtest, dXtest, predictions, indices,
+			dindices, prediction_type, start, end);
+
+#endif
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Queries a single tree (at most QS_MAX_LEAVES leaves) for the rows start, ...,
+ * end-1 via bitvectors (QuickScorer): for each block of rows, the nodes are
+ * processed feature by feature (one column of the block at a time) and the
+ * bitvectors of all nodes whose tests fail (i.e., the rows go right) are
+ * combined without branches; the exit leaf is the leftmost leaf that remains
+ * --------------------------------------------------------------------------------
+ */
+TRAVERSAL_TARGET_CLONES
+void cpu_query_tree_rows_bitvector(TREE *tree, FLOAT_TYPE *Xtest, int dXtest,
+		FLOAT_TYPE *predictions, int *indices, int dindices,
+		int prediction_type, int start, int end) {
+
+	int i, j, k, r;
+
+	QS_TREE qs;
+	uint64_t masks[QS_BLOCK_ROWS];
+	FLOAT_TYPE column[QS_BLOCK_ROWS];
+	FLOAT_TYPE *tpatts[QS_BLOCK_ROWS];
+
+	if (!cpu_init_qs_tree(tree, &qs)) {
+		cpu_query_tree_rows_multi(tree, Xtest, dXtest, predictions, indices,
+				dindices, prediction_type, start, end);
+		return;
+	}
+
+	if (prediction_type != PREDICTION_TYPE_NORMAL
+			&& prediction_type != PREDICTION_TYPE_LEAVES_IDS) {
+		printf("Error: Unknown prediction type: %i ", prediction_type);
+		exit(EXIT_FAILURE);
+	}
+
+	uint64_t all_leaves = (qs.n_leaves == 64) ? ~((uint64_t) 0) : (((uint64_t) 1) << qs.n_leaves) - 1;
+
+	for (i = start; i < end; i += QS_BLOCK_ROWS) {
+
+		int n_rows = min(QS_BLOCK_ROWS, end - i);
+
+		for (r = 0; r < n_rows; r++) {
+			long idx = (dindices > 0) ? indices[i + r] : i + r;
+			tpatts[r] = Xtest + idx * dXtest;
+			masks[r] = all_leaves;
+		}
+
+		for (j = 0; j < qs.n_features; j++) {
+
+			int F = qs.features[j];
+
+			for (r = 0; r < n_rows; r++) {
+				column[r] = tpatts[r][F];
+			}
+
+			for (k = qs.feature_starts[j]; k < qs.feature_starts[j + 1]; k++) {
+
+				FLOAT_TYPE threshold = qs.thresholds[k];
+				uint64_t bitvector = qs.bitvectors[k];
+
+				// all bits set if the row goes left
+				for (r = 0; r < n_rows; r++) {
+					masks[r] &= bitvector | (uint64_t) -(int64_t) (column[r] <= threshold);
+				}
+
+			}
+
+		}
+
+		for (r = 0; r < n_rows; r++) {
+			int leaf = __builtin_ctzll(masks[r]);
+			if (prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
+				predictions[i - start + r] = (FLOAT_TYPE) qs.leaf_ids[leaf];
+			} else {
+				predictions[i - start + r] = qs.leaf_values[leaf];
+			}
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Initializes the bitvector representation of a tree; returns 0 if the tree
+ * has more than QS_MAX_LEAVES leaves and 1 otherwise
+ * --------------------------------------------------------------------------------
+ */
+int cpu_init_qs_tree(TREE *tree, QS_TREE *qs) {
+
+	int i, j;
+
+	qs->n_nodes = 0;
+	qs->n_leaves = 0;
+	qs->n_features = 0;
+
+	if (add_qs_nodes(tree, TREE_ROOT_ID, qs) < 0) {
+		return 0;
+	}
+
+	// sort nodes w.r.t. features and thresholds (insertion sort)
+	for (i = 1; i < qs->n_nodes; i++) {
+
+		int F = qs->node_features[i];
+		FLOAT_TYPE threshold = qs->thresholds[i];
+		uint64_t bitvector = qs->bitvectors[i];
+
+		for (j = i - 1; j >= 0 && (qs->node_features[j] > F
+				|| (qs->node_features[j] == F && qs->thresholds[j] > threshold)); j--) {
+			qs->node_features[j + 1] = qs->node_features[j];
+			qs->thresholds[j + 1] = qs->thresholds[j];
+			qs->bitvectors[j + 1] = qs->bitvectors[j];
+		}
+
+		qs->node_features[j + 1] = F;
+		qs->thresholds[j + 1] = threshold;
+		qs->bitvectors[j + 1] = bitvector;
+
+	}
+
+	// distinct features
+	for (i = 0; i < qs->n_nodes; i++) {
+		if (i == 0 || qs->node_features[i] != qs->node_features[i - 1]) {
+			qs->features[qs->n_features] = qs->node_features[i];
+			qs->feature_starts[qs->n_features] = i;
+			qs->n_features++;
+		}
+	}
+	qs->feature_starts[qs->n_features] = qs->n_nodes;
+
+	return 1;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Adds the nodes of the subtree rooted at node_id (depth-first, i.e., the
+ * leaves are numbered from left to right); returns the number of leaves of
+ * the subtree or -1 if the tree has more than QS_MAX_LEAVES leaves
+ * --------------------------------------------------------------------------------
+ */
+static int add_qs_nodes(TREE *tree, unsigned int node_id, QS_TREE *qs) {
+
+	int is_leaf, feature;
+	unsigned int left_id, right_id;
+	FLOAT_TYPE threshold;
+
+	if (tree->compact != NULL) {
+		COMPACT_TREE_NODE *cnode = tree->compact + node_id;
+		is_leaf = (cnode->right_offset == 0);
+		left_id = node_id + 1;
+		right_id = node_id + cnode->right_offset;
+		feature = cnode->feature;
+		threshold = cnode->threshold;
+	} else {
+		TREE_NODE *node = tree->root + node_id;
+		is_leaf = (node->left_id == TREE_CHILD_ID_NOT_SET);
+		left_id = node->left_id;
+		right_id = node->right_id;
+		feature = node->feature;
+		threshold = node->thres_or_leaf;
+	}
+
+	if (is_leaf) {
+
+		if (qs->n_leaves == QS_MAX_LEAVES) {
+			return -1;
+		}
+		qs->leaf_ids[qs->n_leaves] = node_id;
+		qs->leaf_values[qs->n_leaves] = get_leaf_output(tree, node_id, PREDICTION_TYPE_NORMAL);
+		qs->n_leaves++;
+
+		return 1;
+
+	}
+
+	if (qs->n_nodes == QS_MAX_LEAVES - 1) {
+		return -1;
+	}
+
+	int k = qs->n_nodes++;
+	int first_leaf = qs->n_leaves;
+
+	int n_left = add_qs_nodes(tree, left_id, qs);
+	if (n_left < 0) {
+		return -1;
+	}
+	int n_right = add_qs_nodes(tree, right_id, qs);
+	if (n_right < 0) {
+		return -1;
+	}
+
+	// zeros for the leaves of the left subtree (n_left < QS_MAX_LEAVES)
+	qs->node_features[k] = feature;
+	qs->thresholds[k] = threshold;
+	qs->bitvectors[k] = ~(((((uint64_t) 1) << n_left) - 1) << first_leaf);
+
+	return n_left + n_right;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the output of a leaf (leaf value or leaf id)
+ * --------------------------------------------------------------------------------
+ */
+static FLOAT_TYPE get_leaf_output(TREE *tree, unsigned int node_id,
+		int prediction_type) {
+
+	if (prediction_type == PREDICTION_TYPE_LEAVES_IDS) {
+		return (FLOAT_TYPE) node_id;
+	} else if (prediction_type != PREDICTION_TYPE_NORMAL) {
+		printf("Error: Unknown prediction type: %i ", prediction_type);
+		exit(EXIT_FAILURE);
+	}
+
+	if (tree->compact != NULL) {
+		return tree->leaf_values[tree->compact[node_id].leaf_index];
+	}
+
+	return tree->root[node_id].thres_or_leaf;
+
+}
@@ -61,6 +61,33 @@ void fit_extern(FLOAT_TYPE *Xtrain,
 		PARAMETERS *params,
 		FOREST *forest);
 
+/* --------------------------------------------------------------------------------
+ * Fit forest given quantized patterns (extern); the codes are stored
+ * feature-wise (dXcodes x nXcodes bytes) and consist of code_size bytes
+ * each, thresholds[F, b] is the upper threshold of bin b for feature F
+ * --------------------------------------------------------------------------------
+ */
+void fit_binned_extern(unsigned char *Xcodes,
+		int dXcodes,
+		int nXcodes,
+		int code_size,
+		FLOAT_TYPE *thresholds,
+		int nthresholds,
+		int dthresholds,
+		int *n_bins,
+		int nn_bins,
+		FLOAT_TYPE *Ytrain,
+		int nYtrain,
+		int *bootstrap_indices,
+		int nbootstrap_indices,
+		int dbootstrap_indices,
+		int *bootstrap_indices_weights,
+		int nbootstrap_indices_weights,
+		int dbootstrap_indices_weights,
+		int use_bindices,
+		PARAMETERS *params,
+		FOREST *forest);
+
 /* --------------------------------------------------------------------------------
  * Compute predictions (extern)
  * --------------------------------------------------------------------------------
@@ -76,6 +103,25 @@ void predict_extern(FLOAT_TYPE *Xtest,
 		PARAMETERS *params,
 		FOREST *forest);
 
+/* --------------------------------------------------------------------------------
+ * Compute predictions given quantized patterns (extern)
+ * --------------------------------------------------------------------------------
+ */
+void predict_binned_extern(unsigned char *Xcodes,
+		int dXcodes,
+		int nXcodes,
+		int code_size,
+		FLOAT_TYPE *thresholds,
+		int nthresholds,
+		int dthresholds,
+		FLOAT_TYPE *predictions,
+		int npredictions,
+		int *indices,
+		int nindices,
+		int dindices,
+		PARAMETERS *params,
+		FOREST *forest);
+
 void predict_all_extern(FLOAT_TYPE *Xtest,
 		int nXtest,
 		int dXtest,
@@ -87,6 +133,62 @@ void predict_all_extern(FLOAT_TYPE *Xtest,
 		int dindices,
 		PARAMETERS *params,
 		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of all trees for faster traversals (extern)
+ * --------------------------------------------------------------------------------
+ */
+void optimize_layout_extern(FLOAT_TYPE *Xtest,
+		int nXtest,
+		int dXtest,
+		PARAMETERS *params,
+		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Computes leaf ids, counts per leaf, and the permutation grouping the
+ * patterns w.r.t. their leaves for a single tree (extern)
+ * --------------------------------------------------------------------------------
+ */
+void get_leaves_buckets_extern(FLOAT_TYPE *Xtest,
+		int nXtest,
+		int dXtest,
+		int *leaves_ids,
+		int nleaves_ids,
+		int *counts,
+		int ncounts,
+		int *perm,
+		int nperm,
+		unsigned int index,
+		PARAMETERS *params,
+		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Compute predictions for a few patterns with low latency (extern)
+ * --------------------------------------------------------------------------------
+ */
+void predict_fast_extern(FLOAT_TYPE *Xtest,
+		int nXtest,
+		int dXtest,
+		FLOAT_TYPE *predictions,
+		int npredictions,
+		PARAMETERS *params,
+		FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Compute class probabilities (extern)
+ * --------------------------------------------------------------------------------
+ */
+void predict_proba_extern(FLOAT_TYPE *Xtest,
+		int nXtest,
+		int dXtest,
+		FLOAT_TYPE *proba,
+		int nproba,
+		int dproba,
+		int *indices,
+		int nindices,
+		int dindices,
+		PARAMETERS *params,
+		FOREST *forest);
 		
 /* --------------------------------------------------------------------------------
  * Frees resources (extern)
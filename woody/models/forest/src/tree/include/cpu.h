@@ -12,6 +12,7 @@
 #include <omp.h>
 #include <stdio.h>
 #include <time.h>
+#include <string.h>
 
 #include "global.h"
 #include "util.h"
@@ -26,7 +27,17 @@
  */
 void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 		FLOAT_TYPE *Ytrain, int *bootstrap_indices, int *bootstrap_indices_weights,
-		int n_bootstrap_indices, int d_bootstrap_indices, int use_bindices, PARAMETERS *params, FOREST *forest);
+		int n_bootstrap_indices, int d_bootstrap_indices, int use_bindices,
+		BINNED_DATA *binned_input, PARAMETERS *params, FOREST *forest);
+
+/* --------------------------------------------------------------------------------
+ * Fits a single tree (training data, bootstrap indices, ...)
+ * --------------------------------------------------------------------------------
+ */
+void fit_single_tree(TREE *tree, FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
+		FLOAT_TYPE *Ytrain, int *bindices, int *bindices_weights,
+		int d_bootstrap_indices, int use_bindices, BINNED_DATA *binned,
+		PARAMETERS *params, unsigned int *rstate);
 
 /* --------------------------------------------------------------------------------
  * Builds a single tree.
@@ -35,6 +46,13 @@ void fit_forest(FLOAT_TYPE *Xtrain, int nXtrain, int dXtrain,
 void build_single_tree(TREE *tree, TRAINING_DATA *train_data,
 		PARAMETERS *params, unsigned int *rstate);
 
+/* --------------------------------------------------------------------------------
+ * Builds the subtree rooted at the given traversal record (as a new tree)
+ * --------------------------------------------------------------------------------
+ */
+void build_subtree(TREE *tree, TRAVERSAL_RECORD *root_record,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate);
+
 
 
 /* --------------------------------------------------------------------------------
@@ -44,6 +62,34 @@ void build_single_tree(TREE *tree, TRAINING_DATA *train_data,
 void process_all_nodes(TREE *tree, TRAINING_DATA *train_data, PQUEUE *huge_traversal_queue,
 		PARAMETERS *params, unsigned int *rstate);
 
+/* --------------------------------------------------------------------------------
+ * Process all nodes best-first (max_leaf_nodes)
+ * --------------------------------------------------------------------------------
+ */
+void process_all_nodes_best_first(TREE *tree, TRAINING_DATA *train_data,
+		PQUEUE *traversal_queue, PARAMETERS *params, unsigned int *rstate);
+
+/* --------------------------------------------------------------------------------
+ * Returns the weighted impurity decrease of the split of a traversal record
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE get_weighted_impurity_decrease(TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data);
+
+/* --------------------------------------------------------------------------------
+ * Maps a weighted impurity decrease to a priority for best-first growth
+ * --------------------------------------------------------------------------------
+ */
+int get_best_first_priority(FLOAT_TYPE decrease);
+
+/* --------------------------------------------------------------------------------
+ * Creates a task that builds the subtree of the given traversal record
+ * (intra-tree parallelism)
+ * --------------------------------------------------------------------------------
+ */
+SUBTREE_TASK *spawn_subtree_task(TREE *tree, TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data, PARAMETERS *params, unsigned int *rstate);
+
 
 /* --------------------------------------------------------------------------------
  * Returns a chunk of traversal records.
@@ -60,7 +106,8 @@ void generate_traversal_records_children(TREE *tree, TRAINING_DATA *train_data,
 		PARAMETERS *params, int node_id);
 
 void generate_next_leaf_node(int node_id, int start, int end, unsigned int leaf_criterion, int depth, int prio, int child_flag, TREE *tree,
-		PQUEUE *huge_traversal_queue, TRAVERSAL_RECORD *trecord, TRAINING_DATA *train_data, PARAMETERS *params);
+		PQUEUE *huge_traversal_queue, TRAVERSAL_RECORD *trecord, HIST_CACHE *hist_cache,
+		TRAINING_DATA *train_data, PARAMETERS *params);
 
 /* --------------------------------------------------------------------------------
  * Generates leaves and nodes
@@ -69,6 +116,13 @@ void generate_next_leaf_node(int node_id, int start, int end, unsigned int leaf_
 void generate_leaves_nodes(TREE *tree, TRAVERSAL_RECORD **trecords, int n_trecords,
 		TRAINING_DATA *train_data, PARAMETERS *params, PQUEUE *huge_traversal_queue);
 
+/* --------------------------------------------------------------------------------
+ * Checks if a traversal record (with computed split) yields a leaf
+ * --------------------------------------------------------------------------------
+ */
+unsigned int get_leaf_criterion(TRAVERSAL_RECORD *trecord,
+		TRAINING_DATA *train_data, PARAMETERS *params);
+
 /* --------------------------------------------------------------------------------
  * Generates a single leaf node
  * --------------------------------------------------------------------------------
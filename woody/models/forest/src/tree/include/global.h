@@ -8,6 +8,8 @@
 #include "../../include/timing.h"
 #include "../../include/float.h"
 
+#include <limits.h>
+
 #include "types.h"
 
 #define NOT_TRANSPOSED 0
@@ -27,10 +29,78 @@
 
 #define USE_BOOTSTRAP_INDICES 	1
 
+// splitters (for standard trees)
+#define SPLITTER_EXACT 	0
+#define SPLITTER_HIST 	1
+#define SPLITTER_EXACT_AOS 	2
+
+// histogram-based splitter
+#define HIST_MAX_BINS 				256
+#define HIST_BINNING_SAMPLE_SIZE 	200000
+#define HIST_SUBTRACTION_MIN_SAMPLES 	2048
+#define HIST_CACHE_MAX_BYTES 		268435456
+
+// intra-tree parallelism: minimum number of samples of a node for
+// checking its features in parallel and for building its subtree
+// via a separate task
+#define INTRA_TREE_FEATURE_MIN_SAMPLES 	4096
+#define INTRA_TREE_TASK_MIN_SAMPLES 	16384
+#define INTRA_TREE_LEVEL_CHUNKS_PER_THREAD 	4
+
 // tree traversal modes
 #define TREE_TRAVERSAL_MODE_DFS 		0
 #define TREE_TRAVERSAL_MODE_NODE_SIZE 	1
 #define TREE_TRAVERSAL_MODE_PROB 	2
+#define TREE_TRAVERSAL_MODE_LEVEL 	3
+
+// best-first growth (max_leaf_nodes): records whose split has not
+// been computed yet are popped before all others
+#define BEST_FIRST_PRIO_NOT_COMPUTED 	INT_MIN
+
+// node layouts (compact: 16 bytes per node for double and 12
+// for float, at most COMPACT_MAX_FEATURES features)
+#define NODE_LAYOUT_STANDARD 	0
+#define NODE_LAYOUT_COMPACT 	1
+#define COMPACT_MAX_FEATURES 	65536
+
+// node orders (standard layout), applied after fitting and after
+// attaching subtrees; with visit counts, the more frequently visited
+// child is placed first
+#define NODE_ORDER_NONE 	0
+#define NODE_ORDER_DFS 		1
+#define NODE_ORDER_BFS 		2
+
+// prediction: blocks of rows are passed through all trees (the rows
+// of a block should fit into PREDICTION_BLOCK_BYTES); for trees larger
+// than PREDICTION_MAX_TREE_BYTES, keeping the trees in the cache is more
+// important, hence large blocks are processed tree by tree
+#define PREDICTION_BLOCK_BYTES 		524288
+#define PREDICTION_MAX_TREE_BYTES 	131072
+#define PREDICTION_MAX_BLOCK_ROWS 	65536
+
+// prediction: minimum number of rows per block if the rows are
+// distributed over the threads (otherwise, trees are distributed, too)
+#define PREDICTION_MIN_BLOCK_ROWS 	64
+
+// tree traversal kernels for prediction (auto: avx2 for float if
+// supported by the cpu, multi-row otherwise); the multi-row kernels
+// advance several rows through a tree at once, the bitvector kernel
+// (QuickScorer) evaluates all nodes of a small tree without branches
+#define TRAVERSAL_KERNEL_AUTO 		0
+#define TRAVERSAL_KERNEL_SCALAR 	1
+#define TRAVERSAL_KERNEL_MULTI 		2
+#define TRAVERSAL_KERNEL_AVX2 		3
+#define TRAVERSAL_KERNEL_BITVECTOR 	4
+#define TRAVERSAL_MULTI_ROWS 		8
+
+// bitvector kernel (QuickScorer): trees with at most QS_MAX_LEAVES
+// leaves; the rows are processed in blocks of QS_BLOCK_ROWS rows
+#define QS_MAX_LEAVES 		64
+#define QS_BLOCK_ROWS 		64
+
+// low-latency prediction (few rows): class counts are kept on
+// the stack for up to PREDICTION_FAST_MAX_CLASSES classes
+#define PREDICTION_FAST_MAX_CLASSES 	256
 
 // criteria
 #define CRITERION_MSE 		0
@@ -48,6 +118,8 @@
 #define LEAF_CRIT_MIN_SAMPLES_LEAF 4
 #define LEAF_CRIT_MIN_IMPURITY 5
 #define LEAF_CRIT_POS_END 6
+#define LEAF_CRIT_MAX_LEAF_NODES 7
+#define LEAF_CRIT_MIN_IMPURITY_DECREASE 8
 
 // leaf stopping modes
 #define LEAF_MODE_STOP_ALL 0
@@ -83,6 +155,8 @@
 #define FREE_BINDICES cpu_free_bindices
 #define INIT_TRAINING_DATA cpu_init_training_data
 #define FREE_TRAINING_DATA cpu_free_training_data
+#define INIT_SCRATCH cpu_init_scratch
+#define FREE_SCRATCH cpu_free_scratch
 #define INIT cpu_init
 #define INIT_AFTER_FITTING cpu_init_after_fitting
 #define PREDICT cpu_predict
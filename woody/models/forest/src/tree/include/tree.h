@@ -8,7 +8,10 @@
 #ifndef FOREST_STANDARD_INCLUDE_TREE_H_
 #define FOREST_STANDARD_INCLUDE_TREE_H_
 
+#include <math.h>
+
 #include "global.h"
+#include "../../include/util.h"
 
 /* --------------------------------------------------------------------------------
  * Initializes a forest
@@ -52,6 +55,31 @@ int add_node_to_tree(TREE *tree, int parent_id, int is_left_child);
  */
 int attach_tree(TREE *tree, TREE *subtree, int leaf_id);
 
+/* --------------------------------------------------------------------------------
+ * Copies the class distributions of the leaves of an attached subtree
+ * --------------------------------------------------------------------------------
+ */
+void attach_leaf_dists(TREE *tree, TREE *subtree, int leaf_id, int start_id,
+		int n_allocated_old);
+
+/* --------------------------------------------------------------------------------
+ * Resizes the array of class distributions of a tree
+ * --------------------------------------------------------------------------------
+ */
+void resize_leaf_dists(TREE *tree, int n_rows_old, int n_rows, int n_dist);
+
+/* --------------------------------------------------------------------------------
+ * Sets the class distribution of a leaf to the one of the given label
+ * --------------------------------------------------------------------------------
+ */
+void init_leaf_dist(TREE *tree, int node_id, FLOAT_TYPE leaf_value);
+
+/* --------------------------------------------------------------------------------
+ * Returns the (zeroed) class distribution of a leaf
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE *get_leaf_dist(TREE *tree, int node_id, int n_dist);
+
 /* --------------------------------------------------------------------------------
  * Generates an internal node
  * --------------------------------------------------------------------------------
@@ -79,4 +107,53 @@ void init_internal_tree_node(TREE_NODE *node, int parent_id, int feature,
  */
 void init_tree_leaf(TREE_NODE *node, int parent_id, FLOAT_TYPE leaf_value, unsigned int leaf_criterion);
 
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of a tree (standard layout) w.r.t. the given order
+ * (counts: visit counts per node or NULL)
+ * --------------------------------------------------------------------------------
+ */
+void reorder_tree(TREE *tree, int node_order, int *counts);
+
+/* --------------------------------------------------------------------------------
+ * Converts a tree to the compact layout (the original nodes are freed)
+ * --------------------------------------------------------------------------------
+ */
+void compact_tree(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Converts a compact tree back to the standard layout
+ * --------------------------------------------------------------------------------
+ */
+void expand_tree(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Returns the nodes of a compact tree in the standard layout
+ * --------------------------------------------------------------------------------
+ */
+TREE_NODE *get_expanded_nodes(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Returns the class distributions of a compact tree per node
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE *get_expanded_leaf_dists(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Returns the number of class distributions stored for a tree
+ * --------------------------------------------------------------------------------
+ */
+int get_num_leaf_dists(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Returns number of bytes used for the nodes of a tree (nodes in use only)
+ * --------------------------------------------------------------------------------
+ */
+long get_num_bytes_tree_nodes(TREE *tree);
+
+/* --------------------------------------------------------------------------------
+ * Allocates the node arrays of a tree whose header has been restored
+ * --------------------------------------------------------------------------------
+ */
+void allocate_tree_nodes(TREE *tree);
+
 #endif /* FOREST_STANDARD_INCLUDE_TREE_H_ */
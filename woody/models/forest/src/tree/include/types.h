@@ -31,6 +31,31 @@ typedef struct parameters {
 	int patterns_transposed;
 	double lam_crit;
 	int n_subset_check;
+	int splitter;
+	int max_bins;
+
+	// best-first growth (max_leaf_nodes > 0) and minimum
+	// weighted impurity decrease for splitting a node
+	int max_leaf_nodes;
+	double min_impurity_decrease;
+
+	// node layout used after fitting (standard or compact) and
+	// order of the nodes (standard layout)
+	int node_layout;
+	int node_order;
+
+	// prediction: number of rows passed through all trees at
+	// once (0: chosen automatically)
+	int prediction_block_size;
+
+	// prediction: tree traversal kernel (see TRAVERSAL_KERNEL_*)
+	int traversal_kernel;
+
+	// classification: store the class distributions of the leaves
+	int store_leaf_dists;
+
+	// intra-tree parallelism (set automatically, see fit_forest)
+	int intra_tree_parallel;
 
 	// training
 	FLOAT_TYPE *Xtrain;
@@ -48,6 +73,25 @@ typedef struct bootstrap_indices {
 	int *indices_wmappings;
 } BINDICES;
 
+typedef struct binned_data {
+
+	int nX;
+	int dX;
+	int max_bins;
+
+	// number of bins and (upper) bin thresholds per feature
+	int *n_bins;
+	FLOAT_TYPE *thresholds;
+
+	// bin codes (stored feature-wise, i.e., transposed); either
+	// codes (unsigned char) or codes16 (unsigned short) is set
+	unsigned char *codes;
+	unsigned short *codes16;
+
+} BINNED_DATA;
+
+typedef struct scratch SCRATCH;
+
 typedef struct training_data {
 
 	FLOAT_TYPE *Xtrain;
@@ -58,6 +102,12 @@ typedef struct training_data {
 	BINDICES *bindices;
 	int n_classes;
 	FLOAT_TYPE *classes;
+	BINNED_DATA *binned;
+	long hist_cache_bytes;
+
+	// scratch arenas (one per thread in case of intra-tree parallelism)
+	SCRATCH *scratch;
+	int n_scratch;
 
 } TRAINING_DATA;
 
@@ -76,6 +126,44 @@ typedef struct split_record {
 
 } SPLIT_RECORD;
 
+typedef struct histogram HISTOGRAM;
+
+struct histogram {
+
+	int n_bins;
+	int n_classes;
+
+	// number of samples and sum of weights per bin
+	int *counts;
+	int *weights;
+
+	// needed for regression (MSE); double to avoid cancellation
+	double *sums;
+	double *sq_sums;
+
+	// needed for classification (GINI): n_bins x n_classes
+	int *class_weights;
+
+};
+
+typedef struct histogram_cache {
+
+	// histograms of the parent node (per feature); they are turned
+	// into the ones of the larger child by subtracting the smaller one
+	HISTOGRAM **hists;
+	int *hists_derived;
+
+	// histograms of the smaller child (if computed by the larger one)
+	HISTOGRAM **sibling_hists;
+
+	int n_features;
+	int start_smaller;
+	int end_smaller;
+	int smaller_pending;
+	int larger_pending;
+
+} HIST_CACHE;
+
 typedef struct traversal_record {
 
 	int start;
@@ -90,6 +178,14 @@ typedef struct traversal_record {
 
 	SPLIT_RECORD *split_record;
 
+	// histogram-based splitter: own histograms and the ones of the parent
+	HISTOGRAM **histograms;
+	HIST_CACHE *hist_cache;
+	int is_smaller_child;
+
+	// best-first growth: split has already been computed
+	int split_computed;
+
 } TRAVERSAL_RECORD;
 
 typedef struct tree_node {
@@ -102,14 +198,53 @@ typedef struct tree_node {
 
 } TREE_NODE;
 
+typedef struct compact_tree_node {
+
+	// nodes are stored in depth-first order, i.e., the left child
+	// of an internal node follows the node itself; right_offset is
+	// the distance to the right child (0 for leaves); the threshold
+	// has the precision of the forest (the leaves only need the
+	// index of their value)
+	union {
+		FLOAT_TYPE threshold;
+		unsigned int leaf_index;
+	};
+	unsigned int right_offset;
+	unsigned short feature;
+	unsigned short leaf_criterion;
+
+} COMPACT_TREE_NODE;
+
 typedef struct tree {
 
 	TREE_NODE *root;
 	int n_allocated;
 	int node_counter;
 
+	// compact layout (root is NULL in this case); the leaf
+	// values are stored separately
+	COMPACT_TREE_NODE *compact;
+	FLOAT_TYPE *leaf_values;
+	int n_leaves;
+
+	// class distributions of the leaves (optional); n_dist values
+	// (one per original class label) per node (standard layout) or
+	// per leaf (compact layout)
+	FLOAT_TYPE *leaf_dists;
+	int n_dist;
+
 } TREE;
 
+typedef struct subtree_task {
+
+	// subtree built by a separate task and the placeholder
+	// leaf it replaces afterwards (intra-tree parallelism)
+	TREE tree;
+	int leaf_id;
+	unsigned int rstate;
+
+} SUBTREE_TASK;
+
 typedef struct forest {
 
 	TREE *trees;
@@ -150,4 +285,28 @@ struct criterion_record {
 
 };
 
+struct scratch {
+
+	// buffers sized once for the root node (reused for all nodes);
+	// they are allocated on first use
+	int allocated;
+	int n_samples;
+	int use_aos;
+	int use_aos_copy;
+	int use_soa;
+	PATTERN_LABEL_WEIGHT *XF_Y_W;
+	PATTERN_LABEL_WEIGHT *XF_Y_W_copy;
+	FLOAT_TYPE *XF;
+	int *samples;
+
+	// class counts (classification only)
+	int n_classes;
+	int *class_counts_left;
+	int *class_counts_right;
+
+	CRITERION_RECORD criterion_record;
+	SPLIT_RECORD split_record;
+
+};
+
 #endif /* ENSEMBLE_INCLUDE_TYPES_H_ */
@@ -165,6 +165,12 @@ void copy_split_record(SPLIT_RECORD *src, SPLIT_RECORD *dest);
  */
 SPLIT_RECORD *init_split_record(void);
 
+/* --------------------------------------------------------------------------------
+ * Resets a split record (no split found so far)
+ * --------------------------------------------------------------------------------
+ */
+void reset_split_record(SPLIT_RECORD *split);
+
 /* --------------------------------------------------------------------------------
  * Frees memory for split record
  * --------------------------------------------------------------------------------
@@ -52,6 +52,11 @@ inline void init_tree(TREE *tree, int n_allocated) {
 	tree->n_allocated = n_allocated;
 	tree->node_counter = 0;
 	tree->root = (TREE_NODE*) malloc(tree->n_allocated * sizeof(TREE_NODE));
+	tree->compact = NULL;
+	tree->leaf_values = NULL;
+	tree->n_leaves = 0;
+	tree->leaf_dists = NULL;
+	tree->n_dist = 0;
 
 }
 
@@ -62,6 +67,9 @@ inline void init_tree(TREE *tree, int n_allocated) {
 inline void free_tree(TREE *tree) {
 
 	free(tree->root);
+	free(tree->compact);
+	free(tree->leaf_values);
+	free(tree->leaf_dists);
 
 }
 
@@ -94,6 +102,9 @@ int add_node_to_tree(TREE *tree, int parent_id, int is_left_child) {
 		tree->n_allocated *= 2;
 		tree->root = (TREE_NODE*) realloc(tree->root,
 				tree->n_allocated * sizeof(TREE_NODE));
+		if (tree->leaf_dists != NULL) {
+			resize_leaf_dists(tree, node_id, tree->n_allocated, tree->n_dist);
+		}
 	}
 
 	// set parent's ids accordingly
@@ -129,6 +140,7 @@ int attach_tree(TREE *tree, TREE *subtree, int leaf_id) {
 
 	int start_id = tree->node_counter;
 	int subtree_size = subtree->node_counter;
+	int n_allocated_old = tree->n_allocated;
 
 	// we replace node leaf_id with the root of the
 	// subtree, hence, we need one node less ...
@@ -172,10 +184,122 @@ int attach_tree(TREE *tree, TREE *subtree, int leaf_id) {
 	// increment overall counter
 	tree->node_counter += subtree_size - 1;
 
+	if (tree->leaf_dists != NULL || subtree->leaf_dists != NULL) {
+		attach_leaf_dists(tree, subtree, leaf_id, start_id, n_allocated_old);
+	}
+
 	return 0;
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Copies the class distributions of the leaves of an attached subtree
+ * (standard layout); leaves without distributions get the one of their
+ * label
+ * --------------------------------------------------------------------------------
+ */
+void attach_leaf_dists(TREE *tree, TREE *subtree, int leaf_id, int start_id,
+		int n_allocated_old) {
+
+	int i, node_id;
+
+	int had_dists = (tree->leaf_dists != NULL);
+	int n_dist = max(tree->n_dist, subtree->n_dist);
+
+	// width needed for the labels of leaves without distributions
+	for (i = 0; i < tree->node_counter; i++) {
+		if (tree->root[i].left_id == TREE_CHILD_ID_NOT_SET
+				&& (!had_dists || (i >= start_id && subtree->leaf_dists == NULL))) {
+			n_dist = max(n_dist, ((int) tree->root[i].thres_or_leaf) + 1);
+		}
+	}
+
+	resize_leaf_dists(tree, had_dists ? n_allocated_old : 0, tree->n_allocated, n_dist);
+
+	if (!had_dists) {
+		for (i = 0; i < start_id; i++) {
+			if (tree->root[i].left_id == TREE_CHILD_ID_NOT_SET) {
+				init_leaf_dist(tree, i, tree->root[i].thres_or_leaf);
+			}
+		}
+	}
+
+	// node i of the subtree is node start_id + i - 1 (root: leaf_id)
+	for (i = 0; i < subtree->node_counter; i++) {
+
+		node_id = (i == 0) ? leaf_id : start_id + i - 1;
+
+		if (subtree->leaf_dists != NULL) {
+			memset(tree->leaf_dists + node_id * tree->n_dist, 0,
+					tree->n_dist * sizeof(FLOAT_TYPE));
+			memcpy(tree->leaf_dists + node_id * tree->n_dist,
+					subtree->leaf_dists + i * subtree->n_dist,
+					subtree->n_dist * sizeof(FLOAT_TYPE));
+		} else if (tree->root[node_id].left_id == TREE_CHILD_ID_NOT_SET) {
+			init_leaf_dist(tree, node_id, tree->root[node_id].thres_or_leaf);
+		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Resizes the array of class distributions of a tree (n_rows_old rows are
+ * kept, new entries are set to zero)
+ * --------------------------------------------------------------------------------
+ */
+void resize_leaf_dists(TREE *tree, int n_rows_old, int n_rows, int n_dist) {
+
+	int i;
+
+	FLOAT_TYPE *leaf_dists = (FLOAT_TYPE*) calloc(n_rows * n_dist, sizeof(FLOAT_TYPE));
+
+	for (i = 0; i < min(n_rows_old, n_rows); i++) {
+		memcpy(leaf_dists + i * n_dist, tree->leaf_dists + i * tree->n_dist,
+				tree->n_dist * sizeof(FLOAT_TYPE));
+	}
+
+	free(tree->leaf_dists);
+	tree->leaf_dists = leaf_dists;
+	tree->n_dist = n_dist;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Sets the class distribution of a leaf (standard layout) to the one of
+ * the given label
+ * --------------------------------------------------------------------------------
+ */
+void init_leaf_dist(TREE *tree, int node_id, FLOAT_TYPE leaf_value) {
+
+	FLOAT_TYPE *dist = tree->leaf_dists + node_id * tree->n_dist;
+
+	memset(dist, 0, tree->n_dist * sizeof(FLOAT_TYPE));
+	dist[(int) leaf_value] = 1.0;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the class distribution of a leaf (standard layout) with all
+ * entries set to zero; the array of distributions is (re-)allocated if
+ * less than n_dist entries are stored per node
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE *get_leaf_dist(TREE *tree, int node_id, int n_dist) {
+
+	if (tree->leaf_dists == NULL) {
+		resize_leaf_dists(tree, 0, tree->n_allocated, n_dist);
+	} else if (n_dist > tree->n_dist) {
+		resize_leaf_dists(tree, tree->n_allocated, tree->n_allocated, n_dist);
+	}
+
+	FLOAT_TYPE *dist = tree->leaf_dists + node_id * tree->n_dist;
+	memset(dist, 0, tree->n_dist * sizeof(FLOAT_TYPE));
+
+	return dist;
+
+}
+
 /* --------------------------------------------------------------------------------
  * Generates an internal node
  * --------------------------------------------------------------------------------
@@ -239,3 +363,348 @@ void init_tree_leaf(TREE_NODE *node, int parent_id, FLOAT_TYPE leaf_value,
 	node->leaf_criterion = leaf_criterion;
 
 }
+
+/* --------------------------------------------------------------------------------
+ * Converts a tree to the compact layout (nodes in depth-first order with
+ * implicit left children and separate leaf values); the original nodes are
+ * freed
+ * --------------------------------------------------------------------------------
+ */
+void compact_tree(TREE *tree) {
+
+	int i;
+	int pos = 0;
+	int n_stack = 0;
+
+	if (tree->compact != NULL) {
+		return;
+	}
+
+	tree->n_leaves = 0;
+	for (i = 0; i < tree->node_counter; i++) {
+		if (tree->root[i].left_id == TREE_CHILD_ID_NOT_SET) {
+			tree->n_leaves++;
+		}
+	}
+
+	tree->compact = (COMPACT_TREE_NODE*) malloc(tree->node_counter * sizeof(COMPACT_TREE_NODE));
+	tree->leaf_values = (FLOAT_TYPE*) malloc(tree->n_leaves * sizeof(FLOAT_TYPE));
+
+	// class distributions are stored per leaf
+	FLOAT_TYPE *leaf_dists = NULL;
+	if (tree->leaf_dists != NULL) {
+		leaf_dists = (FLOAT_TYPE*) malloc(tree->n_leaves * tree->n_dist * sizeof(FLOAT_TYPE));
+	}
+
+	// stack of (node id, position of the parent if node is a right child)
+	int *stack = (int*) malloc(2 * tree->node_counter * sizeof(int));
+	int leaf_index = 0;
+
+	stack[0] = TREE_ROOT_ID;
+	stack[1] = -1;
+	n_stack = 1;
+
+	while (n_stack > 0) {
+
+		n_stack--;
+		TREE_NODE *node = tree->root + stack[2 * n_stack];
+		int parent_pos = stack[2 * n_stack + 1];
+		COMPACT_TREE_NODE *cnode = tree->compact + pos;
+
+		if (parent_pos >= 0) {
+			tree->compact[parent_pos].right_offset = pos - parent_pos;
+		}
+
+		cnode->leaf_criterion = (unsigned short) node->leaf_criterion;
+
+		if (node->left_id == TREE_CHILD_ID_NOT_SET) {
+
+			cnode->right_offset = 0;
+			cnode->feature = 0;
+			cnode->leaf_index = leaf_index;
+			if (leaf_dists != NULL) {
+				memcpy(leaf_dists + leaf_index * tree->n_dist,
+						tree->leaf_dists + stack[2 * n_stack] * tree->n_dist,
+						tree->n_dist * sizeof(FLOAT_TYPE));
+			}
+			tree->leaf_values[leaf_index++] = node->thres_or_leaf;
+
+		} else {
+
+			cnode->threshold = node->thres_or_leaf;
+			cnode->feature = (unsigned short) node->feature;
+
+			// left child is processed next
+			stack[2 * n_stack] = node->right_id;
+			stack[2 * n_stack + 1] = pos;
+			stack[2 * n_stack + 2] = node->left_id;
+			stack[2 * n_stack + 3] = -1;
+			n_stack += 2;
+
+		}
+
+		pos++;
+
+	}
+
+	free(stack);
+	free(tree->root);
+	tree->root = NULL;
+	tree->n_allocated = 0;
+	free(tree->leaf_dists);
+	tree->leaf_dists = leaf_dists;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Renumbers the nodes of a tree (standard layout) w.r.t. the given order
+ * (depth-first or breadth-first) such that nodes visited one after the
+ * other are close in memory; if visit counts are given, the child visited
+ * more often is placed first (next to its parent for depth-first order).
+ * The root keeps id 0, all other node ids change.
+ * --------------------------------------------------------------------------------
+ */
+void reorder_tree(TREE *tree, int node_order, int *counts) {
+
+	int i;
+
+	if (node_order == NODE_ORDER_NONE || tree->compact != NULL
+			|| tree->node_counter <= 1) {
+		return;
+	}
+
+	if (node_order != NODE_ORDER_DFS && node_order != NODE_ORDER_BFS) {
+		printf("Error: Unknown node order: %i\n", node_order);
+		exit(EXIT_FAILURE);
+	}
+
+	// order[new id] = old id
+	int *order = (int*) malloc(tree->node_counter * sizeof(int));
+	int *new_ids = (int*) malloc(tree->node_counter * sizeof(int));
+	int n_ordered = 0;
+
+	// breadth-first: order is the queue; depth-first: stack
+	int *stack = (int*) malloc(tree->node_counter * sizeof(int));
+	int n_stack = 0;
+	int head = 0;
+
+	if (node_order == NODE_ORDER_BFS) {
+		order[n_ordered++] = TREE_ROOT_ID;
+	} else {
+		stack[n_stack++] = TREE_ROOT_ID;
+	}
+
+	while ((node_order == NODE_ORDER_BFS) ? (head < n_ordered) : (n_stack > 0)) {
+
+		int node_id;
+		if (node_order == NODE_ORDER_BFS) {
+			node_id = order[head++];
+		} else {
+			node_id = stack[--n_stack];
+			order[n_ordered++] = node_id;
+		}
+
+		TREE_NODE *node = tree->root + node_id;
+		if (node->left_id == TREE_CHILD_ID_NOT_SET) {
+			continue;
+		}
+
+		int first = node->left_id;
+		int second = node->right_id;
+		if (counts != NULL && counts[second] > counts[first]) {
+			first = node->right_id;
+			second = node->left_id;
+		}
+
+		if (node_order == NODE_ORDER_BFS) {
+			order[n_ordered++] = first;
+			order[n_ordered++] = second;
+		} else {
+			stack[n_stack++] = second;
+			stack[n_stack++] = first;
+		}
+
+	}
+
+	for (i = 0; i < n_ordered; i++) {
+		new_ids[order[i]] = i;
+	}
+
+	TREE_NODE *nodes = (TREE_NODE*) malloc(tree->n_allocated * sizeof(TREE_NODE));
+	for (i = 0; i < n_ordered; i++) {
+		nodes[i] = tree->root[order[i]];
+		if (nodes[i].left_id != TREE_CHILD_ID_NOT_SET) {
+			nodes[i].left_id = new_ids[nodes[i].left_id];
+			nodes[i].right_id = new_ids[nodes[i].right_id];
+		}
+	}
+	free(tree->root);
+	tree->root = nodes;
+
+	if (tree->leaf_dists != NULL) {
+		FLOAT_TYPE *leaf_dists = (FLOAT_TYPE*) calloc(tree->n_allocated * tree->n_dist, sizeof(FLOAT_TYPE));
+		for (i = 0; i < n_ordered; i++) {
+			memcpy(leaf_dists + i * tree->n_dist, tree->leaf_dists + order[i] * tree->n_dist,
+					tree->n_dist * sizeof(FLOAT_TYPE));
+		}
+		free(tree->leaf_dists);
+		tree->leaf_dists = leaf_dists;
+	}
+
+	// unreachable nodes (if any) are removed
+	tree->node_counter = n_ordered;
+
+	free(order);
+	free(new_ids);
+	free(stack);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Converts a compact tree back to the standard layout (node ids are kept)
+ * --------------------------------------------------------------------------------
+ */
+void expand_tree(TREE *tree) {
+
+	if (tree->compact == NULL) {
+		return;
+	}
+
+	FLOAT_TYPE *leaf_dists = get_expanded_leaf_dists(tree);
+	free(tree->leaf_dists);
+	tree->leaf_dists = leaf_dists;
+
+	tree->root = get_expanded_nodes(tree);
+	tree->n_allocated = tree->node_counter;
+
+	free(tree->compact);
+	free(tree->leaf_values);
+	tree->compact = NULL;
+	tree->leaf_values = NULL;
+	tree->n_leaves = 0;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the nodes of a compact tree in the standard layout (newly
+ * allocated, node ids are kept)
+ * --------------------------------------------------------------------------------
+ */
+TREE_NODE *get_expanded_nodes(TREE *tree) {
+
+	int i;
+
+	TREE_NODE *nodes = (TREE_NODE*) malloc(tree->node_counter * sizeof(TREE_NODE));
+
+	for (i = 0; i < tree->node_counter; i++) {
+
+		COMPACT_TREE_NODE *cnode = tree->compact + i;
+		TREE_NODE *node = nodes + i;
+
+		node->leaf_criterion = cnode->leaf_criterion;
+
+		if (cnode->right_offset == 0) {
+			node->left_id = TREE_CHILD_ID_NOT_SET;
+			node->right_id = TREE_CHILD_ID_NOT_SET;
+			node->feature = 0;
+			node->thres_or_leaf = tree->leaf_values[cnode->leaf_index];
+		} else {
+			node->left_id = i + 1;
+			node->right_id = i + cnode->right_offset;
+			node->feature = cnode->feature;
+			node->thres_or_leaf = cnode->threshold;
+		}
+
+	}
+
+	return nodes;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the class distributions of a compact tree per node (newly
+ * allocated, NULL if no distributions are stored)
+ * --------------------------------------------------------------------------------
+ */
+FLOAT_TYPE *get_expanded_leaf_dists(TREE *tree) {
+
+	int i;
+
+	if (tree->leaf_dists == NULL) {
+		return NULL;
+	}
+
+	FLOAT_TYPE *leaf_dists = (FLOAT_TYPE*) calloc(tree->node_counter * tree->n_dist,
+			sizeof(FLOAT_TYPE));
+
+	for (i = 0; i < tree->node_counter; i++) {
+		COMPACT_TREE_NODE *cnode = tree->compact + i;
+		if (cnode->right_offset == 0) {
+			memcpy(leaf_dists + i * tree->n_dist,
+					tree->leaf_dists + cnode->leaf_index * tree->n_dist,
+					tree->n_dist * sizeof(FLOAT_TYPE));
+		}
+	}
+
+	return leaf_dists;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns the number of class distributions stored for a tree (one per
+ * node in use or one per leaf for the compact layout)
+ * --------------------------------------------------------------------------------
+ */
+int get_num_leaf_dists(TREE *tree) {
+
+	if (tree->leaf_dists == NULL) {
+		return 0;
+	}
+
+	return (tree->compact != NULL) ? tree->n_leaves : tree->node_counter;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Returns number of bytes used for the nodes of a tree (nodes in use only)
+ * --------------------------------------------------------------------------------
+ */
+long get_num_bytes_tree_nodes(TREE *tree) {
+
+	long n_bytes = get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE);
+
+	if (tree->compact != NULL) {
+		return n_bytes + tree->node_counter * sizeof(COMPACT_TREE_NODE)
+				+ tree->n_leaves * sizeof(FLOAT_TYPE);
+	}
+
+	return n_bytes + tree->node_counter * sizeof(TREE_NODE);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Allocates the node arrays of a tree whose header has been restored
+ * --------------------------------------------------------------------------------
+ */
+void allocate_tree_nodes(TREE *tree) {
+
+	if (tree->compact != NULL) {
+		tree->root = NULL;
+		tree->n_allocated = 0;
+		tree->compact = (COMPACT_TREE_NODE*) malloc(
+				tree->node_counter * sizeof(COMPACT_TREE_NODE));
+		tree->leaf_values = (FLOAT_TYPE*) malloc(
+				tree->n_leaves * sizeof(FLOAT_TYPE));
+	} else {
+		tree->n_allocated = tree->node_counter;
+		tree->root = (TREE_NODE*) malloc(
+				tree->n_allocated * sizeof(TREE_NODE));
+		tree->leaf_values = NULL;
+	}
+
+	if (tree->leaf_dists != NULL) {
+		tree->leaf_dists = (FLOAT_TYPE*) malloc(
+				get_num_leaf_dists(tree) * tree->n_dist * sizeof(FLOAT_TYPE));
+	}
+
+}
@@ -27,6 +27,16 @@ void set_default_parameters(PARAMETERS *params) {
 	params->prediction_type = PREDICTION_TYPE_NORMAL;
 	params->n_subset_check = -1;
 	params->patterns_transposed = TRANSPOSED;
+	params->splitter = SPLITTER_EXACT;
+	params->max_bins = HIST_MAX_BINS;
+	params->max_leaf_nodes = -1;
+	params->min_impurity_decrease = 0.0;
+	params->node_layout = NODE_LAYOUT_STANDARD;
+	params->node_order = NODE_ORDER_DFS;
+	params->prediction_block_size = 0;
+	params->traversal_kernel = TRAVERSAL_KERNEL_AUTO;
+	params->store_leaf_dists = 0;
+	params->intra_tree_parallel = 0;
 
 }
 
@@ -358,6 +368,10 @@ TRAVERSAL_RECORD *init_traversal_record(int start, int end, int dim, int depth,
 	trecord->is_leaf = is_leaf;
 	trecord->const_features = allocate_initial_mem_const_features(dim);
 	trecord->split_record = (SPLIT_RECORD*) malloc(sizeof(SPLIT_RECORD));
+	trecord->histograms = NULL;
+	trecord->hist_cache = NULL;
+	trecord->is_smaller_child = 0;
+	trecord->split_computed = 0;
 
 	return trecord;
 
@@ -401,6 +415,17 @@ void copy_split_record(SPLIT_RECORD *src, SPLIT_RECORD *dest) {
 SPLIT_RECORD *init_split_record() {
 
 	SPLIT_RECORD *split = (SPLIT_RECORD*) malloc(sizeof(SPLIT_RECORD));
+	reset_split_record(split);
+
+	return split;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Resets a split record (no split found so far)
+ * --------------------------------------------------------------------------------
+ */
+void reset_split_record(SPLIT_RECORD *split) {
 
 	split->impurity = MAX_FLOAT_TYPE;
 	split->impurity_left = MAX_FLOAT_TYPE;
@@ -412,8 +437,6 @@ SPLIT_RECORD *init_split_record() {
 	split->prob_left = 0.0;
 	split->prob_right = 0.0;
 
-	return split;
-
 }
 
 /* --------------------------------------------------------------------------------
@@ -437,6 +460,8 @@ void flat_copy_train_data(TRAINING_DATA *src, TRAINING_DATA *dest) {
 	dest->dXtrain = src->dXtrain;
 	dest->Ytrain_mapped = src->Ytrain_mapped;
 	dest->bindices = src->bindices;
+	dest->scratch = src->scratch;
+	dest->n_scratch = src->n_scratch;
 
 }
 
@@ -18,6 +18,11 @@
 %apply (float* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* Xtest, int nXtest, int dXtest)}
 %apply (float* INPLACE_ARRAY1, int DIM1) {(FLOAT_TYPE *predictions, int npredictions)}
 %apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* preds, int npreds, int dpreds)}
+%apply (float* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* proba, int nproba, int dproba)}
+
+%apply (unsigned char* INPLACE_ARRAY2, int DIM1, int DIM2) {(unsigned char *Xcodes, int dXcodes, int nXcodes)}
+%apply (float* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE *thresholds, int nthresholds, int dthresholds)}
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *n_bins, int nn_bins)}
 
 %apply (int* INPLACE_ARRAY2, int DIM1, int DIM2) {(int *bootstrap_indices, int nbootstrap_indices, int dbootstrap_indices)}
 %apply (int* INPLACE_ARRAY2, int DIM1, int DIM2) {(int *bootstrap_indices_weights, int nbootstrap_indices_weights, int dbootstrap_indices_weights)}
@@ -26,5 +31,9 @@
 
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *aforest, int naforest)}
 
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *leaves_ids, int nleaves_ids)}
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *counts, int ncounts)}
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *perm, int nperm)}
+
 %include "base.h"      
 %include "types.h"  
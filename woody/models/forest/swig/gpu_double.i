@@ -18,6 +18,7 @@
 %apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* Xtest, int nXtest, int dXtest)}
 %apply (double* INPLACE_ARRAY1, int DIM1) {(FLOAT_TYPE *predictions, int npredictions)}
 %apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* preds, int npreds, int dpreds)}
+%apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE* proba, int nproba, int dproba)}
 
 %apply (int* INPLACE_ARRAY2, int DIM1, int DIM2) {(int *bootstrap_indices, int nbootstrap_indices, int dbootstrap_indices)}
 %apply (int* INPLACE_ARRAY2, int DIM1, int DIM2) {(int *bootstrap_indices_weights, int nbootstrap_indices_weights, int dbootstrap_indices_weights)}
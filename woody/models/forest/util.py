@@ -5,15 +5,28 @@
 
 import numpy
 
-def ensure_data_types(X, y, numpy_dtype_float):
+def ensure_data_types(X, y, numpy_dtype_float, order="K"):
     
-    # ensure floats everywhere (e.g., for split array computations)
+    # ensure floats everywhere (e.g., for split array computations);
+    # the memory layout of a converted X is given by order
     if X.dtype != numpy_dtype_float:
-        X = X.astype(numpy_dtype_float)
+        X = X.astype(numpy_dtype_float, order=order)
     if y.dtype != numpy_dtype_float:
         y = y.astype(numpy_dtype_float)    
     
     return X, y  
+
+def pad_probas(probas):
+    """ Pads class probabilities (arrays of shape 
+    (n, n_classes)) with zero columns such that all 
+    of them have the same number of columns (models 
+    fitted on subsets might not have seen the largest 
+    class labels).
+    """
+    
+    n_classes = max([p.shape[1] for p in probas])
+    
+    return [numpy.pad(p, ((0, 0), (0, n_classes - p.shape[1])), mode="constant") for p in probas]
     
 class PickableWoodyRFWrapper(object):
     """
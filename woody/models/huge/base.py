@@ -10,11 +10,13 @@ import numpy
 import random
 
 from time import gmtime, strftime
-from woody.util import makedirs, Timer, perform_task_in_parallel, start_via_single_process
+from woody.util import makedirs, Timer, create_pool, perform_pipeline, start_via_single_process
 from woody.io import DiskStore, MemoryStore
 
 from .predict import predict_array
-from .fit import instantiate_single_tree_instance, fit_all_attached_bottom_trees, distribute_all_patterns
+from .fit import instantiate_single_tree_instance, fit_tree_instance, fit_all_attached_bottom_trees, distribute_all_patterns
+from .fit import init_resident_toptrees, get_leaf_buckets_resident, get_leaf_buckets, store_leaf_buckets
+from .util import get_XY_subsets_from_store, get_bucket_megabytes
 
 from ..base import BaseEstimator
 from .. import Wood
@@ -33,9 +35,16 @@ class HugeWood(BaseEstimator):
     TKEY_DISTR_PATTS = 3
     TKEY_SANITY_CHECK_LEAVES = 4
     TKEY_BOTTOM_TREES = 5
+    TKEY_DISTR_READ = 6
+    TKEY_DISTR_EVAL = 7
+    TKEY_DISTR_WRITE = 8
     
     MAX_RAND_INT = 10000000
     
+    # maximum number of chunks waiting to be distributed
+    # (and of distributed chunks waiting to be stored)
+    DISTR_MAX_QUEUED = 2
+    
     def __init__(self,
                  n_top="auto",
                  n_patterns_leaf="auto",
@@ -235,6 +244,10 @@ class HugeWood(BaseEstimator):
         times['top'] = self._timers[self.TKEY_TOP_TREE].get_elapsed_time()
         times['distribute'] = self._timers[self.TKEY_DISTR_PATTS].get_elapsed_time()
         times['bottom'] = self._timers[self.TKEY_BOTTOM_TREES].get_elapsed_time()
+        times['heavy'] = self._timers[self.TKEY_SANITY_CHECK_LEAVES].get_elapsed_time()
+        times['distribute_read'] = self._timers[self.TKEY_DISTR_READ].get_elapsed_time()
+        times['distribute_eval'] = self._timers[self.TKEY_DISTR_EVAL].get_elapsed_time()
+        times['distribute_write'] = self._timers[self.TKEY_DISTR_WRITE].get_elapsed_time()
         
         return times
     
@@ -285,35 +298,66 @@ class HugeWood(BaseEstimator):
         for b in xrange(self.n_estimators):
             toptrees_node_stats[b] = {}
         
-        while True:
-            
-            # process all chunks only no data are left
+        # the top trees are loaded only once (per worker) and
+        # are used for all chunks
+        odirs = [os.path.join(self.odir, str(b)) for b in xrange(self.n_estimators)]
+        
+        # FIXME: This does not work with memory stores!
+        if isinstance(self.store, DiskStore): 
+            n_workers = max(1, min(self.n_jobs, self.n_estimators))
+            self._logger.debug("Loading top trees in %i workers ..." % n_workers)
+            pool = create_pool(n_workers, backend="multiprocessing", initializer=init_resident_toptrees, initargs=(self.store, odirs))
+        else:
+            pool = None
+            toptrees = [self.store.load(os.path.join(odir, "toptree.tree"), Wood) for odir in odirs]
+        
+        def read():
             
+            # process all chunks until no data are left
             try:
                 self._logger.debug("Loading chunk of data from store (%i elements) ..." % generator.chunksize)
                 X_chunk, y_chunk = self._get_next_chunk(generator)
                 labels = sorted(set(list(y_chunk)))
                 self._logger.info("Labels=%s" % str(labels))
             except:
-                break
+                return None
             
-            if len(y_chunk) > 0:        
-                
-                params_parallel = [] 
-                for b in xrange(self.n_estimators):
-                    
-                    self._logger.debug("\tDistributing patterns for estimator %i ..." % b)
-                    odir = os.path.join(self.odir, str(b))
-                    toptree = self.store.load(os.path.join(odir, "toptree.tree"), Wood)
-                    args = [X_chunk, y_chunk, toptree, odir, self.store, None, None] #, toptrees_node_stats[b], self._logger
-                    params_parallel.append(args)
-
-                # FIXME: This does not work with memory stores!
-                if type(self.store) == DiskStore: 
-                    perform_task_in_parallel(distribute_all_patterns, params_parallel, n_jobs=self.n_jobs, backend="multiprocessing")
-                else:
-                    for param in params_parallel:
-                        distribute_all_patterns(param)
+            return X_chunk, y_chunk
+            
+        def evaluate(chunk):
+            
+            X_chunk, y_chunk = chunk
+            if len(y_chunk) == 0:
+                return []
+            
+            self._logger.debug("\tDistributing patterns for all estimators ...")
+            if pool is not None:
+                return pool.map(get_leaf_buckets_resident, [[X_chunk, y_chunk, odir] for odir in odirs])
+            else:
+                return [get_leaf_buckets(toptrees[b], X_chunk, y_chunk) for b in xrange(self.n_estimators)]
+            
+        def write(all_buckets):
+            
+            for b in xrange(len(all_buckets)):
+                store_leaf_buckets(self.store, odirs[b], all_buckets[b])
+        
+        # reading chunk k+1 and storing the buckets of chunk k-1 
+        # overlap with the distribution of chunk k
+        timers = [self._timers[self.TKEY_DISTR_READ], self._timers[self.TKEY_DISTR_EVAL], self._timers[self.TKEY_DISTR_WRITE]]
+        
+        try:
+            perform_pipeline(read, evaluate, write, max_queued=self.DISTR_MAX_QUEUED, timers=timers)
+        except:
+            if pool is not None:
+                pool.terminate()
+            raise
+        
+        if pool is not None:
+            pool.close()
+            pool.join()
+        
+        # write the buckets still buffered (see BufferedDiskStore)
+        self.store.close()
         
         if "top" in self.plot_intermediate.keys():
             for b in xrange(self.n_estimators):
@@ -334,10 +378,9 @@ class HugeWood(BaseEstimator):
             # in case a pure leaf gets filled and also contains very few
             # patterns from other classes (in this case, one still needs to 
             # build a tree but with a potentially quite large number of patterns
-            #toptree = Wood.load(os.path.join(odir, "toptree.tree"))
-            #self._timers[self.TKEY_SANITY_CHECK_LEAVES].start()
-            #self._handle_heavy_leaves(toptree, odir, generator, b)
-            #self._timers[self.TKEY_SANITY_CHECK_LEAVES].stop()
+            self._timers[self.TKEY_SANITY_CHECK_LEAVES].start()
+            self._handle_heavy_leaves(odir, b)
+            self._timers[self.TKEY_SANITY_CHECK_LEAVES].stop()
                                 
             # (4) build bottom trees for each subset
             
@@ -391,6 +434,9 @@ class HugeWood(BaseEstimator):
         self._logger.debug("(I)\tRetrieving subsets: \t\t\t%.3f (s)\t[%2.2f %%]" % (self._timers[self.TKEY_TOP_SUBSETS].get_elapsed_time(), percent_retrieve))
         self._logger.debug("(II)\tTop tree constructions: \t\t%.3f (s)\t[%2.2f %%]" % (self._timers[self.TKEY_TOP_TREE].get_elapsed_time(), percent_top))
         self._logger.debug("(III)\tDistributing to top tree leaves: \t%.3f (s)\t[%2.2f %%]" % (self._timers[self.TKEY_DISTR_PATTS].get_elapsed_time(), percent_distribute))
+        self._logger.debug("\t- Reading chunks (overlapping): \t%.3f (s)" % self._timers[self.TKEY_DISTR_READ].get_elapsed_time())
+        self._logger.debug("\t- Evaluating top trees (overlapping): \t%.3f (s)" % self._timers[self.TKEY_DISTR_EVAL].get_elapsed_time())
+        self._logger.debug("\t- Storing leaf buckets (overlapping): \t%.3f (s)" % self._timers[self.TKEY_DISTR_WRITE].get_elapsed_time())
         self._logger.debug("(IV)\tBottom trees constructions: \t\t%.3f (s)\t[%2.2f %%]" % (self._timers[self.TKEY_BOTTOM_TREES].get_elapsed_time(), percent_bottom))
         self._logger.debug("\t\t\t\t\t\t\t%.3f (s)\t[%2.2f %%]" % (self._timers[self.TKEY_ALL_FIT].get_elapsed_time(), 100))
         self._logger.debug("------------------------------------------------------------------------------")
@@ -429,10 +475,24 @@ class HugeWood(BaseEstimator):
                                                          typ="top")
     
         self._logger.debug("Fitting top tree ...")
-        toptree.fit(Xtop, ytop)
+        toptree = self._fit_tree_instance(toptree, Xtop, ytop)
         
         return toptree            
     
+    def _fit_tree_instance(self, tree, X, y):
+        """ Fits a top tree (or a subtree for a heavy leaf) using
+        the threads of the wrapped instance. For disk stores, 
+        processes are forked afterwards, which block if OpenMP 
+        threads were started in this process before; hence, the 
+        tree is fitted in a new process in this case (and only 
+        uses a single thread in this process afterwards).
+        """
+        
+        if isinstance(self.store, DiskStore):
+            return start_via_single_process(fit_tree_instance, [tree, X, y], {'n_jobs_eval': 1})
+        
+        return fit_tree_instance(tree, X, y)
+    
     def _get_next_chunk(self, generator):
         """
         """
@@ -451,68 +511,106 @@ class HugeWood(BaseEstimator):
             
         return a      
     
-#     def _reduce_heavy_leaf(self, fname_store, leaf_id, toptree):
-#         
-#         self._logger.warning("Fitting tree for big leaf with leaf_id %i ..." % leaf_id)
-#         seed = self._randomgen.randint(0, self.MAX_RAND_INT)
-#         
-#         numpy.random.seed(seed)
-#         
-#         with h5py.File(fname_store, 'r') as store_local:
-#             
-#             # get subset of data                
-#             dset = store_local.get(leaf_id)    
-#             Xsub, ysub, leaf_pure = get_XY_subsets_from_store(dset, self.heavy_leaf_domsize)
-#             
-#             #train subtree on subset of data
-#             subtree = instantiate_single_tree_instance(self.wrapped_instance, 
-#                                                              seed, 
-#                                                              min_samples_split=2,
-#                                                              top_tree_max_depth=3, 
-#                                                              balanced_top_tree=self.balanced_top_tree,
-#                                                              typ="top")
-#             subtree.fit(Xsub, ysub)
-# 
-#             # attach subtree to toptree                        
-#             toptree.attach_subtree(0, leaf_id, subtree, 0)
-#             
-#         return toptree
-#         
-#     def _chunk_too_large(self, n, d):
-#         
-#         # assuming double precision here
-#         return n * d * 8 > self.chunk_max_megabytes * 1000000
-#         
-#     def _handle_heavy_leaves(self, toptree, odir, generator, estimator_id):
-#         """
-#         """
-#         
-#         fname_store = os.path.join(odir, "data.h5")        
-#         with h5py.File(fname_store, 'r') as store:
-#             unique_leaf_ids = store.keys()
-#         
-#         heavy_leaves_detected = False
-#         
-#         for i in xrange(len(unique_leaf_ids)):
-#                     
-#             leaf_id = unique_leaf_ids[i]
-#     
-#             with h5py.File(fname_store, 'r') as store_local:
-#                 
-#                 dset = store_local.get(leaf_id)
-#                 self._logger.debug("Leaf with leaf_id %s has size:\t%i" % (str(leaf_id), dset.shape[0]))
-#                 if self._chunk_too_large(dset.shape[0], dset.shape[1]):
-#                     self._logger.debug("Reducing heavy leaf with leaf_id %s ..." % str(leaf_id))
-#                     toptree = self._reduce_heavy_leaf(fname_store, leaf_id, toptree)
-#                     heavy_leaves_detected = True
-#                     
-#         # redistribute points to subsets if needed
-#         if heavy_leaves_detected == True:
-#             self._logger.debug("Redistributing patterns for estimator %i (due to heavy leaves) ..." % estimator_id)
-#             toptree_node_stats = distribute_all_patterns(generator, toptree, odir)
-#             if "top_adapted" in self.plot_intermediate.keys():
-#                 self._logger.debug("Replotting top tree for estimator %i ..." % estimator_id)
-#                 toptree.draw_tree(0, fname=os.path.join(odir, "toptree_adapted.pdf"), node_stats=toptree_node_stats, **self.plot_intermediate['top'])
-#     
-#             self._logger.debug("Saving modified top tree for estimator %i ..." % estimator_id)
-#             toptree.save(os.path.join(odir, "toptree.tree"))
\ No newline at end of file
+    def _handle_heavy_leaves(self, odir, estimator_id):
+        """ Some of the leaf buckets might be too large to 
+        fit into memory (e.g., in case a pure leaf of the top 
+        tree gets filled with patterns). Such buckets are split 
+        by attaching a subtree to the corresponding leaf (see 
+        _reduce_heavy_leaf); this is repeated until all buckets 
+        fit (or until a bucket cannot be split anymore).
+        """
+        
+        fname_store = os.path.join(odir, "data.h5")
+        fname_toptree = os.path.join(odir, "toptree.tree")
+        toptree = self.store.load(fname_toptree, Wood)
+        
+        heavy_leaves = [leaf_id for leaf_id in self.store.get_keys(fname_store) if self._bucket_too_large(fname_store, leaf_id)]
+        toptree_modified = False
+        
+        while len(heavy_leaves) > 0:
+            
+            leaf_id = heavy_leaves.pop()
+            megabytes = get_bucket_megabytes(self.store, fname_store, leaf_id, self.wrapped_instance.float_type)
+            self._logger.debug("Reducing heavy leaf with leaf_id %s (%.1f MB) ..." % (str(leaf_id), megabytes))
+            
+            new_leaf_ids = self._reduce_heavy_leaf(fname_store, leaf_id, toptree, odir)
+            if new_leaf_ids is None:
+                self._logger.warning("Leaf with leaf_id %s cannot be split (%.1f MB)" % (str(leaf_id), megabytes))
+                continue
+            toptree_modified = True
+            
+            for new_leaf_id in new_leaf_ids:
+                if self._bucket_too_large(fname_store, new_leaf_id):
+                    # no progress: all patterns ended up in one new leaf
+                    if get_bucket_megabytes(self.store, fname_store, new_leaf_id, self.wrapped_instance.float_type) == megabytes:
+                        self._logger.warning("Leaf with leaf_id %s cannot be split (%.1f MB)" % (str(new_leaf_id), megabytes))
+                    else:
+                        heavy_leaves.append(new_leaf_id)
+            
+        if toptree_modified == True:
+            self.store.close()
+            self._logger.debug("Saving modified top tree for estimator %i ..." % estimator_id)
+            self.store.save(fname_toptree, toptree)
+        
+    def _reduce_heavy_leaf(self, fname_store, leaf_id, toptree, odir):
+        """ Fits a subtree on a random subset of the bucket 
+        of leaf_id, attaches it to the top tree (in-place), 
+        and redistributes the bucket (chunk-wise) to the new 
+        leaves. Returns the keys of the new buckets (or None, 
+        if the subtree does not split the subset).
+        """
+        
+        n_rows, n_cols = self.store.get_shape(fname_store, leaf_id)
+        chunk_rows = self._get_max_bucket_rows(n_cols)
+        seed = self._randomgen.randint(0, self.MAX_RAND_INT)
+        
+        Xsub, ysub = get_XY_subsets_from_store(self.store, fname_store, leaf_id, self.heavy_leaf_domsize, chunk_rows, seed=seed)
+        Xsub, ysub = self._ensure_dtype(Xsub), self._ensure_dtype(ysub)
+        
+        # the leaves of the subtree should contain at most n_patterns_leaf
+        # patterns of the bucket (and the buckets have to fit into memory)
+        ratio = float(len(ysub)) / float(n_rows)
+        min_samples_split = max(2, int(min(self.n_patterns_leaf, chunk_rows) * ratio))
+        
+        subtree = instantiate_single_tree_instance(self.wrapped_instance, 
+                                                   seed, 
+                                                   min_samples_split=min_samples_split,
+                                                   top_tree_max_depth=self.top_tree_max_depth, 
+                                                   balanced_top_tree=self.balanced_top_tree,
+                                                   top_tree_lambda=self.top_tree_lambda,
+                                                   top_tree_type=self.top_tree_type,
+                                                   top_tree_leaf_stopping_mode=self.top_tree_leaf_stopping_mode,
+                                                   typ="top")
+        subtree = self._fit_tree_instance(subtree, Xsub, ysub)
+        
+        if subtree.get_n_nodes(0) <= 1:
+            return None
+        
+        # the node ids of the top tree must not change (keys of the buckets)
+        toptree.attach_subtree(0, int(leaf_id), subtree, 0, optimize_layout=False)
+        
+        # redistribute the patterns of the bucket (only the
+        # new leaves of the subtree can be reached)
+        stats = {}
+        for start in xrange(0, n_rows, chunk_rows):
+            end = min(start + chunk_rows, n_rows)
+            data = self.store.get_dataset_rows(fname_store, leaf_id, start, end)
+            data = self._ensure_dtype(data)
+            args = [numpy.ascontiguousarray(data[:, :-1]), numpy.ascontiguousarray(data[:, -1]), toptree, odir, self.store, stats, None]
+            distribute_all_patterns(args)
+        self.store.delete_dataset(fname_store, leaf_id)
+        
+        return [str(int(new_leaf_id)) for new_leaf_id in stats.keys()]
+        
+    def _get_max_bucket_rows(self, n_cols):
+        """ Returns the maximum number of rows of a bucket
+        (w.r.t. chunk_max_megabytes)
+        """
+        
+        itemsize = numpy.dtype(self._numpy_dtype_float).itemsize
+        
+        return max(1, int(self.chunk_max_megabytes * 1000000 / (n_cols * itemsize)))
+            
+    def _bucket_too_large(self, fname_store, leaf_id):
+        
+        return get_bucket_megabytes(self.store, fname_store, leaf_id, self.wrapped_instance.float_type) > self.chunk_max_megabytes
@@ -3,9 +3,13 @@
 # License: GPL v2
 #
 
+import numpy
+
 from woody.io import DiskStore
 
 from .base import HugeWood
+from .predict import predict_proba_array
+from ..forest.util import pad_probas
 
 from .. import WoodClassifier
 
@@ -61,4 +65,47 @@ class HugeWoodClassifier(HugeWood):
                                                  chunk_max_megabytes=chunk_max_megabytes,                                                 
                                                  wrapped_instance=wrapped_instance,
                                                  store=store)
-        
\ No newline at end of file
+
+    def predict_proba(self, X=None, generator=None):
+        """ Computes class probabilities for new patterns
+        (one column per class label, see Wood.predict_proba).
+        
+        Parameters
+        ----------
+        X : array-like, default None
+            A numpy array containing the patterns,
+            one row per pattern. If X is not None, 
+            the probabilities are computed via X, 
+            otherwise based on the generator.
+        generator : DataGenerator, default None
+            A data generator instance that 
+            is used to iterate over the patterns
+            
+        Returns
+        -------
+        array-like : Class probabilities, one row 
+            for each instance given in X or generator.
+        """ 
+               
+        if X is not None:
+            return predict_proba_array(X, self.n_estimators, self.n_estimators_bottom, self._numpy_dtype_float, self.odir, self.store, self.wrapped_instance, self.n_jobs)
+        
+        probas = []
+        
+        # reset generator, only patterns are needed
+        generator.set_mode(patterns=True, target=False)
+        generator.reset()
+ 
+        while True:
+            
+            try:
+                X_chunk = generator.get_chunk()
+                X_chunk = self._ensure_dtype(X_chunk)
+                assert X_chunk.shape[0] > 0    
+            except:
+                break
+            
+            self._logger.info("Processing chunk of size %i ..." % X_chunk.shape[0])
+            probas.append(predict_proba_array(X_chunk, self.n_estimators, self.n_estimators_bottom, self._numpy_dtype_float, self.odir, self.store, self.wrapped_instance, self.n_jobs))
+                
+        return numpy.concatenate(pad_probas(probas), axis=0)
@@ -7,14 +7,28 @@ import os
 import copy
 import numpy
 
-from woody.util import perform_task_in_parallel, start_via_single_process
+from woody.util import perform_task_in_parallel_with_budget, start_via_single_process, pool_init
 from woody.io import DiskStore
-from .util import distribute_patterns
+from .util import distribute_patterns, get_bucket_megabytes
 
-from .. import WoodClassifier, WoodRegressor     
+from .. import Wood, WoodClassifier, WoodRegressor     
+
+# top trees loaded once per worker (see init_resident_toptrees)
+_resident_toptrees = {}
+
+# peak memory of fitting a bottom forest w.r.t. the size of its bucket: 
+# the bucket and its feature-wise copy are kept at the same time (see 
+# _fit_single_bottom_tree); the buffers of the fit (a few values per 
+# pattern and thread) come on top
+BOTTOM_FIT_MEMORY_FACTOR = 2
 
 def fit_all_attached_bottom_trees(odir, params, store, logger, seed, n_jobs):
-    """
+    """ Fits the bottom forests for all leaves. For n_jobs > 1, the 
+    forests are fitted concurrently by a pool of n_jobs workers 
+    (largest leaf buckets first); a fit is only started if the sum 
+    of the peak memory of the fits being processed (see 
+    BOTTOM_FIT_MEMORY_FACTOR) stays below chunk_max_megabytes (a 
+    larger fit is processed on its own).
     """
     
     wrapped_instance = params['wrapped_instance']
@@ -39,15 +53,24 @@ def fit_all_attached_bottom_trees(odir, params, store, logger, seed, n_jobs):
         args = [wrapped_instance, fname_store, store, odir, leaf_id, seed, i, unique_leaf_ids, n_estimators_bottom, wrapped_instance.min_samples_split, None, plot_intermediate, verbose]        
         params_parallel.append(args)
     
-    #results = perform_task_in_parallel(_fit_single_bottom_tree, params_parallel, n_jobs=n_jobs, backend="multiprocessing")
+    if n_jobs > 1:
+        
+        costs = [BOTTOM_FIT_MEMORY_FACTOR * get_bucket_megabytes(store, fname_store, leaf_id, wrapped_instance.float_type) for leaf_id in unique_leaf_ids]
+        
+        # processes for disk stores, threads otherwise (the 
+        # fitted trees have to be saved to the same store)
+        backend = "multiprocessing" if isinstance(store, DiskStore) else "threading"
+        results = perform_task_in_parallel_with_budget(_fit_single_bottom_tree, params_parallel, costs, params['chunk_max_megabytes'], n_jobs=n_jobs, backend=backend)
     
-    results = []
-    for param in params_parallel:
-        if type(store) == DiskStore:
-            res = start_via_single_process(_fit_single_bottom_tree, param, {})
-        else:
-            res = _fit_single_bottom_tree(*param)
-        results.append(res)
+    else:
+        
+        results = []
+        for param in params_parallel:
+            if isinstance(store, DiskStore):
+                res = start_via_single_process(_fit_single_bottom_tree, [param], {})
+            else:
+                res = _fit_single_bottom_tree(param)
+            results.append(res)
     
     for res in results:
         n_instances_total += res
@@ -55,14 +78,16 @@ def fit_all_attached_bottom_trees(odir, params, store, logger, seed, n_jobs):
     if logger is not None:   
         logger.debug("Fitted bottom trees for %i instances in total." % n_instances_total)
 
-def _fit_single_bottom_tree(wrapped_instance, fname_store, store, odir, leaf_id, seed, i, unique_leaf_ids, n_estimators_bottom, min_samples_split, logger, plot_intermediate, verbose):
+def _fit_single_bottom_tree(args):
     
-    # = args
+    wrapped_instance, fname_store, store, odir, leaf_id, seed, i, unique_leaf_ids, n_estimators_bottom, min_samples_split, logger, plot_intermediate, verbose = args
     
+    # the patterns are needed feature-wise for fitting (no further copy)
+    dtype = numpy.float32 if wrapped_instance.float_type == "float" else numpy.float64
     dset = store.get_dataset(fname_store, leaf_id)     
-    Xsub, ysub = dset[:, :-1], dset[:, -1]
-    Xsub = numpy.ascontiguousarray(Xsub)
-    ysub = numpy.ascontiguousarray(ysub)    
+    Xsub = numpy.asfortranarray(dset[:, :-1], dtype=dtype)
+    ysub = numpy.ascontiguousarray(dset[:, -1], dtype=dtype)    
+    del dset
     
     n_instances = len(ysub)
     if verbose > 0:
@@ -102,7 +127,9 @@ def instantiate_single_tree_instance(wrapped_instance,
     
     assert typ in ["top", "bottom"]
     
-    n_jobs = 1 #wrapped_instance.n_jobs
+    # a single top tree can make use of all threads
+    # (intra-tree parallelism, see fit_forest)
+    n_jobs = wrapped_instance.n_jobs
     
     if typ == "top":
         
@@ -120,6 +147,11 @@ def instantiate_single_tree_instance(wrapped_instance,
                         tree_traversal_mode=wrapped_instance.tree_traversal_mode,
                         leaf_stopping_mode=top_tree_leaf_stopping_mode,
                         tree_type=top_tree_type,
+                        splitter=wrapped_instance.splitter,
+                        max_bins=wrapped_instance.max_bins,
+                        # the leaf ids must not change when attaching 
+                        # subtrees (see HugeWood._handle_heavy_leaves)
+                        node_layout="standard",
                         float_type=wrapped_instance.float_type,
                         max_depth=wrapped_instance.max_depth,
                         verbose=0)
@@ -146,6 +178,11 @@ def instantiate_single_tree_instance(wrapped_instance,
                         tree_traversal_mode=wrapped_instance.tree_traversal_mode,
                         leaf_stopping_mode=top_tree_leaf_stopping_mode,
                         tree_type=top_tree_type,
+                        splitter=wrapped_instance.splitter,
+                        max_bins=wrapped_instance.max_bins,
+                        # the leaf ids must not change when attaching 
+                        # subtrees (see HugeWood._handle_heavy_leaves)
+                        node_layout="standard",
                         float_type=wrapped_instance.float_type,
                         max_depth=wrapped_instance.max_depth,
                         verbose=0)       
@@ -179,30 +216,85 @@ def instantiate_single_tree_instance(wrapped_instance,
                         
     return tree  
 
+def fit_tree_instance(tree, X, y, n_jobs_eval=None):
+    """ Fits the tree instance and returns it; if n_jobs_eval
+    is not None, the fitted instance uses n_jobs_eval threads
+    afterwards (e.g., for distributing patterns to its leaves).
+    """
+    
+    tree.fit(X, y)
+    
+    if n_jobs_eval is not None:
+        tree.n_jobs = n_jobs_eval
+        tree.wrapper.params.num_threads = n_jobs_eval
+        
+    return tree
+
 def distribute_all_patterns(args):
     """
     """
     
     X_chunk, y_chunk, toptree, odir, store, stats, logger = args
-    fname_store = os.path.join(odir, "data.h5")
                 
-    Xsubs, ysubs, unique_leaves_ids = distribute_patterns(toptree, X_chunk, y_chunk, logger=logger)
+    buckets = get_leaf_buckets(toptree, X_chunk, y_chunk, logger=logger)
 
     if logger is not None:
         logger.debug("\tStoring all leaf buckets to store ...")
                     
-    # store arrays to appropriate dataset
+    store_leaf_buckets(store, odir, buckets)
+    
+    if stats is not None:
+        for data_key, data in buckets:
+            leaf_id = int(data_key)
+            if leaf_id not in stats.keys():
+                stats[leaf_id] = 0
+            stats[leaf_id] += len(data)
+
+def get_leaf_buckets(toptree, X_chunk, y_chunk, logger=None):
+    """ Distributes a chunk of patterns via the top tree and
+    returns, for each leaf reached, the key of the leaf 
+    bucket and the associated rows (patterns and targets).
+    """
+    
+    Xsubs, ysubs, unique_leaves_ids = distribute_patterns(toptree, X_chunk, y_chunk, logger=logger)
+    
+    buckets = []
     for leaf_id in unique_leaves_ids:
         
         Xsub, ysub = Xsubs[leaf_id], ysubs[leaf_id]
         ysub = ysub.reshape((len(ysub), 1))
         data = numpy.concatenate((Xsub, ysub), axis=1)
-        data_key = str(int(leaf_id))
+        buckets.append((str(int(leaf_id)), data))
         
-        store.append_to_dataset(fname_store, data_key, data)            
-        
-        if stats is not None:
-            if leaf_id not in stats.keys():
-                stats[int(leaf_id)] = 0
-            stats[int(leaf_id)] += len(ysubs[leaf_id])
-    
\ No newline at end of file
+    return buckets
+
+def store_leaf_buckets(store, odir, buckets):
+    """ Appends the leaf buckets (see get_leaf_buckets)
+    to the appropriate datasets.
+    """
+    
+    fname_store = os.path.join(odir, "data.h5")
+    
+    for data_key, data in buckets:
+        store.append_to_dataset(fname_store, data_key, data)
+
+def init_resident_toptrees(store, odirs):
+    """ Loads the top trees of the given output directories
+    (called once per worker, see get_leaf_buckets_resident).
+    """
+    
+    pool_init()
+    
+    _resident_toptrees.clear()
+    for odir in odirs:
+        _resident_toptrees[odir] = store.load(os.path.join(odir, "toptree.tree"), Wood)
+
+def get_leaf_buckets_resident(args):
+    """ Returns the leaf buckets of a chunk of patterns w.r.t. 
+    the top tree that is kept by the worker (see 
+    init_resident_toptrees).
+    """
+    
+    X_chunk, y_chunk, odir = args
+    
+    return get_leaf_buckets(_resident_toptrees[odir], X_chunk, y_chunk)
@@ -2,12 +2,12 @@
 import os
 import gc
 import numpy
-from scipy.stats import mode
 
 from woody.io import DiskStore
-from woody.util import perform_task_in_parallel
+from woody.util import perform_task_in_parallel, VoteAggregator
 from .util import distribute_patterns
 from .util import _load_single_tree
+from ..forest.util import pad_probas
         
 def predict_array(X, n_estimators, n_estimators_bottom, numpy_dtype_float, odir, store, wrapped_instance, n_jobs):
     """ Returns predictions for a given set of patterns.
@@ -23,65 +23,96 @@ def predict_array(X, n_estimators, n_estimators_bottom, numpy_dtype_float, odir,
         args = [n_estimators_bottom, toptree, X, odir_local, store, wrapped_instance, numpy_dtype_float]
         params_parallel.append(args)
     
-    if type(store) == DiskStore:
+    if isinstance(store, DiskStore):
         results = perform_task_in_parallel(predict_bottom, params_parallel, n_jobs=n_jobs, backend="multiprocessing")
     else:
         results = []
         for param in params_parallel:
             res = predict_bottom(param)
             results.append(res)    
-    allpreds = numpy.zeros((len(X), n_estimators*n_estimators_bottom), dtype=numpy_dtype_float)
-    for i in xrange(len(results)):
-        allpreds[:,i*n_estimators_bottom:(i+1)*n_estimators_bottom] = results[i] 
-    allpreds = numpy.array(allpreds)
     
-    preds = _combine_preds(allpreds, wrapped_instance.learning_type, numpy_dtype_float)
+    # each result holds the aggregated votes/sums of one top tree
+    aggregator = results[0]
+    for i in xrange(1, len(results)):
+        aggregator.merge(results[i])
     
-    return preds  
+    return aggregator.get_predictions()
 
-def predict_bottom(args):
-    """ FIXME: This is by far the slowest part during prediction.
+def predict_proba_array(X, n_estimators, n_estimators_bottom, numpy_dtype_float, odir, store, wrapped_instance, n_jobs):
+    """ Returns class probabilities for a given set of 
+    patterns (means of the bottom forests' probabilities).
     """
     
-    n_estimators_bottom, toptree, X, odir, store, wrapped_instance, numpy_dtype_float = args
-    
-    preds = numpy.zeros((len(X), n_estimators_bottom), dtype=numpy_dtype_float)
+    params_parallel = []
     
-    oindices = numpy.array(xrange(len(X)), dtype=numpy.float64)
+    for b in xrange(n_estimators):
 
-    Xsubs, isubs, unique_leaves_ids = distribute_patterns(toptree, X, oindices)
+        odir_local = os.path.join(odir, str(int(b)))
+        fname = os.path.join(odir_local, "toptree.tree")
+        toptree = _load_single_tree(store, fname, wrapped_instance, typ="top")
+        args = [n_estimators_bottom, toptree, X, odir_local, store, wrapped_instance, numpy_dtype_float]
+        params_parallel.append(args)
+    
+    if isinstance(store, DiskStore):
+        results = perform_task_in_parallel(predict_proba_bottom, params_parallel, n_jobs=n_jobs, backend="multiprocessing")
+    else:
+        results = []
+        for param in params_parallel:
+            res = predict_proba_bottom(param)
+            results.append(res)    
+    
+    # each pattern reaches one bottom forest per top tree
+    proba = numpy.mean(pad_probas(results), axis=0)
+    
+    if proba.dtype != numpy_dtype_float:
+        proba = proba.astype(numpy_dtype_float)
+        
+    return proba
 
-    for leaf_id in unique_leaves_ids:
-        isubs[leaf_id] = isubs[leaf_id].astype(numpy.int64)
-    unique_leaves_ids = unique_leaves_ids.astype(numpy.int64)
+def predict_proba_bottom(args):
+    """ Returns the class probabilities of the bottom 
+    forests attached to a single top tree.
+    """
+    
+    n_estimators_bottom, toptree, X, odir, store, wrapped_instance, numpy_dtype_float = args
+    
+    Xsubs, isubs, unique_leaves_ids = distribute_patterns(toptree, X)
     
+    probas = []
     for leaf_id in unique_leaves_ids:
         fname = os.path.join(odir, str(int(leaf_id)) + ".tree")            
         btree = _load_single_tree(store, fname, wrapped_instance, typ="bottom")
-        pleaf = btree.predict_all(Xsubs[leaf_id])
-        preds[isubs[leaf_id], :] = pleaf
+        probas.append(btree.predict_proba(Xsubs[leaf_id]))
         
         del btree
         gc.collect()
     
-    return preds
+    probas = pad_probas(probas)
+    proba = numpy.zeros((len(X), probas[0].shape[1]), dtype=numpy_dtype_float)
+    for i in xrange(len(unique_leaves_ids)):
+        proba[isubs[unique_leaves_ids[i]], :] = probas[i]
+    
+    return proba
 
-def _combine_preds(allpreds, learning_type, numpy_dtype_float):
+def predict_bottom(args):
+    """ Returns a VoteAggregator instance that contains the 
+    aggregated predictions of the bottom forests attached
+    to a single top tree.
+    """
     
-    if learning_type == "regression":
-        
-        preds = allpreds.mean(axis=1)
-        
-    elif learning_type == "classification":
-        
-        preds, _ = mode(allpreds, axis=1)
-        preds = preds[:, 0]
-        
-    else:
-        raise Exception("Unknown learning type for wrapped instance: %s" % learning_type)
+    n_estimators_bottom, toptree, X, odir, store, wrapped_instance, numpy_dtype_float = args
+    
+    aggregator = VoteAggregator(len(X), wrapped_instance.learning_type, numpy_dtype_float)
+    
+    Xsubs, isubs, unique_leaves_ids = distribute_patterns(toptree, X)
     
-    if preds.dtype != numpy_dtype_float:
-        preds = preds.astype(numpy_dtype_float)
+    for leaf_id in unique_leaves_ids:
+        fname = os.path.join(odir, str(int(leaf_id)) + ".tree")            
+        btree = _load_single_tree(store, fname, wrapped_instance, typ="bottom")
+        pleaf = btree.predict_all(Xsubs[leaf_id])
+        aggregator.update(pleaf, indices=isubs[leaf_id])
         
-    return preds  
-    
\ No newline at end of file
+        del btree
+        gc.collect()
+    
+    return aggregator
@@ -6,30 +6,35 @@
 import numpy
 import multiprocessing
 
-from woody.util import split_array
-
+from woody.util.array import gather_rows
 from .. import Wood                
                 
-def distribute_patterns(toptree, X, y, verbose=0, logger=None):
+def distribute_patterns(toptree, X, y=None, verbose=0, logger=None):
+    """ Distributes the patterns to the leaves of the top 
+    tree. Returns the patterns and the targets per leaf (if y 
+    is None, the indices of the patterns are returned instead 
+    of the targets) as well as the (sorted) ids of all leaves 
+    that contain at least one pattern. The patterns are 
+    gathered using the threads of the top tree.
+    """
 
     if logger is not None:
         logger.debug("\tUsing top tree to distribute patterns to leaves ...")
             
-    leaves_ids = toptree.get_leaves_ids(X)
-    unique_leaves_ids, counts = numpy.unique(leaves_ids, return_counts=True)
+    _, counts, perm = toptree.get_leaves_buckets(X)
+    unique_leaves_ids = numpy.flatnonzero(counts)
+    counts = counts[unique_leaves_ids]
     
     if logger is not None:
         logger.debug("\tPatterns are distributed to %i leaves of the top tree ..." % len(unique_leaves_ids))
-        
-    chunks = -1 * numpy.ones(int(unique_leaves_ids[-1]) + 1, dtype=numpy.int32)
-    for i in xrange(len(unique_leaves_ids)):
-        leaf_id = int(unique_leaves_ids[i])
-        chunks[leaf_id] = i
     
     Xsubs, ysubs = {}, {}
 
-    Xnew = split_array(X, leaves_ids, chunks, counts)
-    ynew = split_array(y, leaves_ids, chunks, counts)
+    Xnew = gather_rows(X, perm, n_jobs=toptree.n_jobs)
+    if y is None:
+        ynew = perm.astype(numpy.int64)
+    else:
+        ynew = y.take(perm, axis=0)
     
     current_count = 0
     for i in xrange(len(unique_leaves_ids)):
@@ -41,31 +46,40 @@ def distribute_patterns(toptree, X, y, verbose=0, logger=None):
     
     return Xsubs, ysubs, unique_leaves_ids      
 
-def get_XY_subsets_from_store(dset, heavy_leaf_domsize):
+def get_bucket_megabytes(store, fname_store, leaf_id, float_type):
+    """ Returns the size of a leaf bucket (in megabytes, 
+    converted to the float type used) without loading it.
+    """
     
-    pure = False
+    itemsize = 4 if float_type == "float" else 8
+    shape = store.get_shape(fname_store, leaf_id)
     
-    ychunk = numpy.array(dset[:, -1])
-    counts = numpy.bincount(ychunk.astype(numpy.int32))
-        
-    dominant = numpy.argmax(counts)
-    if len(ychunk) > heavy_leaf_domsize:
-        rsubset = numpy.random.choice(len(ychunk), heavy_leaf_domsize)
-    else:
-        rsubset = numpy.arange(len(ychunk))
-    subindices = ychunk != dominant
-    subindices = numpy.union1d(rsubset, subindices)
-    subindices.sort()
+    return float(shape[0] * shape[1] * itemsize) / 1000000
 
-    # random access slow in h5py, process in chunks
-    Xsub, ysub = numpy.array(dset[:, :-1]), numpy.array(dset[:, -1])
-    Xsub, ysub = Xsub[subindices,:], ysub[subindices]
+def get_XY_subsets_from_store(store, fname_store, leaf_id, n_subset, chunk_rows, seed=0):
+    """ Returns a random subset of (at most) n_subset 
+    patterns and targets of a leaf bucket; the bucket is 
+    loaded in chunks of chunk_rows rows (i.e., it does 
+    not have to fit into memory).
+    """
+    
+    n_rows = store.get_shape(fname_store, leaf_id)[0]
+    
+    rsubset = numpy.random.RandomState(seed).permutation(n_rows)[:n_subset]
+    rsubset.sort()
+    
+    subsets = []
+    for start in xrange(0, n_rows, chunk_rows):
+        end = min(start + chunk_rows, n_rows)
+        selected = rsubset[(rsubset >= start) & (rsubset < end)] - start
+        if len(selected) > 0:
+            data = store.get_dataset_rows(fname_store, leaf_id, start, end)
+            subsets.append(data[selected, :])
     
-    print "REMOVE UPWARDS, no XSUB needed"
-    if (counts != 0).sum() == 1:
-        pure = True
+    data = numpy.concatenate(subsets, axis=0)
+    Xsub, ysub = numpy.ascontiguousarray(data[:, :-1]), numpy.ascontiguousarray(data[:, -1])
             
-    return Xsub, ysub, pure
+    return Xsub, ysub
     
 def _load_single_tree(store, fname, wrapped_instance, typ=None):
     
@@ -9,10 +9,9 @@ import shutil
 import numpy
 import random
 import inspect
-from scipy.stats import mode
 
 from time import gmtime, strftime
-from woody.util import makedirs, Timer, perform_task_in_parallel, start_via_single_process
+from woody.util import makedirs, Timer, perform_task_in_parallel, start_via_single_process, VoteAggregator
 from woody.io import DiskStore, MemoryStore
 
 #from .predict import predict_array
@@ -45,11 +44,17 @@ class SubsetWood(BaseEstimator):
                  bootstrap=True,
                  max_depth=None,
                  min_samples_leaf=1,
+                 max_leaf_nodes=None,
+                 min_impurity_decrease=0.0,
                  learning_type=None,
                  criterion=None,
                  tree_traversal_mode="dfs",
                  leaf_stopping_mode="all",
                  tree_type="randomized",
+                 splitter="exact",
+                 max_bins=256,
+                 node_layout="standard",
+                 store_leaf_dists=False,
                  float_type="double",
                  patts_trans=True,
                  do_patts_trans=True,
@@ -81,11 +86,17 @@ class SubsetWood(BaseEstimator):
         self.bootstrap = bootstrap
         self.max_depth = max_depth
         self.min_samples_leaf = min_samples_leaf
+        self.max_leaf_nodes = max_leaf_nodes
+        self.min_impurity_decrease = min_impurity_decrease
         self.learning_type = learning_type
         self.criterion = criterion
         self.tree_traversal_mode = tree_traversal_mode
         self.leaf_stopping_mode = leaf_stopping_mode
         self.tree_type = tree_type
+        self.splitter = splitter
+        self.max_bins = max_bins
+        self.node_layout = node_layout
+        self.store_leaf_dists = store_leaf_dists
         self.float_type = float_type
         self.patts_trans = patts_trans
         self.do_patts_trans = do_patts_trans
@@ -108,11 +119,17 @@ class SubsetWood(BaseEstimator):
                 "bootstrap": self.bootstrap, 
                 "max_depth": self.max_depth, 
                 "min_samples_leaf": self.min_samples_leaf, 
+                "max_leaf_nodes": self.max_leaf_nodes, 
+                "min_impurity_decrease": self.min_impurity_decrease, 
                 "learning_type": self.learning_type, 
                 "criterion": self.criterion,
                 "leaf_stopping_mode": self.leaf_stopping_mode, 
                 "tree_traversal_mode": self.tree_traversal_mode, 
                 "tree_type": self.tree_type, 
+                "splitter": self.splitter, 
+                "max_bins": self.max_bins, 
+                "node_layout": self.node_layout, 
+                "store_leaf_dists": self.store_leaf_dists, 
                 "float_type": self.float_type, 
                 "patts_trans": self.patts_trans, 
                 "do_patts_trans": self.do_patts_trans,
@@ -325,41 +342,14 @@ class SubsetWood(BaseEstimator):
 
     def _predict_array(self, X):
         
-        results = []
+        aggregator = VoteAggregator(len(X), self.learning_type, self._numpy_dtype_float)
+        
         for b in xrange(self.n_estimators):
             fname = os.path.join(self.odir, str(int(b)) + ".tree")
             tree = self.store.load(fname, Wood)
-            preds = tree.predict(X)
-            results.append(preds)
-            
-                    
-        allpreds = numpy.zeros((len(X), self.n_estimators), dtype=self._numpy_dtype_float)
-        for i in xrange(len(results)):
-            allpreds[:,i] = results[i] 
-        allpreds = numpy.array(allpreds)
-        
-        preds = self._combine_preds(allpreds)
-        
-        return preds 
-    
-    def _combine_preds(self, allpreds):
-        
-        if self.learning_type == "regression":
-            
-            preds = allpreds.mean(axis=1)
-            
-        elif self.learning_type == "classification":
-            
-            preds, _ = mode(allpreds, axis=1)
-            preds = preds[:, 0]
-            
-        else:
-            raise Exception("Unknown learning type for wrapped instance: %s" % self.learning_type)
+            aggregator.update(tree.predict(X))
         
-        if preds.dtype != self._numpy_dtype_float:
-            preds = preds.astype(self._numpy_dtype_float)
-            
-        return preds       
+        return aggregator.get_predictions()
     
 def _fit_subset_tree(args):
     """
@@ -3,9 +3,14 @@
 # License: GPL v2
 #
 
+import os
+import numpy
+
 from woody.io import DiskStore
 
 from .base import SubsetWood
+from .. import Wood
+from ..forest.util import pad_probas
 
 class SubsetWoodClassifier(SubsetWood):
     """ Random forest classifier.
@@ -19,10 +24,16 @@ class SubsetWoodClassifier(SubsetWood):
                  bootstrap=False,
                  max_depth=None,
                  min_samples_leaf=1,
+                 max_leaf_nodes=None,
+                 min_impurity_decrease=0.0,
                  criterion="gini",
                  tree_traversal_mode="dfs",
                  leaf_stopping_mode="all",
                  tree_type="randomized",
+                 splitter="exact",
+                 max_bins=256,
+                 node_layout="standard",
+                 store_leaf_dists=False,
                  float_type="double",
                  patts_trans=True,
                  do_patts_trans=True,
@@ -41,11 +52,17 @@ class SubsetWoodClassifier(SubsetWood):
                  bootstrap=bootstrap,
                  max_depth=max_depth,
                  min_samples_leaf=min_samples_leaf,
+                 max_leaf_nodes=max_leaf_nodes,
+                 min_impurity_decrease=min_impurity_decrease,
                  learning_type="classification",
                  criterion=criterion,
                  tree_traversal_mode=tree_traversal_mode,
                  leaf_stopping_mode=leaf_stopping_mode,
                  tree_type=tree_type,
+                 splitter=splitter,
+                 max_bins=max_bins,
+                 node_layout=node_layout,
+                 store_leaf_dists=store_leaf_dists,
                  float_type=float_type,
                  patts_trans=patts_trans,
                  do_patts_trans=do_patts_trans,
@@ -53,4 +70,63 @@ class SubsetWoodClassifier(SubsetWood):
                  n_jobs=n_jobs,                                  
                  verbose=verbose,
                  odir=odir,
-                 store=store)
\ No newline at end of file
+                 store=store)
+
+    def predict_proba(self, X=None, generator=None):
+        """ Computes class probabilities for new patterns
+        (one column per class label, see Wood.predict_proba).
+        
+        Parameters
+        ----------
+        X : array-like, default None
+            A numpy array containing the patterns,
+            one row per pattern. If X is not None, 
+            the probabilities are computed via X, 
+            otherwise based on the generator.
+        generator : DataGenerator, default None
+            A data generator instance that 
+            is used to iterate over the patterns
+            
+        Returns
+        -------
+        array-like : Class probabilities, one row 
+            for each instance given in X or generator.
+        """ 
+        
+        if X is not None:
+            return self._predict_proba_array(X)
+        
+        probas = []
+        
+        # reset generator, only patterns are needed
+        generator.set_mode(patterns=True, target=False)
+        generator.reset()
+ 
+        while True:
+            
+            try:
+                X_chunk = generator.get_chunk()
+                X_chunk = self._ensure_dtype(X_chunk)
+                assert X_chunk.shape[0] > 0    
+            except:
+                break
+            
+            self._logger.info("Processing chunk of size %i ..." % X_chunk.shape[0])
+            probas.append(self._predict_proba_array(X_chunk))
+                
+        return numpy.concatenate(pad_probas(probas), axis=0)
+    
+    def _predict_proba_array(self, X):
+        
+        probas = []
+        for b in xrange(self.n_estimators):
+            fname = os.path.join(self.odir, str(int(b)) + ".tree")
+            tree = self.store.load(fname, Wood)
+            probas.append(tree.predict_proba(X))
+        
+        proba = numpy.mean(pad_probas(probas), axis=0)
+        
+        if proba.dtype != self._numpy_dtype_float:
+            proba = proba.astype(self._numpy_dtype_float)
+            
+        return proba
@@ -19,10 +19,15 @@ class SubsetWoodRegressor(SubsetWood):
                  bootstrap=False,
                  max_depth=None,
                  min_samples_leaf=1,
+                 max_leaf_nodes=None,
+                 min_impurity_decrease=0.0,
                  criterion="mse",
                  tree_traversal_mode="dfs",
                  leaf_stopping_mode="all",
                  tree_type="randomized",
+                 splitter="exact",
+                 max_bins=256,
+                 node_layout="standard",
                  float_type="double",
                  patts_trans=True,
                  do_patts_trans=True,
@@ -41,11 +46,16 @@ class SubsetWoodRegressor(SubsetWood):
                  bootstrap=bootstrap,
                  max_depth=max_depth,
                  min_samples_leaf=min_samples_leaf,
+                 max_leaf_nodes=max_leaf_nodes,
+                 min_impurity_decrease=min_impurity_decrease,
                  learning_type="regression",
                  criterion=criterion,
                  tree_traversal_mode=tree_traversal_mode,
                  leaf_stopping_mode=leaf_stopping_mode,
                  tree_type=tree_type,
+                 splitter=splitter,
+                 max_bins=max_bins,
+                 node_layout=node_layout,
                  float_type=float_type,
                  patts_trans=patts_trans,
                  do_patts_trans=do_patts_trans,
@@ -5,7 +5,7 @@
 
 from .base import makedirs, ensure_dir_for_file, convert_to_libsvm
 from .timer import Timer
-from .array import split_array
+from .array import split_array, VoteAggregator
 from .url import download_from_url
 from .draw import draw_single_tree
-from .parallel import perform_task_in_parallel, start_via_single_process
\ No newline at end of file
+from .parallel import perform_task_in_parallel, perform_task_in_parallel_with_budget, start_via_single_process, create_pool, pool_init, perform_pipeline
\ No newline at end of file
@@ -3,4 +3,4 @@
 # License: GPL v2
 #
 
-from .base import split_array, transpose_array
\ No newline at end of file
+from .base import split_array, gather_rows, transpose_array, transpose_array_inplace, VoteAggregator
\ No newline at end of file
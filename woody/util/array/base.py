@@ -20,7 +20,8 @@ def split_array_chunk(a, indicator, chunks, counts):
                 
     cumsums = numpy.cumsum(counts).astype(numpy.int32)
         
-    wrapper.split_array(a, anew, indicator, chunks, cumsums)
+    retval = wrapper.split_array(a, anew, indicator, chunks, cumsums, 1)
+    _check_split_retval(retval)
         
     return anew
            
@@ -45,6 +46,12 @@ def split_array(a, indicator, chunks, counts, n_jobs=1):
         index 2 is mapped to chunk 0 and an 
         indicator index 5 to chunk 1.  
     counts: array, numpy-like
+        The number of rows per chunk.
+    n_jobs: int, default 1
+        The number of threads used (each thread
+        counts and scatters a contiguous range
+        of rows; the order of the rows within a
+        chunk is kept).
     """
     
     reshaped = False
@@ -86,7 +93,8 @@ def split_array(a, indicator, chunks, counts, n_jobs=1):
     anew = numpy.empty(a.shape, dtype=a.dtype)
     cumsums = numpy.cumsum(counts).astype(numpy.int32)
     cumsums_minus_counuts = cumsums - counts
-    wrapper.split_array(a, anew, indicator, chunks, cumsums_minus_counuts)
+    retval = wrapper.split_array(a, anew, indicator, chunks, cumsums_minus_counuts, n_jobs)
+    _check_split_retval(retval)
     #anew = anew_check
 
 #     if sanity_check == True:
@@ -98,12 +106,199 @@ def split_array(a, indicator, chunks, counts, n_jobs=1):
         
     return anew
 
-def transpose_array(a, a_trans):
+def gather_rows(a, indices, n_jobs=1):
+    """ Returns the rows of a (two-dimensional, C-contiguous) 
+    given by the indices, i.e., a.take(indices, axis=0). The 
+    rows are copied using n_jobs threads (each thread copies 
+    a contiguous range of the new rows).
+    """
+    
+    if type(a[0,0]) == numpy.float64:
+        wrapper = wrapper_utils_cpu_double
+    elif type(a[0,0]) == numpy.float32:
+        wrapper = wrapper_utils_cpu_float
+    else:
+        raise Exception("Invalid dtype for array: %s" % str(type(a[0,0])))
+    
+    a = numpy.ascontiguousarray(a)
+    indices = numpy.ascontiguousarray(indices, dtype=numpy.int32)
+    
+    anew = numpy.empty((len(indices), a.shape[1]), dtype=a.dtype)
+    retval = wrapper.gather_rows(a, anew, indices, n_jobs)
+    _check_split_retval(retval)
+    
+    return anew
 
+def _check_split_retval(retval):
+    
+    if retval == -1:
+        raise Exception("Invalid array sizes given for splitting array")
+    elif retval == -2:
+        raise Exception("Invalid indicator or chunk index given for splitting array")
+    elif retval == -3:
+        raise Exception("Invalid counts or indices given for splitting array")
+    elif retval != 0:
+        raise Exception("Splitting array failed: %i" % retval)
+    
+def transpose_array(a, a_trans, n_jobs=1):
+    """ Stores the transposed elements of a (two-dimensional, 
+    C-contiguous) in a_trans, which must have the same shape 
+    as a (i.e., a_trans contains the columns of a one after 
+    the other). The array is transposed tile by tile using 
+    n_jobs threads.
+    """
+
+    if type(a[0,0]) == numpy.float64:
+        wrapper = wrapper_utils_cpu_double
+    else:
+        wrapper = wrapper_utils_cpu_float
+
+    wrapper.transpose_array(a, a_trans, n_jobs)            
+    
+def transpose_array_inplace(a):
+    """ Transposes the elements of a (two-dimensional, 
+    C-contiguous) in place, i.e., afterwards, the memory 
+    of a contains the columns of a one after the other. 
+    Returns a view of shape (a.shape[1], a.shape[0]) on 
+    the transposed elements (calling the function for 
+    this view restores the original array). Slower than
+    transpose_array, but no additional copy of a is needed.
+    """
+    
     if type(a[0,0]) == numpy.float64:
         wrapper = wrapper_utils_cpu_double
     else:
         wrapper = wrapper_utils_cpu_float
+        
+    wrapper.transpose_array_inplace(a)
+    
+    return a.reshape((a.shape[1], a.shape[0]))
+    
 
-    wrapper.transpose_array(a, a_trans)            
+class VoteAggregator(object):
+    """ Aggregates the predictions of several models in a 
+    streaming fashion: Per pattern, either the class counts 
+    (classification) or the sums of the predictions (regression) 
+    are updated in place each time new predictions are added 
+    (thus, the predictions of all models are never stored at once).
     
+    Parameters
+    ----------
+    n : int
+        The number of patterns
+    learning_type : str
+        Either "classification" or "regression"
+    numpy_dtype_float : dtype
+        The float type of the predictions (numpy.float32
+        or numpy.float64)
+    """
+    
+    def __init__(self, n, learning_type, numpy_dtype_float):
+        
+        if learning_type not in ["classification", "regression"]:
+            raise Exception("Unknown learning type: %s" % learning_type)
+        
+        if numpy_dtype_float not in [numpy.float32, numpy.float64]:
+            raise Exception("Invalid dtype: %s" % str(numpy_dtype_float))
+            
+        self.n = n
+        self.learning_type = learning_type
+        self.numpy_dtype_float = numpy_dtype_float
+        
+        if learning_type == "classification":
+            self.class_counts = numpy.zeros((n, 1), dtype=numpy.int32)
+        else:
+            self.sums = numpy.zeros(n, dtype=numpy.float64)
+            self.n_values = numpy.zeros(n, dtype=numpy.int32)
+            
+    def _get_wrapper(self):
+        
+        # not stored as attribute (instances have to be picklable)
+        if self.numpy_dtype_float == numpy.float64:
+            return wrapper_utils_cpu_double
+        else:
+            return wrapper_utils_cpu_float
+        
+    def update(self, preds, indices=None):
+        """ Adds new predictions.
+        
+        Parameters
+        ----------
+        preds : array-like
+            The predictions, one row per pattern and one
+            column per model (a one-dimensional array is 
+            treated as the predictions of a single model).
+        indices : array-like, default None
+            The indices of the patterns the rows of preds
+            belong to (if None, row i belongs to pattern i).
+        """
+        
+        if len(preds.shape) == 1:
+            preds = preds.reshape((len(preds), 1))
+        preds = numpy.ascontiguousarray(preds, dtype=self.numpy_dtype_float)
+        
+        if len(preds) == 0:
+            return
+        
+        if indices is None:
+            if len(preds) != self.n:
+                raise Exception("Number of predictions does not match number of patterns: %i != %i" % (len(preds), self.n))
+            indices = numpy.empty(0, dtype=numpy.int32)
+        else:
+            indices = numpy.ascontiguousarray(indices, dtype=numpy.int32)
+            if len(indices) != len(preds):
+                raise Exception("Number of indices does not match number of predictions: %i != %i" % (len(indices), len(preds)))
+            if indices.min() < 0 or indices.max() >= self.n:
+                raise Exception("Invalid pattern indices given")
+            
+        if self.learning_type == "classification":
+            
+            if preds.min() < 0:
+                raise Exception("Invalid (negative) class labels given")
+            n_classes = int(preds.max()) + 1
+            if n_classes > self.class_counts.shape[1]:
+                self.class_counts = numpy.pad(self.class_counts, ((0, 0), (0, n_classes - self.class_counts.shape[1])), mode="constant")
+            self._get_wrapper().add_votes(preds, indices, self.class_counts)
+            
+        else:
+            
+            self._get_wrapper().add_sums(preds, indices, self.sums, self.n_values)
+            
+    def merge(self, other):
+        """ Adds the (aggregated) predictions of another
+        aggregator instance (e.g., from a different process).
+        """
+        
+        if other.n != self.n or other.learning_type != self.learning_type:
+            raise Exception("Aggregators are not compatible")
+        
+        if self.learning_type == "classification":
+            
+            d = max(self.class_counts.shape[1], other.class_counts.shape[1])
+            if d > self.class_counts.shape[1]:
+                self.class_counts = numpy.pad(self.class_counts, ((0, 0), (0, d - self.class_counts.shape[1])), mode="constant")
+            self.class_counts[:, :other.class_counts.shape[1]] += other.class_counts
+            
+        else:
+            
+            self.sums += other.sums
+            self.n_values += other.n_values
+                        
+    def get_predictions(self):
+        """ Returns the combined predictions (majority votes
+        for classification, means for regression).
+        """
+        
+        if self.learning_type == "classification":
+            
+            preds = numpy.empty(self.n, dtype=self.numpy_dtype_float)
+            self._get_wrapper().get_majority_votes(self.class_counts, preds)
+            
+        else:
+            
+            # patterns without any predictions are set to nan
+            with numpy.errstate(invalid="ignore", divide="ignore"):
+                preds = self.sums / self.n_values
+            preds = preds.astype(self.numpy_dtype_float)
+            
+        return preds
@@ -1,79 +1,385 @@
 #include "include/array.h"
 
 /* --------------------------------------------------------------------------------
- * Splits the array X according to the indices
+ * Returns the number of threads used for splitting n rows
  * --------------------------------------------------------------------------------
  */
-void split_array(FLOAT_TYPE *X, int nX, int dX,
+static int get_split_n_threads(int n, int n_threads){
+
+	int max_threads = n / SPLIT_MIN_ROWS_PER_THREAD;
+
+	if (max_threads < 1){
+		max_threads = 1;
+	}
+	if (n_threads > max_threads){
+		n_threads = max_threads;
+	}
+	if (n_threads < 1){
+		n_threads = 1;
+	}
+
+	return n_threads;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * First pass: Each thread t counts the rows start(t), ..., end(t)-1 per chunk
+ * (per-thread histogram); afterwards, thread_offsets[t * nchunks + c] is
+ * the position of the first row of chunk c processed by thread t (prefix sums
+ * starting with cumsums_minus_counts[c]); the row order within a chunk is kept
+ * --------------------------------------------------------------------------------
+ */
+static int compute_thread_offsets(int *thread_offsets, int n_new,
+							int *indicator, int nindicator,
+							int *chunks, int nchunks,
+							int *cumsums_minus_counts, int ncumsums_minus_counts,
+							int n_threads){
+
+	int i, t, c;
+	int retval = SPLIT_SUCCESS;
+
+	omp_set_dynamic(0);
+	omp_set_num_threads(n_threads);
+
+	#pragma omp parallel for schedule(static) private(i) reduction(min:retval)
+	for (t = 0; t < n_threads; t++){
+
+		int start = (int) (((long) t * nindicator) / n_threads);
+		int end = (int) (((long) (t + 1) * nindicator) / n_threads);
+		int *counts = thread_offsets + (long) t * ncumsums_minus_counts;
+
+		for (i = start; i < end; i++){
+			int idx = indicator[i];
+			if (idx < 0 || idx >= nchunks || chunks[idx] < 0 || chunks[idx] >= ncumsums_minus_counts){
+				retval = SPLIT_ERROR_INVALID_CHUNK;
+				break;
+			}
+			counts[chunks[idx]]++;
+		}
+
+	}
+
+	if (retval != SPLIT_SUCCESS){
+		return retval;
+	}
+
+	for (c = 0; c < ncumsums_minus_counts; c++){
+
+		long offset = cumsums_minus_counts[c];
+
+		if (offset < 0){
+			return SPLIT_ERROR_INVALID_OFFSET;
+		}
+
+		for (t = 0; t < n_threads; t++){
+			int count = thread_offsets[(long) t * ncumsums_minus_counts + c];
+			thread_offsets[(long) t * ncumsums_minus_counts + c] = (int) offset;
+			offset += count;
+		}
+
+		if (offset > n_new){
+			return SPLIT_ERROR_INVALID_OFFSET;
+		}
+
+	}
+
+	return SPLIT_SUCCESS;
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Splits the array X according to the indices: Row i is copied to the chunk
+ * chunks[indicator[i]], which starts at row cumsums_minus_counts[chunk] of
+ * Xnew (two passes: per-thread histograms and prefix sums, parallel scatter)
+ * --------------------------------------------------------------------------------
+ */
+int split_array(FLOAT_TYPE *X, int nX, int dX,
 		FLOAT_TYPE *Xnew, int nXnew, int dXnew,
 		int *indicator, int nindicator,
 		int *chunks, int nchunks,
-		int *cumsums_minus_counts, int ncumsums_minus_counts){
+		int *cumsums_minus_counts, int ncumsums_minus_counts,
+		int n_threads){
+
+    int i, t;
+    int retval;
+
+    if (nindicator != nX || dXnew != dX){
+    	return SPLIT_ERROR_INVALID_SIZE;
+    }
+
+    n_threads = get_split_n_threads(nX, n_threads);
 
-    int i;
+    int *thread_offsets = (int*) calloc((long) n_threads * ncumsums_minus_counts, sizeof(int));
 
-    int *offsets = (int*) malloc(nX * sizeof(int));
+    retval = compute_thread_offsets(thread_offsets, nXnew, indicator, nindicator,
+    		chunks, nchunks, cumsums_minus_counts, ncumsums_minus_counts, n_threads);
 
-    compute_split_offsets(offsets, nX, indicator, nindicator, chunks, nchunks, cumsums_minus_counts, ncumsums_minus_counts);
+    if (retval == SPLIT_SUCCESS){
 
-    for(i=0; i<nX; i++){
+		#pragma omp parallel for schedule(static) private(i)
+		for (t = 0; t < n_threads; t++){
+
+			int start = (int) (((long) t * nX) / n_threads);
+			int end = (int) (((long) (t + 1) * nX) / n_threads);
+			int *offsets = thread_offsets + (long) t * ncumsums_minus_counts;
+
+			for (i = start; i < end; i++){
+				int offset = offsets[chunks[indicator[i]]]++;
+				copy_pattern(X + (long) i * dX, Xnew + (long) offset * dX, dX);
+			}
+
+		}
 
-    	if (offsets[i] < 0 || offsets[i] >= nX){
-    		printf("Bad offset: %i [%i, %i]\n!", offsets[i], 0, nX);
-    		exit(-1);
-    	}
-        copy_pattern(X + i * dX, Xnew + offsets[i] * dX, dX);
     }
 
-    free(offsets);
+    free(thread_offsets);
+
+    return retval;
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Gathers the rows of X given by the indices: Row i of Xnew is row indices[i]
+ * of X (rows are copied in parallel, each thread processes a contiguous range
+ * of rows of Xnew)
+ * --------------------------------------------------------------------------------
+ */
+int gather_rows(FLOAT_TYPE *X, int nX, int dX,
+		FLOAT_TYPE *Xnew, int nXnew, int dXnew,
+		int *indices, int nindices,
+		int n_threads){
+
+    int i, t;
+    int retval = SPLIT_SUCCESS;
+
+    if (nindices != nXnew || dXnew != dX){
+    	return SPLIT_ERROR_INVALID_SIZE;
+    }
+
+    n_threads = get_split_n_threads(nXnew, n_threads);
+
+    omp_set_dynamic(0);
+    omp_set_num_threads(n_threads);
+
+	#pragma omp parallel for schedule(static) private(i) reduction(min:retval)
+	for (t = 0; t < n_threads; t++){
+
+		int start = (int) (((long) t * nXnew) / n_threads);
+		int end = (int) (((long) (t + 1) * nXnew) / n_threads);
+
+		for (i = start; i < end; i++){
+			if (indices[i] < 0 || indices[i] >= nX){
+				retval = SPLIT_ERROR_INVALID_OFFSET;
+				break;
+			}
+			copy_pattern(X + (long) indices[i] * dX, Xnew + (long) i * dX, dX);
+		}
+
+	}
+
+    return retval;
+
+}
 
-void compute_split_offsets(int *offsets, int noffsets,
+/* --------------------------------------------------------------------------------
+ * Computes split offsets, i.e., the new position of each row (see split_array)
+ * --------------------------------------------------------------------------------
+ */
+int compute_split_offsets(int *offsets, int noffsets,
 							int *indicator, int nindicator,
 							int *chunks, int nchunks,
-							int *cumsums_minus_counts, int ncumsums_minus_counts){
+							int *cumsums_minus_counts, int ncumsums_minus_counts,
+							int n_threads){
 
-    int i;
-    int *chunks_counters = (int*) calloc(nchunks, sizeof(int));
+    int i, t;
+    int retval;
 
-    for(i=0; i<noffsets; i++){
+    if (noffsets != nindicator){
+    	return SPLIT_ERROR_INVALID_SIZE;
+    }
 
-		int chunk = chunks[indicator[i]];
-		//printf("chunk=%i\n", chunk);
-		//offsets[i] = 0;
-		//printf("cumsums[chunk-1]=%i\n", cumsums[chunk-1]);
-		//printf("chunks_counters[chunk]=%i\n", chunks_counters[chunk]);
+    n_threads = get_split_n_threads(noffsets, n_threads);
 
-		// FIXME: Wrong access here? invalid chunk? chunk_counters wrong?
-		// afterwards: offsets[i]==1892929992 (WRONG)
-		// chunk -1 invalid? why -1? cumsums[chunk] should work
-		// ++ wrong?
-        offsets[i] = cumsums_minus_counts[chunk] + chunks_counters[chunk];
-        chunks_counters[chunk]++;
+    int *thread_offsets = (int*) calloc((long) n_threads * ncumsums_minus_counts, sizeof(int));
+
+    retval = compute_thread_offsets(thread_offsets, noffsets, indicator, nindicator,
+    		chunks, nchunks, cumsums_minus_counts, ncumsums_minus_counts, n_threads);
+
+    if (retval == SPLIT_SUCCESS){
+
+		#pragma omp parallel for schedule(static) private(i)
+		for (t = 0; t < n_threads; t++){
+
+			int start = (int) (((long) t * noffsets) / n_threads);
+			int end = (int) (((long) (t + 1) * noffsets) / n_threads);
+			int *thread_counters = thread_offsets + (long) t * ncumsums_minus_counts;
+
+			for (i = start; i < end; i++){
+				offsets[i] = thread_counters[chunks[indicator[i]]]++;
+			}
+
+		}
 
     }
 
-    free(chunks_counters);
+    free(thread_offsets);
+
+    return retval;
 
 }
 
+/* --------------------------------------------------------------------------------
+ * Transposes an array: The tiles of TRANSPOSE_BLOCK_SIZE x TRANSPOSE_BLOCK_SIZE
+ * elements fit into the cache (both for reading and writing); blocks of rows
+ * are processed in parallel
+ * --------------------------------------------------------------------------------
+ */
+void transpose_array(FLOAT_TYPE* X, int nX, int dX, FLOAT_TYPE* XT, int nXT, int dXT, int n_threads){
+
+	int i, j, ib, jb;
+
+	int n_blocks = (nX + TRANSPOSE_BLOCK_SIZE - 1) / TRANSPOSE_BLOCK_SIZE;
+
+	omp_set_dynamic(0);
+	omp_set_num_threads(n_threads > 0 ? n_threads : 1);
+
+	#pragma omp parallel for schedule(static) private(i, j, jb)
+	for (ib = 0; ib < n_blocks; ib++) {
+
+		int i_start = ib * TRANSPOSE_BLOCK_SIZE;
+		int i_end = i_start + TRANSPOSE_BLOCK_SIZE < nX ? i_start + TRANSPOSE_BLOCK_SIZE : nX;
+
+		for (jb = 0; jb < dX; jb += TRANSPOSE_BLOCK_SIZE) {
+
+			int j_end = jb + TRANSPOSE_BLOCK_SIZE < dX ? jb + TRANSPOSE_BLOCK_SIZE : dX;
+
+			for (j = jb; j < j_end; j++) {
+				for (i = i_start; i < i_end; i++) {
+					XT[(long) j * nX + i] = X[(long) i * dX + j];
+				}
+			}
+
+		}
+
+	}
+
+}
 
 /* --------------------------------------------------------------------------------
- * Transposes an array
+ * Transposes an array in place (the nX x dX elements are afterwards stored as
+ * dX x nX array) by following the cycles of the permutation; only one bit per
+ * element is needed in addition to mark the elements already moved
  * --------------------------------------------------------------------------------
  */
-void transpose_array(FLOAT_TYPE* X, int nX, int dX, FLOAT_TYPE* XT, int nXT, int dXT){
+void transpose_array_inplace(FLOAT_TYPE* X, int nX, int dX){
+
+	long p, start;
+	long n = (long) nX * dX;
+
+	if (nX <= 1 || dX <= 1) {
+		return;
+	}
+
+	unsigned char *moved = (unsigned char*) calloc((n + 7) / 8, sizeof(unsigned char));
+
+	for (start = 1; start < n - 1; start++) {
+
+		if (moved[start >> 3] & (1 << (start & 7))) {
+			continue;
+		}
+
+		// element at position p (row p / dX, column p % dX) is
+		// moved to position (p % dX) * nX + p / dX
+		FLOAT_TYPE value = X[start];
+		p = start;
+
+		do {
+			long q = (p % dX) * nX + p / dX;
+			FLOAT_TYPE tmp = X[q];
+			X[q] = value;
+			value = tmp;
+			moved[q >> 3] |= (1 << (q & 7));
+			p = q;
+		} while (p != start);
+
+	}
+
+	free(moved);
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Adds the votes given by preds (one column per model) to the class
+ * counts of the rows indices[i] (or i, if no indices are given)
+ * --------------------------------------------------------------------------------
+ */
+void add_votes(FLOAT_TYPE *preds, int npreds, int dpreds,
+		int *indices, int nindices,
+		int *class_counts, int nclass_counts, int dclass_counts){
 
 	int i, j;
 
-	for (j = 0; j < dX; j++) {
-		for (i = 0; i < nX; i++) {
+	for (i = 0; i < npreds; i++){
 
-			XT[j * nX + i] = X[i * dX + j];
+		int idx = (nindices > 0) ? indices[i] : i;
+		int *counts_row = class_counts + idx * dclass_counts;
 
+		for (j = 0; j < dpreds; j++){
+			counts_row[(int) preds[i * dpreds + j]]++;
 		}
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Adds the predictions given by preds (one column per model) to the sums
+ * of the rows indices[i] (or i, if no indices are given); n_values counts
+ * the number of predictions added per row
+ * --------------------------------------------------------------------------------
+ */
+void add_sums(FLOAT_TYPE *preds, int npreds, int dpreds,
+		int *indices, int nindices,
+		double *sums, int nsums,
+		int *n_values, int nn_values){
+
+	int i, j;
+
+	for (i = 0; i < npreds; i++){
+
+		int idx = (nindices > 0) ? indices[i] : i;
+
+		for (j = 0; j < dpreds; j++){
+			sums[idx] += preds[i * dpreds + j];
+		}
+		n_values[idx] += dpreds;
+
+	}
+
+}
+
+/* --------------------------------------------------------------------------------
+ * Computes the majority votes based on the class counts (ties are broken
+ * in favor of the smaller class label)
+ * --------------------------------------------------------------------------------
+ */
+void get_majority_votes(int *class_counts, int nclass_counts, int dclass_counts,
+		FLOAT_TYPE *y, int ny){
+
+	int i, k;
+
+	for (i = 0; i < nclass_counts; i++){
+
+		int *counts_row = class_counts + i * dclass_counts;
+		int max_class = 0;
+
+		for (k = 1; k < dclass_counts; k++){
+			if (counts_row[k] > counts_row[max_class]){
+				max_class = k;
+			}
+		}
+		y[i] = (FLOAT_TYPE) max_class;
+
 	}
 
 }
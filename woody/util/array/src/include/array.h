@@ -11,24 +11,64 @@
 #include <omp.h>
 
 /* --------------------------------------------------------------------------------
- * Splits the array X according to the indices
+ * Splits the array X according to the indices (in parallel); returns
+ * SPLIT_SUCCESS or one of the SPLIT_ERROR_* values
  * --------------------------------------------------------------------------------
  */
-void split_array(FLOAT_TYPE *X, int nX, int dX, FLOAT_TYPE *Xnew, int nXnew, int dXnew, int *indicator, int nindicator, int *chunks, int nchunks, int *cumsums_minus_counts, int ncumsums_minus_counts);
+int split_array(FLOAT_TYPE *X, int nX, int dX, FLOAT_TYPE *Xnew, int nXnew, int dXnew, int *indicator, int nindicator, int *chunks, int nchunks, int *cumsums_minus_counts, int ncumsums_minus_counts, int n_threads);
 
 /* --------------------------------------------------------------------------------
- * Computes split offsets
+ * Gathers the rows of X given by the indices (in parallel); returns
+ * SPLIT_SUCCESS or one of the SPLIT_ERROR_* values
  * --------------------------------------------------------------------------------
  */
-void compute_split_offsets(int *offsets, int noffsets,
+int gather_rows(FLOAT_TYPE *X, int nX, int dX, FLOAT_TYPE *Xnew, int nXnew, int dXnew, int *indices, int nindices, int n_threads);
+
+/* --------------------------------------------------------------------------------
+ * Computes split offsets (in parallel); returns SPLIT_SUCCESS or one of
+ * the SPLIT_ERROR_* values
+ * --------------------------------------------------------------------------------
+ */
+int compute_split_offsets(int *offsets, int noffsets,
 							int *indicator, int nindicator,
 							int *chunks, int nchunks,
-							int *cumsums_minus_counts, int ncumsums_minus_counts);
+							int *cumsums_minus_counts, int ncumsums_minus_counts,
+							int n_threads);
+
+/* --------------------------------------------------------------------------------
+ * Transposes an array (blocked, in parallel)
+ * --------------------------------------------------------------------------------
+ */
+void transpose_array(FLOAT_TYPE* X, int nX, int dX, FLOAT_TYPE* XT, int nXT, int dXT, int n_threads);
+
+/* --------------------------------------------------------------------------------
+ * Transposes an array in place
+ * --------------------------------------------------------------------------------
+ */
+void transpose_array_inplace(FLOAT_TYPE* X, int nX, int dX);
+
+/* --------------------------------------------------------------------------------
+ * Adds votes (one column per model) to the class counts of the given rows
+ * --------------------------------------------------------------------------------
+ */
+void add_votes(FLOAT_TYPE *preds, int npreds, int dpreds,
+		int *indices, int nindices,
+		int *class_counts, int nclass_counts, int dclass_counts);
+
+/* --------------------------------------------------------------------------------
+ * Adds predictions (one column per model) to the sums of the given rows
+ * --------------------------------------------------------------------------------
+ */
+void add_sums(FLOAT_TYPE *preds, int npreds, int dpreds,
+		int *indices, int nindices,
+		double *sums, int nsums,
+		int *n_values, int nn_values);
 
 /* --------------------------------------------------------------------------------
- * Transposes an array
+ * Computes the majority votes based on the class counts
  * --------------------------------------------------------------------------------
  */
-void transpose_array(FLOAT_TYPE* X, int nX, int dX, FLOAT_TYPE* XT, int nXT, int dXT);
+void get_majority_votes(int *class_counts, int nclass_counts, int dclass_counts,
+		FLOAT_TYPE *y, int ny);
 
 #endif
@@ -23,4 +23,16 @@
 #define MIN_FLOAT_TYPE     -3.402823466e+38
 #endif
 
+// transpose_array: size of the tiles (rows x columns) that are
+// transposed at once
+#define TRANSPOSE_BLOCK_SIZE 	32
+
+// split_array/compute_split_offsets/gather_rows: return values
+// and minimum number of rows per thread
+#define SPLIT_SUCCESS 				0
+#define SPLIT_ERROR_INVALID_SIZE 	-1
+#define SPLIT_ERROR_INVALID_CHUNK 	-2
+#define SPLIT_ERROR_INVALID_OFFSET 	-3
+#define SPLIT_MIN_ROWS_PER_THREAD 	4096
+
 #endif
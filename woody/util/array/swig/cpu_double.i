@@ -16,10 +16,15 @@
 %apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE *Xnew, int nXnew, int dXnew)}
 %apply (double* INPLACE_ARRAY1, int DIM1) {(FLOAT_TYPE *y, int ny)}
 %apply (double* INPLACE_ARRAY1, int DIM1) {(FLOAT_TYPE *ynew, int nynew)}
+%apply (double* INPLACE_ARRAY2, int DIM1, int DIM2) {(FLOAT_TYPE *preds, int npreds, int dpreds)}
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *offsets, int noffsets)}
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *indicator, int nindicator)}
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *chunks, int nchunks)}
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *counts, int ncounts)}
 %apply (int* INPLACE_ARRAY1, int DIM1) {(int *cumsums_minus_counts, int ncumsums_minus_counts)}
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *indices, int nindices)}
+%apply (int* INPLACE_ARRAY2, int DIM1, int DIM2) {(int *class_counts, int nclass_counts, int dclass_counts)}
+%apply (double* INPLACE_ARRAY1, int DIM1) {(double *sums, int nsums)}
+%apply (int* INPLACE_ARRAY1, int DIM1) {(int *n_values, int nn_values)}
 
 %include "array.h"      
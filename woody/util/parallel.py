@@ -15,6 +15,7 @@ def wrapped_task(queue, task, args, kwargs):
     queue.put(task(*args, **kwargs))        
 
 from multiprocessing import Queue
+from Queue import Queue as ThreadQueue
 
 # https://github.com/joblib/joblib/issues/138    
 def start_via_single_process(task, args, kwargs):
@@ -94,6 +95,237 @@ def perform_task_in_parallel(task, params_parallel, n_jobs=1, backend="multiproc
     else:
         raise Exception("Unknown backend: %s" % str(backend))
     
+def create_pool(n_jobs=1, backend="multiprocessing", initializer=None, initargs=()):
+    """ Returns a pool of n_jobs workers that can be used
+    for several tasks (the caller has to close and join 
+    the pool). The initializer is called once per worker
+    (e.g., to load data that are used by all tasks).
+    
+    Parameters
+    ----------
+    n_jobs : int, default 1
+        The number of jobs that shall be used
+    backend : str, default 'multiprocessing'
+    initializer : callable, default None
+        Called with initargs by each worker 
+        (pool_init, if None)
+    initargs : tuple, default ()
+        The arguments for the initializer
+    """
+    
+    if backend == 'multiprocessing':
+        if initializer is None:
+            initializer = pool_init
+        return multiprocessing.Pool(n_jobs, initializer=initializer, initargs=initargs)
+    elif backend == 'threading':
+        return ThreadPool(n_jobs, initializer=initializer, initargs=initargs)
+    else:
+        raise Exception("Unknown backend: %s" % str(backend))
+    
+def _wrapped_budget_task(args):
+    
+    task, index, params = args
+    
+    try:
+        return index, None, task(params)
+    except Exception:
+        import traceback
+        return index, traceback.format_exc(), None
+    
+def _get_worker_pids(pool):
+    
+    # the workers of a process pool only exit if they die (e.g., 
+    # if they are killed due to a lack of memory); the pool starts
+    # new workers, but the tasks of the dead ones are never finished
+    return set([p.pid for p in pool._pool if p.exitcode is None])
+
+def perform_task_in_parallel_with_budget(task, params_parallel, costs, budget, n_jobs=1, backend="multiprocessing", poll_timeout=1.0):
+    """ Performs a task in parallel via a pool of workers 
+    that is kept for all tasks. The tasks are started in 
+    order of decreasing costs (e.g., memory needed); a task 
+    is only started if the costs of all running tasks do 
+    not exceed the budget afterwards (a task whose costs 
+    exceed the budget is run on its own). The running tasks 
+    are polled every poll_timeout seconds; an exception is 
+    raised if a worker process dies (its task is lost).
+     
+    Parameters
+    ----------
+    task : callable
+        The function/procedure that shall be executed
+    params_parallel : list
+        The parallel parameters
+    costs : list
+        The costs of the tasks (one per parameter)
+    budget : float
+        The maximum sum of costs of running tasks
+    n_jobs : int, default 1
+        The number of jobs that shall be used
+    backend : str, default 'multiprocessing'
+    poll_timeout : float, default 1.0
+        The time (in seconds) to wait for a running 
+        task before the workers are checked again
+    
+    Returns
+    -------
+    list : The results (in the order of params_parallel)
+    """
+    
+    pool = create_pool(n_jobs, backend=backend)
+    if backend == "multiprocessing":
+        worker_pids = _get_worker_pids(pool)
+    
+    pending = sorted(range(len(params_parallel)), key=lambda i: costs[i], reverse=True)
+    results = [None] * len(params_parallel)
+    running, running_costs = {}, 0
+    
+    try:
+        
+        while len(pending) > 0 or len(running) > 0:
+            
+            # start largest pending tasks that fit into the budget
+            i = 0
+            while i < len(pending) and len(running) < n_jobs:
+                index = pending[i]
+                if len(running) == 0 or running_costs + costs[index] <= budget:
+                    running[index] = pool.apply_async(_wrapped_budget_task, ((task, index, params_parallel[index]),))
+                    running_costs += costs[index]
+                    del pending[i]
+                else:
+                    i += 1
+            
+            # wait for (at least) one of the running tasks
+            finished = [index for index in sorted(running.keys()) if running[index].ready()]
+            while len(finished) == 0:
+                if backend == "multiprocessing" and _get_worker_pids(pool) != worker_pids:
+                    raise Exception("Worker process died, lost (at least) one of the tasks %s" % str(sorted(running.keys())))
+                running.values()[0].wait(poll_timeout)
+                finished = [index for index in sorted(running.keys()) if running[index].ready()]
+            
+            for index in finished:
+                
+                _, error, result = running.pop(index).get()
+                running_costs -= costs[index]
+                
+                if error is not None:
+                    raise Exception("Task %i failed:\n%s" % (index, error))
+                results[index] = result
+            
+    except:
+        pool.terminate()
+        raise
+    
+    pool.close()
+    pool.join()
+    
+    return results
+    
+def _pipeline_reader(read, queue, stop, errors, timer):
+    
+    try:
+        while not stop.is_set():
+            if timer is not None: timer.start()
+            item = read()
+            if timer is not None: timer.stop()
+            if item is None:
+                break
+            queue.put(item)
+    except Exception:
+        import traceback
+        errors.append(traceback.format_exc())
+        
+    queue.put(None)
+    
+def _pipeline_writer(write, queue, errors, timer):
+    
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        # after an error, the remaining items are discarded
+        if len(errors) == 0:
+            try:
+                if timer is not None: timer.start()
+                write(item)
+                if timer is not None: timer.stop()
+            except Exception:
+                import traceback
+                errors.append(traceback.format_exc())
+    
+def perform_pipeline(read, evaluate, write, max_queued=2, timers=None):
+    """ Performs three overlapping stages: a reader thread 
+    that calls read() until None is returned, the evaluation 
+    of the items read (in the calling thread), and a writer 
+    thread that calls write() for each result. Hence, item 
+    k+1 can be read and the result of item k-1 can be written 
+    while item k is evaluated.
+     
+    Parameters
+    ----------
+    read : callable
+        Returns the next item (None, if no items are left)
+    evaluate : callable
+        Returns the result for a single item
+    write : callable
+        Processes the result of a single item
+    max_queued : int, default 2
+        The maximum number of items (results) that
+        are waiting for the evaluation (writer)
+    timers : list, default None
+        Three Timer instances that measure the time 
+        spent on reading, evaluating, and writing
+    """
+    
+    import threading
+    
+    if timers is None:
+        timers = [None, None, None]
+    
+    read_queue, write_queue = ThreadQueue(max_queued), ThreadQueue(max_queued)
+    stop = threading.Event()
+    read_errors, write_errors = [], []
+    
+    reader = threading.Thread(target=_pipeline_reader, args=(read, read_queue, stop, read_errors, timers[0]))
+    writer = threading.Thread(target=_pipeline_writer, args=(write, write_queue, write_errors, timers[2]))
+    reader.daemon, writer.daemon = True, True
+    reader.start()
+    writer.start()
+    
+    try:
+        
+        while len(write_errors) == 0:
+            
+            item = read_queue.get()
+            if item is None:
+                break
+            
+            if timers[1] is not None: timers[1].start()
+            result = evaluate(item)
+            if timers[1] is not None: timers[1].stop()
+            write_queue.put(result)
+            
+    except:
+        # let the reader terminate (it might wait for a free slot)
+        stop.set()
+        while read_queue.get() is not None:
+            pass
+        write_queue.put(None)
+        writer.join()
+        raise
+    
+    # stop the reader in case of a write error
+    stop.set()
+    if item is not None:
+        while read_queue.get() is not None:
+            pass
+    reader.join()
+    write_queue.put(None)
+    writer.join()
+    
+    if len(read_errors) > 0:
+        raise Exception("Reading failed:\n%s" % read_errors[0])
+    if len(write_errors) > 0:
+        raise Exception("Writing failed:\n%s" % write_errors[0])
     
 if __name__ == "__main__":
     